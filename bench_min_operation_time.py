@@ -0,0 +1,103 @@
+import os
+import time
+from datetime import date
+import pandas as pd
+import pyomo.core as pyomo
+from pyomo.opt.base import SolverFactory
+from pyomo.repn import generate_standard_repn
+import urbs
+
+# Compares the two formulations of the minimum consecutive operation time
+# (c.f. urbs/features/MILP/MILP_min_operation_time.py):
+# - 'aggregated': big-M sum over the last n run states with the extra binary
+#                 pro_out_last_n_timesteps (default)
+# - 'startup': startup(t-n+1) + … + startup(t) <= run(t), selected by the
+#              row 'MILP min_operation_time startup' in the MILP properties
+
+input_files = 'Input_MILP.xlsx'
+input_dir = 'Input'
+input_path = os.path.join(input_dir, input_files)
+
+result_name = 'Bench-min-op-time'
+
+# objective function
+objective = 'cost'  # set either 'cost' or 'CO2' as objective
+
+# Choose Solver (cplex, glpk, gurobi, ...)
+solver = 'gurobi'
+
+# simulation timesteps
+(offset, length) = (0, 188)  # time step selection
+timesteps = range(offset, offset+length+1)
+dt = 0.25  # length of each time step (unit: hours)
+
+formulations = ['aggregated', 'startup']
+
+
+def count_nonzeros(m):
+    """Count the nonzero coefficients of all active constraints of a model.
+    """
+    nonzeros = 0
+    for con in m.component_data_objects(pyomo.Constraint, active=True):
+        repn = generate_standard_repn(con.body, quadratic=True)
+        nonzeros += (len(repn.linear_vars) + len(repn.quadratic_vars))
+    return nonzeros
+
+
+def set_formulation(data, formulation):
+    milp = data['MILP'].drop('MILP min_operation_time startup',
+                             errors='ignore')
+    if formulation == 'startup':
+        milp.loc['MILP min_operation_time startup'] = 'yes'
+    data['MILP'] = milp
+    return data
+
+
+if __name__ == '__main__':
+    # name + time stamp
+    result_dir = urbs.prepare_result_directory(result_name)
+
+    results = []
+    for formulation in formulations:
+        data = urbs.read_input(input_path, date.today().year)
+        data = set_formulation(data, formulation)
+        urbs.validate_input(data, dt)
+
+        start = time.time()
+        prob = urbs.create_model(data, dt, timesteps, objective)
+        build_time = time.time() - start
+
+        optim = SolverFactory(solver)
+        optim = urbs.setup_solver(
+            optim,
+            logfile=os.path.join(result_dir, '{}.log'.format(formulation)))
+
+        # root bound: objective of the LP relaxation
+        relaxed = urbs.warmstart.relax_integer_vars(prob)
+        start = time.time()
+        optim.solve(prob)
+        relaxation_time = time.time() - start
+        root_bound = pyomo.value(prob.objective_function)
+        urbs.warmstart.restore_integer_vars(relaxed)
+
+        # time to optimality
+        start = time.time()
+        result = optim.solve(prob)
+        solve_time = time.time() - start
+
+        results.append({
+            'formulation': formulation,
+            'variables': prob.nvariables(),
+            'constraints': prob.nconstraints(),
+            'nonzeros': count_nonzeros(prob),
+            'build time (s)': build_time,
+            'root bound': root_bound,
+            'relaxation time (s)': relaxation_time,
+            'objective': pyomo.value(prob.objective_function),
+            'solve time (s)': solve_time,
+            'termination': str(result.solver.termination_condition)})
+
+    results = pd.DataFrame(results).set_index('formulation')
+    results['root gap'] = 1 - results['root bound'] / results['objective']
+    print(results.to_string())
+    results.to_csv(os.path.join(result_dir, 'min_operation_time.csv'))
@@ -8,15 +8,6 @@ input_dir = 'Input'
 input_path = os.path.join(input_dir, input_files)
 
 result_name = 'single-year'
-result_dir = urbs.prepare_result_directory(result_name)  # name + time stamp
-
-# copy input file to result directory
-try:
-    shutil.copytree(input_path, os.path.join(result_dir, input_dir))
-except NotADirectoryError:
-    shutil.copyfile(input_path, os.path.join(result_dir, input_files))
-# copy run file to result directory
-shutil.copy(__file__, result_dir)
 
 # objective function
 objective = 'cost'  # set either 'cost' or 'CO2' as objective
@@ -24,6 +15,11 @@ objective = 'cost'  # set either 'cost' or 'CO2' as objective
 # Choose Solver (cplex, glpk, gurobi, ...)
 solver = 'gurobi'
 
+# number of scenarios solved in parallel (default: number of CPUs) and
+# number of threads per solver
+processes = None
+threads = None
+
 # simulation timesteps
 (offset, length) = (0, 120)  # time step selection
 timesteps = range(offset, offset+length+1)
@@ -75,11 +71,25 @@ scenarios = [
              # urbs.scenario_all_together
             ]
 
-for scenario in scenarios:
-    prob = urbs.run_scenario(input_path, solver, timesteps, scenario,
-                             result_dir, dt, objective,
-                             plot_tuples=plot_tuples,
-                             plot_sites_name=plot_sites_name,
-                             plot_periods=plot_periods,
-                             report_tuples=report_tuples,
-                             report_sites_name=report_sites_name)
+if __name__ == '__main__':
+    result_dir = urbs.prepare_result_directory(result_name)  # name + time stamp
+
+    # copy input file to result directory
+    try:
+        shutil.copytree(input_path, os.path.join(result_dir, input_dir))
+    except NotADirectoryError:
+        shutil.copyfile(input_path, os.path.join(result_dir, input_files))
+    # copy run file to result directory
+    shutil.copy(__file__, result_dir)
+
+    # each scenario is run in its own process
+    summary = urbs.run_scenarios(input_path, solver, timesteps, scenarios,
+                                 result_dir, dt, objective,
+                                 processes=processes,
+                                 threads=threads,
+                                 colors=my_colors,
+                                 plot_tuples=plot_tuples,
+                                 plot_sites_name=plot_sites_name,
+                                 plot_periods=plot_periods,
+                                 report_tuples=report_tuples,
+                                 report_sites_name=report_sites_name)
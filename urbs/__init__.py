@@ -14,11 +14,18 @@ from .colorcodes import COLORS
 from .model import create_model
 from .input import *
 from .validation import validate_input
-from .output import get_constants, get_timeseries
-from .plot import plot, result_figures, to_color
+from .output import get_constants, get_timeseries, TimeseriesCache
+from .plot import plot, plot_data, draw_plot, result_figures, to_color
 from .pyomoio import get_entity, get_entities, list_entities
 from .report import report
 from .runfunctions import *
-from .saveload import load, save
+from .decomposition import create_benders_master, \
+                           create_benders_subproblem, solve_benders, \
+                           run_benders_scenario, solve_valo_decomposition, \
+                           run_valo_decomposition_scenario
+from .heuristics import relax_and_fix
+from .saveload import load, save, load_parquet, save_parquet
 from .scenarios import *
+from .warmstart import set_warmstart, set_warmstart_from_result, \
+                        set_warmstart_from_relaxation
 from .identify import identify_mode, identify_expansion
\ No newline at end of file
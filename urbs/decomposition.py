@@ -0,0 +1,1356 @@
+import math
+import multiprocessing
+import os
+import traceback
+import pandas as pd
+import pyomo.core as pyomo
+from datetime import datetime, date
+from pyomo.opt.base import SolverFactory
+from .model import create_model, def_process_capacity_rule, \
+                   res_process_capacity_rule, res_area_rule, def_costs_rule, \
+                   vertex_power_surplus
+from .input import *
+from .validation import *
+from .saveload import create_result_cache, save, ResultContainer
+from .runfunctions import setup_solver
+from .features.storage import op_sto_tuples, inst_sto_tuples, \
+                              def_storage_capacity_rule, \
+                              def_storage_power_rule, \
+                              res_storage_power_rule, \
+                              res_storage_capacity_rule, \
+                              def_storage_energy_power_ratio_rule, \
+                              def_storage_class_rule
+from .features.transmission import op_tra_tuples, inst_tra_tuples, \
+                                   remove_duplicate_transmission, \
+                                   def_transmission_capacity_rule, \
+                                   res_transmission_capacity_rule, \
+                                   res_transmission_symmetry_rule
+from .features.BuySellPrice import res_sell_buy_symmetry_rule, \
+                                   add_sell_buy_pairs
+from .features.VariableLoad import add_valo
+from .features.lifetime import stf_built_dict
+
+
+# Benders decomposition for intertemporal capacity expansion
+# ==========================================================
+# The master problem holds the capacity expansion decisions (cap_pro_new,
+# cap_sto_c_new, cap_sto_p_new, cap_tra_new) together with the investment
+# and fixed costs. For every support timeframe the operational costs are
+# estimated by a variable eta[stf], which is bounded by cuts.
+# Each support timeframe is solved as an independent single year LP with
+# capacities fixed to the master solution. The duals of the fixing
+# constraints yield optimality cuts; if a subproblem is infeasible, a phase 1
+# problem with slack variables on the vertex equation yields a feasibility
+# cut instead.
+
+# cost types which are covered by the subproblems
+operational_cost_types = ['Variable', 'Fuel', 'Environmental', 'Revenue',
+                          'Purchase']
+
+# capacity families, which are passed from the master to the subproblems:
+# family name: (expression name, tuple set name, constant capacity dict name)
+capacity_families = {
+    'pro': ('cap_pro', 'pro_tuples', 'pro_const_cap_dict'),
+    'sto_c': ('cap_sto_c', 'sto_tuples', 'sto_const_cap_c_dict'),
+    'sto_p': ('cap_sto_p', 'sto_tuples', 'sto_const_cap_p_dict'),
+    'tra': ('cap_tra', 'tra_tuples', 'tra_const_cap_dict')}
+
+
+def validate_benders_input(data, objective='cost'):
+    """ Checks if the given input can be solved with Benders decomposition.
+    Raises a ValueError if not.
+    """
+    mode = identify_mode(data)
+    if not mode['int']:
+        raise ValueError('Benders decomposition requires an intertemporal '
+                         'input with more than one support timeframe.')
+    if mode['mip']:
+        raise ValueError('Benders decomposition requires LP subproblems. '
+                         'Deactivate all MILP options in the Global sheet.')
+    if objective != 'cost':
+        raise ValueError("Benders decomposition is only implemented for the "
+                         "objective 'cost'.")
+    global_prop = data['global_prop']['value']
+    stf_min = min(global_prop.index.get_level_values(0))
+    for prop in ['CO2 budget', 'Cost budget']:
+        if ((stf_min, prop) in global_prop.index and
+                not math.isinf(global_prop[(stf_min, prop)]) and
+                global_prop[(stf_min, prop)] >= 0):
+            raise ValueError("The '{}' couples all support timeframes and "
+                             "is not supported by the Benders "
+                             "decomposition.".format(prop))
+    for (stf, prop), value in global_prop.items():
+        if prop == 'Cost limit' and not math.isinf(value) and value >= 0:
+            raise ValueError("The 'Cost limit' includes investment costs "
+                             "and is not supported by the Benders "
+                             "decomposition.")
+
+
+def create_benders_master(data, dt=1, timesteps=None, eta_lower_bound=0):
+    """Create the master problem of the Benders decomposition.
+
+    The master problem only contains the capacity expansion part of the
+    intertemporal urbs model (capacities, capacity bounds, area restriction,
+    storage ratios and classes, symmetries) and the investment and fixed
+    costs. Operational costs of each support timeframe are represented by
+    the variable eta[stf].
+
+    Args:
+        - data: a dict of up to 12 DataFrames (c.f. read_input)
+        - dt: timestep duration in hours (default: 1)
+        - timesteps: optional list of timesteps, default: demand timeseries
+        - eta_lower_bound: lower bound of the operational cost estimates,
+          must be lower than the operational costs of each support timeframe
+          (default: 0)
+
+    Returns:
+        a pyomo ConcreteModel object
+    """
+    if not timesteps:
+        timesteps = data['demand'].index.tolist()
+    m = pyomo_model_prep(data, timesteps, dt)
+    m.name = 'urbs Benders master'
+    m.created = datetime.now().strftime('%Y%m%dT%H%M')
+    m._data = data
+
+    m.dt = pyomo.Param(
+        initialize=dt,
+        doc='Time step duration (in hours), default: 1')
+
+    # Sets
+    indexlist = set()
+    for key in m.commodity_dict["price"]:
+        indexlist.add(tuple(key)[0])
+    m.stf = pyomo.Set(
+        initialize=indexlist,
+        ordered=True,
+        doc='Set of modeled support timeframes (e.g. years)')
+    indexlist = set()
+    for key in m.commodity_dict["price"]:
+        indexlist.add(tuple(key)[1])
+    m.sit = pyomo.Set(
+        initialize=indexlist,
+        doc='Set of sites')
+    indexlist = set()
+    for key in m.commodity_dict["price"]:
+        indexlist.add(tuple(key)[2])
+    m.com = pyomo.Set(
+        initialize=indexlist,
+        doc='Set of commodities')
+    indexlist = set()
+    for key in m.commodity_dict["price"]:
+        indexlist.add(tuple(key)[3])
+    m.com_type = pyomo.Set(
+        initialize=indexlist,
+        doc='Set of commodity types')
+    indexlist = set()
+    for key in m.process_dict["inv-cost"]:
+        indexlist.add(tuple(key)[2])
+    m.pro = pyomo.Set(
+        initialize=indexlist,
+        doc='Set of conversion processes')
+    m.cost_type = pyomo.Set(
+        initialize=['Invest', 'Fixed'],
+        doc='Set of cost types covered by the master problem')
+
+    m.sit_tuples = pyomo.Set(
+        within=m.stf * m.sit,
+        initialize=tuple(m.site_dict["area"].keys()),
+        doc='Combinations of support timeframes and sites')
+    m.com_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.com * m.com_type,
+        initialize=tuple(m.commodity_dict["price"].keys()),
+        doc='Combinations of defined commodities, e.g. (2018,Mid,Elec,Demand)')
+    m.pro_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro,
+        initialize=tuple(m.process_dict["inv-cost"].keys()),
+        doc='Combinations of possible processes, e.g. (2018,North,Coal plant)')
+    m.operational_pro_tuples = pyomo.Set(
+        within=m.sit * m.pro * m.stf * m.stf,
+        initialize=op_pro_tuples(m.pro_tuples, m),
+        doc='Processes that are still operational through stf_later'
+            '(and the relevant years following), if built in stf'
+            'in stf.')
+    m.inst_pro_tuples = pyomo.Set(
+        within=m.sit * m.pro * m.stf,
+        initialize=inst_pro_tuples(m),
+        doc='Installed processes that are still operational through stf')
+    m.pro_stf_built_dict = stf_built_dict(m.operational_pro_tuples)
+    m.pro_area_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro,
+        initialize=tuple(m.proc_area_dict.keys()),
+        doc='Processes and Sites with area Restriction')
+
+    # Variables
+    m.costs = pyomo.Var(
+        m.cost_type,
+        within=pyomo.Reals,
+        doc='Costs by type (EUR/a)')
+    m.cap_pro_new = pyomo.Var(
+        m.pro_tuples,
+        within=pyomo.NonNegativeReals,
+        doc='New process capacity (MW)')
+    m.cap_pro = pyomo.Expression(
+        m.pro_tuples,
+        rule=def_process_capacity_rule,
+        doc='total process capacity')
+    m.eta = pyomo.Var(
+        m.stf,
+        within=pyomo.Reals,
+        bounds=(eta_lower_bound, None),
+        doc='Estimated operational costs of support timeframe (EUR/a)')
+
+    # Equations
+    m.res_process_capacity = pyomo.Constraint(
+        m.pro_tuples,
+        rule=res_process_capacity_rule,
+        doc='process.cap-lo <= total process capacity <= process.cap-up')
+    m.res_area = pyomo.Constraint(
+        m.sit_tuples,
+        rule=res_area_rule,
+        doc='used process area <= total process area')
+
+    if m.mode['tra']:
+        m = add_benders_master_transmission(m)
+    if m.mode['sto']:
+        m = add_benders_master_storage(m)
+    if m.mode['bsp']:
+        m = add_benders_master_buy_sell_price(m)
+
+    m.def_costs = pyomo.Constraint(
+        m.cost_type,
+        rule=def_costs_rule,
+        doc='main cost function by cost type')
+
+    # optimality and feasibility cuts are added during the iterations
+    m.benders_cuts = pyomo.ConstraintList(
+        doc='Benders optimality and feasibility cuts')
+
+    m.objective_function = pyomo.Objective(
+        rule=benders_master_cost_rule,
+        sense=pyomo.minimize,
+        doc='minimize(invest + fixed costs + estimated operational costs)')
+
+    return m
+
+
+def add_benders_master_transmission(m):
+    if m.mode['dpf']:
+        tra_tuples_dc = set(tuple(key) for key
+                            in m.transmission_dc_dict['reactance'])
+        tra_tuples_tp = (set(tuple(key) for key
+                             in m.transmission_dict['reactance']) -
+                         tra_tuples_dc)
+        tra_tuples = (remove_duplicate_transmission(tra_tuples_dc) |
+                      tra_tuples_tp)
+    else:
+        tra_tuples = set(tuple(key) for key in m.transmission_dict['eff'])
+        tra_tuples_tp = tra_tuples
+
+    indexlist = set()
+    for key in m.transmission_dict["eff"]:
+        indexlist.add(tuple(key)[3])
+    m.tra = pyomo.Set(
+        initialize=indexlist,
+        doc='Set of transmission technologies')
+    m.tra_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=tuple(tra_tuples),
+        doc='Combinations of possible transmissions, e.g. '
+            '(2020,South,Mid,hvac,Elec)')
+    m.tra_tuples_tp = pyomo.Set(
+        within=m.stf * m.sit * m.sit * m.tra * m.com,
+        initialize=tuple(tra_tuples_tp),
+        doc='Combinations of possible transport transmissions,'
+            'e.g. (2020,South,Mid,hvac,Elec)')
+    m.operational_tra_tuples = pyomo.Set(
+        within=m.sit * m.sit * m.tra * m.com * m.stf * m.stf,
+        initialize=op_tra_tuples(m.tra_tuples, m),
+        doc='Transmissions that are still operational through stf_later'
+            '(and the relevant years following), if built in stf'
+            'in stf.')
+    m.inst_tra_tuples = pyomo.Set(
+        within=m.sit * m.sit * m.tra * m.com * m.stf,
+        initialize=inst_tra_tuples(m),
+        doc='Installed transmissions that are still operational'
+            'through stf')
+    m.tra_stf_built_dict = stf_built_dict(m.operational_tra_tuples)
+
+    m.cap_tra_new = pyomo.Var(
+        m.tra_tuples,
+        within=pyomo.NonNegativeReals,
+        doc='New transmission capacity (MW)')
+    m.cap_tra = pyomo.Expression(
+        m.tra_tuples,
+        rule=def_transmission_capacity_rule,
+        doc='total transmission capacity')
+
+    m.res_transmission_capacity = pyomo.Constraint(
+        m.tra_tuples,
+        rule=res_transmission_capacity_rule,
+        doc='transmission.cap-lo <= total transmission capacity <= '
+            'transmission.cap-up')
+    m.res_transmission_symmetry = pyomo.Constraint(
+        m.tra_tuples_tp,
+        rule=res_transmission_symmetry_rule,
+        doc='total transmission capacity must be symmetric in both directions')
+    return m
+
+
+def add_benders_master_storage(m):
+    indexlist = set()
+    for key in m.storage_dict["eff-in"]:
+        indexlist.add(tuple(key)[2])
+    m.sto = pyomo.Set(
+        initialize=indexlist,
+        doc='Set of storage technologies')
+    m.sto_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sto * m.com,
+        initialize=tuple(m.storage_dict["eff-in"].keys()),
+        doc='Combinations of possible storage by site,'
+            'e.g. (2020,Mid,Bat,Elec)')
+    m.operational_sto_tuples = pyomo.Set(
+        within=m.sit * m.sto * m.com * m.stf * m.stf,
+        initialize=op_sto_tuples(m.sto_tuples, m),
+        doc='Processes that are still operational through stf_later'
+            '(and the relevant years following), if built in stf'
+            'in stf.')
+    m.inst_sto_tuples = pyomo.Set(
+        within=m.sit * m.sto * m.com * m.stf,
+        initialize=inst_sto_tuples(m),
+        doc='Installed storages that are still operational through stf')
+    m.sto_stf_built_dict = stf_built_dict(m.operational_sto_tuples)
+    m.sto_ep_ratio_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.sto * m.com,
+        initialize=tuple(m.sto_ep_ratio_dict.keys()),
+        doc='storages with given energy to power ratio')
+
+    m.cap_sto_c_new = pyomo.Var(
+        m.sto_tuples,
+        within=pyomo.NonNegativeReals,
+        doc='New storage size (MWh)')
+    m.cap_sto_p_new = pyomo.Var(
+        m.sto_tuples,
+        within=pyomo.NonNegativeReals,
+        doc='New  storage power (MW)')
+    m.cap_sto_c = pyomo.Expression(
+        m.sto_tuples,
+        rule=def_storage_capacity_rule,
+        doc='Total storage size (MWh)')
+    m.cap_sto_p = pyomo.Expression(
+        m.sto_tuples,
+        rule=def_storage_power_rule,
+        doc='Total storage power (MW)')
+
+    m.res_storage_power = pyomo.Constraint(
+        m.sto_tuples,
+        rule=res_storage_power_rule,
+        doc='storage.cap-lo-p <= storage power <= storage.cap-up-p')
+    m.res_storage_capacity = pyomo.Constraint(
+        m.sto_tuples,
+        rule=res_storage_capacity_rule,
+        doc='storage.cap-lo-c <= storage capacity <= storage.cap-up-c')
+    m.def_storage_energy_power_ratio = pyomo.Constraint(
+        m.sto_ep_ratio_tuples,
+        rule=def_storage_energy_power_ratio_rule,
+        doc='storage capacity = storage power * storage E2P ratio')
+    m.storage_class = pyomo.Constraint(
+        m.sto_tuples,
+        rule=def_storage_class_rule,
+        doc='storage class, if items have the same class, their expansion '
+            'is connected')
+    return m
+
+
+def add_benders_master_buy_sell_price(m):
+    m.com_sell = pyomo.Set(
+        within=m.com,
+        initialize=commodity_subset(m.com_tuples, 'Sell'),
+        doc='Commodities that can be sold')
+    m.com_buy = pyomo.Set(
+        within=m.com,
+        initialize=commodity_subset(m.com_tuples, 'Buy'),
+        doc='Commodities that can be purchased')
+    m.pro_input_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro * m.com,
+        initialize=[(stf, site, process, commodity)
+                    for (stf, site, process) in m.pro_tuples
+                    for commodity in m.pro_input_com_dict.get((stf, process),
+                                                      [])],
+        doc='Commodities consumed by process by site,'
+            'e.g. (2020,Mid,PV,Solar)')
+    m.pro_output_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro * m.com,
+        initialize=[(stf, site, process, commodity)
+                    for (stf, site, process) in m.pro_tuples
+                    for commodity in m.pro_output_com_dict.get((stf, process),
+                                                       [])],
+        doc='Commodities produced by process by site, e.g. (2020,Mid,PV,Elec)')
+    m = add_sell_buy_pairs(m)
+    m.res_sell_buy_symmetry = pyomo.Constraint(
+        m.pro_input_tuples,
+        rule=res_sell_buy_symmetry_rule,
+        doc='power connection capacity must be symmetric in both directions')
+    return m
+
+
+def benders_master_cost_rule(m):
+    return pyomo.summation(m.costs) + pyomo.summation(m.eta)
+
+
+def benders_cost_factor(m, stf):
+    """ Multiplier of the operational costs of support timeframe stf in the
+    intertemporal objective (c.f. cost_factor in pyomo_model_prep).
+    """
+    return m.stf_factor_dict['cost_factor'][stf]
+
+
+def benders_capacities(m, stf):
+    """ Capacities of the master problem for support timeframe stf.
+
+    Returns:
+        a dict {(family, tuple): capacity}, c.f. capacity_families
+    """
+    capacities = {}
+    for family, (expression, tuple_set, _) in capacity_families.items():
+        if not hasattr(m, expression):
+            continue
+        for index in getattr(m, tuple_set):
+            if index[0] == stf:
+                capacities[(family, index)] = \
+                    pyomo.value(getattr(m, expression)[index])
+    return capacities
+
+
+def benders_subproblem_data(data, stf):
+    """ Input data of a single support timeframe for a Benders subproblem.
+
+    All DataFrames are restricted to support timeframe stf. Installed
+    capacities and lower capacity bounds are set to zero, as the capacities
+    are fixed to the master solution by the subproblem.
+    """
+    sub_data = {}
+    for key, df in data.items():
+        if (isinstance(df.index, pd.MultiIndex) and
+                df.index.names[0] == 'support_timeframe'):
+            df = df.loc[[stf]].copy()
+            df.index = df.index.remove_unused_levels()
+        else:
+            df = df.copy()
+        sub_data[key] = df
+
+    for key, columns in [('process', ['inst-cap', 'cap-lo']),
+                         ('transmission', ['inst-cap', 'cap-lo']),
+                         ('storage', ['inst-cap-c', 'inst-cap-p',
+                                      'cap-lo-c', 'cap-lo-p'])]:
+        for column in columns:
+            if column in sub_data[key].columns:
+                sub_data[key][column] = 0
+    return sub_data
+
+
+def create_benders_subproblem(sub_data, dt, timesteps, cost_factor):
+    """Create a Benders subproblem for a single support timeframe.
+
+    The subproblem is a single year urbs model with
+        - capacities fixed to mutable parameters benders_cap_*,
+        - slack variables in the vertex equation for the feasibility problem,
+        - the operational costs (scaled by cost_factor) as objective.
+
+    Args:
+        - sub_data: input data of the support timeframe
+          (c.f. benders_subproblem_data)
+        - dt: timestep duration in hours
+        - timesteps: list of timesteps
+        - cost_factor: multiplier of the operational costs in the
+          intertemporal objective (c.f. benders_cost_factor)
+
+    Returns:
+        a pyomo ConcreteModel object
+    """
+    m = create_model(sub_data, dt, timesteps, 'cost', dual=True)
+
+    # capacity restrictions are part of the master problem
+    for name in ['res_process_capacity', 'res_area',
+                 'res_transmission_capacity', 'res_transmission_symmetry',
+                 'res_storage_power', 'res_storage_capacity',
+                 'def_storage_energy_power_ratio', 'storage_class',
+                 'res_sell_buy_symmetry', 'res_global_cost_limit']:
+        if hasattr(m, name):
+            getattr(m, name).deactivate()
+
+    # capacities as given by the master problem
+    for family, (expression, tuple_set, _) in capacity_families.items():
+        if not hasattr(m, expression):
+            continue
+        m.add_component(
+            'benders_cap_' + family,
+            pyomo.Param(getattr(m, tuple_set), initialize=0, mutable=True,
+                        doc='Capacity given by the master problem'))
+        m.add_component(
+            'res_benders_cap_' + family,
+            pyomo.Constraint(getattr(m, tuple_set),
+                             rule=res_benders_capacity_rule(family),
+                             doc='capacity == master problem capacity'))
+
+    # vertex equation with slack variables for the feasibility problem
+    m.benders_vertex_tuples = pyomo.Set(
+        within=m.com_tuples,
+        initialize=[(stf, sit, com, com_type)
+                    for (stf, sit, com, com_type) in m.com_tuples
+                    if com not in m.com_env and com not in m.com_supim],
+        doc='Commodities with a vertex equation')
+    m.benders_slack_pos = pyomo.Var(
+        m.tm, m.benders_vertex_tuples,
+        within=pyomo.NonNegativeReals,
+        doc='Missing commodity (MW) per timestep (feasibility problem)')
+    m.benders_slack_neg = pyomo.Var(
+        m.tm, m.benders_vertex_tuples,
+        within=pyomo.NonNegativeReals,
+        doc='Excess commodity (MW) per timestep (feasibility problem)')
+    m.del_component(m.res_vertex)
+    m.del_component(m.res_vertex_index)
+    m.res_vertex = pyomo.Constraint(
+        m.tm, m.com_tuples,
+        rule=res_vertex_benders_rule,
+        doc='valo + storage + transmission + process + source + buy - sell '
+            '+ slack == demand')
+
+    m.benders_cost_factor = pyomo.Param(
+        initialize=cost_factor,
+        doc='Multiplier of the operational costs in the intertemporal '
+            'objective')
+    m.objective_function.deactivate()
+    m.benders_objective = pyomo.Objective(
+        rule=benders_subproblem_cost_rule,
+        sense=pyomo.minimize,
+        doc='minimize(discounted operational costs)')
+    m.benders_feasibility = pyomo.Objective(
+        rule=benders_subproblem_feasibility_rule,
+        sense=pyomo.minimize,
+        doc='minimize(sum of vertex slacks)')
+    m.benders_feasibility.deactivate()
+
+    return m
+
+
+def res_benders_capacity_rule(family):
+    expression, _, const_cap_dict = capacity_families[family]
+
+    # capacity == capacity of the master problem
+    def rule(m, *index):
+        if index in getattr(m, const_cap_dict):
+            return pyomo.Constraint.Skip
+        return (getattr(m, expression)[index] ==
+                getattr(m, 'benders_cap_' + family)[index])
+    return rule
+
+
+def benders_index(component, family, index):
+    """ Index of a capacity tuple within component. DCPF transmissions are
+    only modelled in one direction, which may differ between master and
+    subproblem.
+    """
+    if family == 'tra' and index not in component:
+        (stf, sin, sout, tra, com) = index
+        return (stf, sout, sin, tra, com)
+    return index
+
+
+def res_vertex_benders_rule(m, tm, stf, sit, com, com_type):
+    if (stf, sit, com, com_type) not in m.benders_vertex_tuples:
+        return pyomo.Constraint.Skip
+    return (vertex_power_surplus(m, tm, stf, sit, com, com_type) +
+            m.benders_slack_pos[tm, stf, sit, com, com_type] -
+            m.benders_slack_neg[tm, stf, sit, com, com_type] == 0)
+
+
+def benders_subproblem_cost_rule(m):
+    return m.benders_cost_factor * sum(m.costs[cost_type]
+                                       for cost_type in m.cost_type
+                                       if cost_type in operational_cost_types)
+
+
+def benders_subproblem_feasibility_rule(m):
+    return (pyomo.summation(m.benders_slack_pos) +
+            pyomo.summation(m.benders_slack_neg))
+
+
+def solve_benders_subproblem(m, optim, capacities):
+    """Solve a Benders subproblem for the given master capacities.
+
+    Args:
+        - m: a subproblem (c.f. create_benders_subproblem)
+        - optim: a pyomo solver object
+        - capacities: dict {(family, tuple): capacity} (c.f.
+          benders_capacities)
+
+    Returns:
+        a dict with the keys
+            - 'cut': 'optimality' or 'feasibility'
+            - 'value': objective value of the (feasibility) subproblem
+            - 'duals': dict {(family, tuple): dual of the capacity constraint}
+    """
+    for (family, index), value in capacities.items():
+        param = getattr(m, 'benders_cap_' + family)
+        param[benders_index(param, family, index)] = value
+
+    # optimality problem: slack variables are not allowed
+    m.benders_slack_pos.fix(0)
+    m.benders_slack_neg.fix(0)
+    m.benders_feasibility.deactivate()
+    m.benders_objective.activate()
+    cut = 'optimality'
+    objective = m.benders_objective
+    result = optim.solve(m, load_solutions=False)
+
+    if str(result.solver.termination_condition) != 'optimal':
+        # phase 1: minimize the slacks needed for the given capacities
+        m.benders_slack_pos.unfix()
+        m.benders_slack_neg.unfix()
+        m.benders_objective.deactivate()
+        m.benders_feasibility.activate()
+        cut = 'feasibility'
+        objective = m.benders_feasibility
+        result = optim.solve(m, load_solutions=False)
+        if str(result.solver.termination_condition) != 'optimal':
+            raise RuntimeError('Benders feasibility subproblem could not be '
+                               'solved: {}'.format(
+                                   result.solver.termination_condition))
+    m.solutions.load_from(result)
+
+    # duals of the capacity constraints, indexed like capacities
+    duals = {}
+    for (family, index) in capacities:
+        constraints = getattr(m, 'res_benders_cap_' + family)
+        sub_index = benders_index(constraints, family, index)
+        if sub_index in constraints:
+            duals[(family, index)] = m.dual.get(constraints[sub_index], 0)
+
+    return {'cut': cut,
+            'value': pyomo.value(objective),
+            'duals': duals}
+
+
+def add_benders_cut(m, stf, capacities, sub_result):
+    """Add an optimality or feasibility cut to the master problem.
+
+    optimality:  eta[stf] >= value + sum(dual * (cap - cap_fixed))
+    feasibility:        0 >= value + sum(dual * (cap - cap_fixed))
+    """
+    cut = sub_result['value']
+    for (family, index), dual in sub_result['duals'].items():
+        if dual == 0:
+            continue
+        cap = getattr(m, capacity_families[family][0])[index]
+        cut += dual * (cap - capacities[(family, index)])
+
+    if sub_result['cut'] == 'optimality':
+        m.benders_cuts.add(m.eta[stf] >= cut)
+    else:
+        m.benders_cuts.add(cut <= 0)
+
+
+def _benders_worker(connection, sub_data, dt, timesteps, cost_factor,
+                    solver, logfile):
+    """ Subproblem process: the subproblem is created once and solved for
+    every capacity dict received via connection. Messages are tuples
+    (command, payload) with command 'solve' or 'result'; None stops the
+    process. Errors are sent back as ('error', traceback).
+    """
+    try:
+        m = create_benders_subproblem(sub_data, dt, timesteps, cost_factor)
+        optim = setup_solver(SolverFactory(solver), logfile=logfile)
+    except Exception:
+        connection.send(('error', traceback.format_exc()))
+        return
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        command, payload = message
+        try:
+            if command == 'solve':
+                connection.send(('ok',
+                                 solve_benders_subproblem(m, optim, payload)))
+            elif command == 'result':
+                connection.send(('ok', create_result_cache(m, lazy=False)))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+    connection.close()
+
+
+def _receive(connection, stf, kind='Benders subproblem'):
+    status, payload = connection.recv()
+    if status == 'error':
+        raise RuntimeError('{} {} failed:\n{}'
+                           .format(kind, stf, payload))
+    return payload
+
+
+def solve_benders(data, dt, timesteps, Solver, eta_lower_bound=0,
+                  max_iterations=50, tolerance=1e-4, parallel=True,
+                  logfile='solver.log'):
+    """Solve an intertemporal urbs problem with Benders decomposition.
+
+    The subproblems of the support timeframes are built once and re-solved in
+    every iteration. With parallel=True each subproblem lives in its own
+    process, so that all support timeframes are solved simultaneously.
+
+    Args:
+        - data: a dict of up to 12 DataFrames (c.f. read_input)
+        - dt: timestep duration in hours
+        - timesteps: list of timesteps
+        - Solver: the user specified solver (cplex, glpk, gurobi, ...)
+        - eta_lower_bound: lower bound of the operational cost estimates
+          (default: 0; must be lowered if revenues can exceed costs)
+        - max_iterations: maximum number of master iterations
+        - tolerance: relative gap between upper and lower bound at which
+          the iterations stop
+        - parallel: solve the subproblems in separate processes
+        - logfile: solver logfile of the master problem; subproblem
+          logfiles get the support timeframe appended
+
+    Returns:
+        (master, results, history): the solved master problem, a dict
+        {stf: ResultContainer} of the subproblems and a list of dicts
+        with the bounds of each iteration
+    """
+    validate_benders_input(data)
+
+    master = create_benders_master(data, dt, timesteps, eta_lower_bound)
+    optim = setup_solver(SolverFactory(Solver), logfile=logfile)
+    stf_list = sorted(master.stf)
+
+    sub_data = {stf: benders_subproblem_data(data, stf) for stf in stf_list}
+    cost_factor = {stf: benders_cost_factor(master, stf) for stf in stf_list}
+    logfiles = {stf: '{}-{}.log'.format(os.path.splitext(logfile)[0], stf)
+                for stf in stf_list}
+
+    if parallel:
+        connections = {}
+        processes = []
+        for stf in stf_list:
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_benders_worker,
+                args=(child, sub_data[stf], dt, timesteps, cost_factor[stf],
+                      Solver, logfiles[stf]),
+                daemon=True)
+            process.start()
+            connections[stf] = parent
+            processes.append(process)
+    else:
+        subproblems = {stf: create_benders_subproblem(sub_data[stf], dt,
+                                                      timesteps,
+                                                      cost_factor[stf])
+                       for stf in stf_list}
+        sub_optim = {stf: setup_solver(SolverFactory(Solver),
+                                       logfile=logfiles[stf])
+                     for stf in stf_list}
+
+    history = []
+    lower_bound = -math.inf
+    upper_bound = math.inf
+    try:
+        for iteration in range(1, max_iterations + 1):
+            result = optim.solve(master, load_solutions=False)
+            if str(result.solver.termination_condition) != 'optimal':
+                raise RuntimeError('Benders master problem could not be '
+                                   'solved: {}'.format(
+                                       result.solver.termination_condition))
+            master.solutions.load_from(result)
+            lower_bound = pyomo.value(master.objective_function)
+
+            capacities = {stf: benders_capacities(master, stf)
+                          for stf in stf_list}
+            if parallel:
+                for stf in stf_list:
+                    connections[stf].send(('solve', capacities[stf]))
+                sub_results = {stf: _receive(connections[stf], stf)
+                               for stf in stf_list}
+            else:
+                sub_results = {stf: solve_benders_subproblem(
+                                   subproblems[stf], sub_optim[stf],
+                                   capacities[stf])
+                               for stf in stf_list}
+
+            for stf in stf_list:
+                add_benders_cut(master, stf, capacities[stf],
+                                sub_results[stf])
+
+            feasible = all(sub_results[stf]['cut'] == 'optimality'
+                           for stf in stf_list)
+            if feasible:
+                upper_bound = min(
+                    upper_bound,
+                    pyomo.value(pyomo.summation(master.costs)) +
+                    sum(sub_results[stf]['value'] for stf in stf_list))
+
+            history.append({'iteration': iteration,
+                            'lower bound': lower_bound,
+                            'upper bound': upper_bound,
+                            'feasible': feasible})
+            print('Benders iteration {}: lower bound {:.6g}, '
+                  'upper bound {:.6g}'.format(iteration, lower_bound,
+                                              upper_bound))
+
+            if (feasible and upper_bound - lower_bound <=
+                    tolerance * max(abs(upper_bound), 1)):
+                break
+        else:
+            print('Warning: Benders decomposition did not converge within '
+                  '{} iterations.'.format(max_iterations))
+
+        # collect the subproblem results of the last iteration
+        if parallel:
+            for stf in stf_list:
+                connections[stf].send(('result', None))
+            results = {stf: ResultContainer(sub_data[stf],
+                                            _receive(connections[stf], stf))
+                       for stf in stf_list}
+        else:
+            results = {stf: ResultContainer(sub_data[stf],
+                                            create_result_cache(
+                                                subproblems[stf],
+                                                lazy=False))
+                       for stf in stf_list}
+    finally:
+        if parallel:
+            for stf in stf_list:
+                connections[stf].send(None)
+            for process in processes:
+                process.join()
+
+    return master, results, history
+
+
+def run_benders_scenario(input_files, Solver, timesteps, scenario, result_dir,
+                         dt, objective='cost', **benders_options):
+    """ run an intertemporal urbs model with Benders decomposition for given
+    input, time steps and scenario
+
+    Args:
+        - input_files: filenames of input Excel spreadsheets
+        - Solver: the user specified solver
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - scenario: a scenario function that modifies the input data dict
+        - result_dir: directory name for result files
+        - dt: length of each time step (unit: hours)
+        - objective: objective function chosen (only "cost" is supported)
+        - benders_options: keyword arguments passed to solve_benders
+
+    Returns:
+        the solved master problem and a dict {stf: ResultContainer}; the
+        result of each support timeframe is saved as '{scenario}-{stf}.h5'
+    """
+    year = date.today().year
+
+    sce = scenario.__name__
+    data = read_input(input_files, year)
+    data = scenario(data)
+    validate_input(data, dt)
+    validate_dc_objective(data, objective)
+    validate_benders_input(data, objective)
+
+    log_filename = os.path.join(result_dir, '{}.log').format(sce)
+    master, results, history = solve_benders(
+        data, dt, timesteps, Solver, logfile=log_filename, **benders_options)
+
+    for stf, prob in results.items():
+        save(prob, os.path.join(result_dir, '{}-{}.h5'.format(sce, stf)))
+
+    return master, results
+
+
+# Column generation for valo charging schedules
+# =============================================
+# Valos are only coupled to the energy system by their input in the vertex
+# equation. The master problem is the urbs model without the valo
+# restrictions: the valo input of each (timestep, support timeframe, site,
+# commodity) is a variable valo_master_load, which equals a convex
+# combination of known schedules (columns) of each valo. The pricing problem
+# of a valo is its own MILP (c.f. add_valo) minimizing the input valued with
+# the duals of def_valo_master_load; a schedule with negative reduced cost
+# (value - dual of the convexity constraint) is added as a new column.
+# After convergence, the master is solved once more with binary column
+# weights, so that each valo follows exactly one of its schedules.
+
+# components of add_valo, which are replaced by the columns in the master
+valo_constraints = ['def_valo_state', 'def_valo_reset',
+                    'res_valo_state_by_capacity',
+                    'res_valo_input_by_power_max',
+                    'res_valo_input_by_power_min', 'res_production_goal']
+valo_variables = ['valo_mode_run', 'e_valo_in', 'e_valo_con', 'e_valo_reset']
+
+
+def validate_valo_decomposition_input(data):
+    """ Checks if the given input can be solved with the valo column
+    generation. Raises a ValueError if not.
+    """
+    mode = identify_mode(data)
+    if not mode['valo']:
+        raise ValueError('The valo decomposition requires variable loads '
+                         'in the input.')
+    if mode['mip']:
+        raise ValueError('The valo decomposition requires an LP master '
+                         'problem. Deactivate all MILP options in the '
+                         'Global sheet.')
+
+
+def create_valo_master(data, dt=1, timesteps=None, objective='cost'):
+    """Create the master problem of the valo column generation.
+
+    The master problem is the urbs model of the given input, whose valo
+    restrictions are deactivated and whose valo input is replaced by the
+    variable valo_master_load. Columns are added by
+    update_valo_master_columns.
+
+    Args:
+        - data: a dict of up to 12 DataFrames (c.f. read_input)
+        - dt: timestep duration in hours (default: 1)
+        - timesteps: optional list of timesteps, default: demand timeseries
+        - objective: Either "cost" or "CO2", default: "cost"
+
+    Returns:
+        a pyomo ConcreteModel object
+    """
+    m = create_model(data, dt, timesteps, objective, dual=True)
+    m.name = 'urbs valo master'
+
+    # valo restrictions are part of the pricing problems
+    for name in valo_constraints:
+        getattr(m, name).deactivate()
+    for name in valo_variables:
+        getattr(m, name).fix(0)
+
+    m.valo_keys = pyomo.Set(
+        initialize=sorted(m.valo_operation_plan_dict.keys()),
+        doc='Valos by site, e.g. (Mid,Forklift)')
+    m.valo_load_tuples = pyomo.Set(
+        within=m.tm * m.stf * m.sit * m.com,
+        initialize=[(tm, stf, sit, com) for tm in m.tm
+                    for (stf, sit, com) in sorted(set(
+                        (stf, sit, com)
+                        for (stf, sit, valo, com) in m.valo_tuples))],
+        doc='Commodities with valo input per timestep')
+    m.valo_master_load = pyomo.Var(
+        m.valo_load_tuples,
+        within=pyomo.NonNegativeReals,
+        doc='Input of all valos (MW) per timestep')
+
+    # vertex equation with the valo input given by the columns
+    m.mode['valo'] = False
+    m.del_component(m.res_vertex)
+    m.del_component(m.res_vertex_index)
+    m.res_vertex = pyomo.Constraint(
+        m.tm, m.com_tuples,
+        rule=res_vertex_valo_master_rule,
+        doc='valo columns + storage + transmission + process + source + '
+            'buy - sell == demand')
+    return m
+
+
+def res_vertex_valo_master_rule(m, tm, stf, sit, com, com_type):
+    if com in m.com_env:
+        return pyomo.Constraint.Skip
+    if com in m.com_supim:
+        return pyomo.Constraint.Skip
+    power_surplus = vertex_power_surplus(m, tm, stf, sit, com, com_type)
+    if (tm, stf, sit, com) in m.valo_load_tuples:
+        power_surplus -= m.valo_master_load[tm, stf, sit, com]
+    return power_surplus == 0
+
+
+def update_valo_master_columns(m, columns, binary=False):
+    """Rebuild the column weights of the master problem.
+
+    Args:
+        - m: a master problem (c.f. create_valo_master)
+        - columns: dict {(sit, valo): [column, ...]} of valo schedules
+          (c.f. solve_valo_pricing_problem)
+        - binary: restrict the column weights to binaries
+
+    Returns:
+        Nothing
+    """
+    for name in ['res_valo_master_convexity', 'def_valo_master_load',
+                 'valo_column_weight', 'valo_columns']:
+        if hasattr(m, name):
+            m.del_component(name)
+
+    # terms of the valo input: (column, input per timestep)
+    m.valo_load_terms = {}
+    for (sit, valo), valo_columns in columns.items():
+        for k, column in enumerate(valo_columns):
+            for (tm, stf, s, v, com), value in column['e_valo_in'].items():
+                if value:
+                    m.valo_load_terms.setdefault(
+                        (tm, stf, sit, com), []).append(((sit, valo, k),
+                                                         value))
+
+    m.valo_columns = pyomo.Set(
+        initialize=[(sit, valo, k)
+                    for (sit, valo), valo_columns in sorted(columns.items())
+                    for k in range(len(valo_columns))],
+        doc='Schedules per valo, e.g. (Mid,Forklift,0)')
+    m.valo_column_weight = pyomo.Var(
+        m.valo_columns,
+        within=pyomo.Binary if binary else pyomo.NonNegativeReals,
+        doc='Weight of a valo schedule')
+    m.def_valo_master_load = pyomo.Constraint(
+        m.valo_load_tuples,
+        rule=def_valo_master_load_rule,
+        doc='valo input = sum(weight * schedule input)')
+    m.res_valo_master_convexity = pyomo.Constraint(
+        m.valo_keys,
+        rule=res_valo_master_convexity_rule,
+        doc='sum(weights of the valo schedules) = 1')
+
+
+def def_valo_master_load_rule(m, tm, stf, sit, com):
+    return (m.valo_master_load[tm, stf, sit, com] ==
+            sum(m.valo_column_weight[column] * value
+                for column, value
+                in m.valo_load_terms.get((tm, stf, sit, com), [])))
+
+
+def res_valo_master_convexity_rule(m, sit, valo):
+    return sum(m.valo_column_weight[s, v, k]
+               for (s, v, k) in m.valo_columns
+               if s == sit and v == valo) == 1
+
+
+def valo_pricing_data(m, sit, valo):
+    """ Input of the pricing problem of a valo: its rows of valo_dict and its
+    operation plan.
+    """
+    keys = [key for key in m.valo_dict['capacity']
+            if key[1] == sit and key[2] == valo]
+    return {'valo_dict': {column: {key: values[key] for key in keys}
+                          for column, values in m.valo_dict.items()},
+            'operation_plan': {(sit, valo):
+                               m.valo_operation_plan_dict[(sit, valo)]}}
+
+
+def create_valo_pricing_problem(pricing_data, dt, timesteps):
+    """Create the pricing problem of a single valo.
+
+    The pricing problem contains the valo restrictions of add_valo and
+    minimizes the valo input valued with the mutable prices valo_price.
+
+    Args:
+        - pricing_data: input of the valo (c.f. valo_pricing_data)
+        - dt: timestep duration in hours
+        - timesteps: list of timesteps
+
+    Returns:
+        a pyomo ConcreteModel object
+    """
+    m = pyomo.ConcreteModel()
+    m.name = 'urbs valo pricing'
+    m.timesteps = list(timesteps)
+    m.valo_dict = pricing_data['valo_dict']
+    m.valo_operation_plan_dict = pricing_data['operation_plan']
+
+    m.dt = pyomo.Param(
+        initialize=dt,
+        doc='Time step duration (in hours), default: 1')
+    m.t = pyomo.Set(
+        initialize=m.timesteps,
+        ordered=True,
+        doc='Set of timesteps')
+    m.tm = pyomo.Set(
+        within=m.t,
+        initialize=m.timesteps[1:],
+        ordered=True,
+        doc='Set of modelled timesteps')
+    m.stf = pyomo.Set(
+        initialize=sorted(set(key[0] for key in m.valo_dict['capacity'])),
+        ordered=True,
+        doc='Set of modeled support timeframes (e.g. years)')
+    m.sit = pyomo.Set(
+        initialize=set(key[1] for key in m.valo_dict['capacity']),
+        doc='Set of sites')
+    m.com = pyomo.Set(
+        initialize=set(key[3] for key in m.valo_dict['capacity']),
+        doc='Set of commodities')
+
+    m = add_valo(m)
+
+    m.valo_price = pyomo.Param(
+        m.tm, m.valo_tuples,
+        initialize=0,
+        mutable=True,
+        doc='Dual of the valo input in the master problem (EUR/MWh)')
+    m.objective_function = pyomo.Objective(
+        rule=valo_pricing_cost_rule,
+        sense=pyomo.minimize,
+        doc='minimize(valued valo input)')
+    return m
+
+
+def valo_pricing_cost_rule(m):
+    return sum(m.valo_price[tm, stf, sit, valo, com] *
+               m.e_valo_in[tm, stf, sit, valo, com]
+               for tm in m.tm
+               for (stf, sit, valo, com) in m.valo_tuples)
+
+
+def solve_valo_pricing_problem(m, optim, prices):
+    """Solve the pricing problem of a valo for the given prices.
+
+    Args:
+        - m: a pricing problem (c.f. create_valo_pricing_problem)
+        - optim: a pyomo solver object
+        - prices: dict {(tm, stf, sit, com): price}
+
+    Returns:
+        a column, i.e. a dict with the keys
+            - 'value': objective value (valued valo input)
+            - 'e_valo_in', 'e_valo_con', 'e_valo_reset', 'valo_mode_run':
+              dicts {index: value} of the valo schedule
+    """
+    for (tm, stf, sit, valo, com) in m.valo_price:
+        m.valo_price[tm, stf, sit, valo, com] = \
+            prices.get((tm, stf, sit, com), 0)
+
+    result = optim.solve(m, load_solutions=False)
+    if str(result.solver.termination_condition) != 'optimal':
+        raise RuntimeError('Valo pricing problem {} could not be solved: {}'
+                           .format(sorted(m.valo_operation_plan_dict),
+                                   result.solver.termination_condition))
+    m.solutions.load_from(result)
+
+    column = {'value': pyomo.value(m.objective_function)}
+    for name in valo_variables:
+        column[name] = {index: var.value
+                        for index, var in getattr(m, name).items()}
+    return column
+
+
+def _valo_pricing_worker(connection, pricing_data, dt, timesteps, solver,
+                         logfile):
+    """ Pricing process: the pricing problems of a share of the valos are
+    created once and solved for every price dict received via connection.
+    Messages are tuples ('solve', prices); None stops the process. Errors are
+    sent back as ('error', traceback).
+    """
+    try:
+        problems = {key: create_valo_pricing_problem(data, dt, timesteps)
+                    for key, data in pricing_data.items()}
+        optim = setup_solver(SolverFactory(solver), logfile=logfile)
+    except Exception:
+        connection.send(('error', traceback.format_exc()))
+        return
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        command, payload = message
+        try:
+            connection.send(('ok', {key: solve_valo_pricing_problem(
+                                        problem, optim, payload)
+                                    for key, problem in problems.items()}))
+        except Exception:
+            connection.send(('error', traceback.format_exc()))
+    connection.close()
+
+
+def solve_valo_decomposition(data, dt, timesteps, Solver, objective='cost',
+                             max_iterations=50, tolerance=1e-4,
+                             parallel=True, processes=None,
+                             logfile='solver.log'):
+    """Solve an urbs problem with valos by column generation.
+
+    The pricing problems of the valos are built once and re-solved in every
+    iteration. With parallel=True they are distributed over `processes`
+    processes. The first columns are the schedules with the least valo
+    input (uniform prices).
+
+    Args:
+        - data: a dict of up to 12 DataFrames (c.f. read_input)
+        - dt: timestep duration in hours
+        - timesteps: list of timesteps
+        - Solver: the user specified solver (cplex, glpk, gurobi, ...)
+        - objective: Either "cost" or "CO2", default: "cost"
+        - max_iterations: maximum number of column generation iterations
+        - tolerance: relative gap between the master objective and the
+          Lagrangian bound at which the iterations stop
+        - parallel: solve the pricing problems in separate processes
+        - processes: (optional) number of pricing processes, default: number
+          of CPUs
+        - logfile: solver logfile of the master problem; pricing logfiles
+          get the process number appended
+
+    Returns:
+        (master, history): the master problem solved with binary column
+        weights, whose valo variables hold the chosen schedules, and a list
+        of dicts with the bounds of each iteration
+    """
+    validate_valo_decomposition_input(data)
+
+    master = create_valo_master(data, dt, timesteps, objective)
+    optim = setup_solver(SolverFactory(Solver), logfile=logfile)
+    valo_keys = list(master.valo_keys)
+    timesteps = master.timesteps
+    pricing_data = {(sit, valo): valo_pricing_data(master, sit, valo)
+                    for (sit, valo) in valo_keys}
+
+    if parallel:
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        processes = max(min(processes, len(valo_keys)), 1)
+        connections = []
+        workers = []
+        for number in range(processes):
+            parent, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_valo_pricing_worker,
+                args=(child, {key: pricing_data[key]
+                              for key in valo_keys[number::processes]},
+                      dt, timesteps, Solver,
+                      '{}-valo-{}.log'.format(os.path.splitext(logfile)[0],
+                                              number)),
+                daemon=True)
+            worker.start()
+            connections.append(parent)
+            workers.append(worker)
+    else:
+        problems = {key: create_valo_pricing_problem(pricing_data[key], dt,
+                                                     timesteps)
+                    for key in valo_keys}
+        pricing_optim = setup_solver(
+            SolverFactory(Solver),
+            logfile='{}-valo.log'.format(os.path.splitext(logfile)[0]))
+
+    def solve_pricing(prices):
+        if parallel:
+            for connection in connections:
+                connection.send(('solve', prices))
+            columns = {}
+            for number, connection in enumerate(connections):
+                columns.update(_receive(connection, number,
+                                        'Valo pricing process'))
+            return columns
+        return {key: solve_valo_pricing_problem(problem, pricing_optim,
+                                                prices)
+                for key, problem in problems.items()}
+
+    history = []
+    try:
+        # initial columns: least valo input
+        columns = {key: [column] for key, column in solve_pricing(
+            {index: 1 for index in master.valo_load_tuples}).items()}
+
+        for iteration in range(1, max_iterations + 1):
+            update_valo_master_columns(master, columns)
+            result = optim.solve(master, load_solutions=False)
+            if str(result.solver.termination_condition) != 'optimal':
+                raise RuntimeError('Valo master problem could not be '
+                                   'solved: {}'.format(
+                                       result.solver.termination_condition))
+            master.solutions.load_from(result)
+            upper_bound = pyomo.value(master.objective_function)
+
+            prices = {index: master.dual.get(
+                          master.def_valo_master_load[index], 0)
+                      for index in master.valo_load_tuples}
+            new_columns = solve_pricing(prices)
+
+            # reduced cost = valued input - dual of the convexity constraint
+            lower_bound = upper_bound
+            added = 0
+            for key, column in new_columns.items():
+                reduced_cost = (column['value'] - master.dual.get(
+                    master.res_valo_master_convexity[key], 0))
+                if reduced_cost < -1e-9 * max(abs(upper_bound), 1):
+                    lower_bound += reduced_cost
+                    columns[key].append(column)
+                    added += 1
+
+            history.append({'iteration': iteration,
+                            'lower bound': lower_bound,
+                            'upper bound': upper_bound,
+                            'columns': added})
+            print('Valo column generation iteration {}: lower bound {:.6g}, '
+                  'master {:.6g}, {} new columns'.format(
+                      iteration, lower_bound, upper_bound, added))
+
+            if (added == 0 or upper_bound - lower_bound <=
+                    tolerance * max(abs(upper_bound), 1)):
+                break
+        else:
+            print('Warning: valo column generation did not converge within '
+                  '{} iterations.'.format(max_iterations))
+    finally:
+        if parallel:
+            for connection in connections:
+                connection.send(None)
+            for worker in workers:
+                worker.join()
+
+    # integer master: one schedule per valo
+    update_valo_master_columns(master, columns, binary=True)
+    master.del_component(master.dual)
+    result = optim.solve(master, load_solutions=False)
+    if str(result.solver.termination_condition) != 'optimal':
+        raise RuntimeError('Valo master problem with binary schedules could '
+                           'not be solved: {}'.format(
+                               result.solver.termination_condition))
+    master.solutions.load_from(result)
+    history.append({'iteration': 'integer',
+                    'lower bound': history[-1]['lower bound'],
+                    'upper bound': pyomo.value(master.objective_function),
+                    'columns': 0})
+
+    # chosen schedules as values of the valo variables
+    for (sit, valo, k) in master.valo_columns:
+        if pyomo.value(master.valo_column_weight[sit, valo, k]) < 0.5:
+            continue
+        for name in valo_variables:
+            var = getattr(master, name)
+            for index, value in columns[(sit, valo)][k][name].items():
+                var[index].value = value
+
+    return master, history
+
+
+def run_valo_decomposition_scenario(input_files, Solver, timesteps, scenario,
+                                    result_dir, dt, objective='cost',
+                                    **valo_options):
+    """ run an urbs model with valo column generation for given input, time
+    steps and scenario
+
+    Args:
+        - input_files: filenames of input Excel spreadsheets
+        - Solver: the user specified solver
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - scenario: a scenario function that modifies the input data dict
+        - result_dir: directory name for result files
+        - dt: length of each time step (unit: hours)
+        - objective: objective function chosen (either "cost" or "CO2")
+        - valo_options: keyword arguments passed to solve_valo_decomposition
+
+    Returns:
+        the solved master problem; the result is saved as '{scenario}.h5'
+    """
+    year = date.today().year
+
+    sce = scenario.__name__
+    data = read_input(input_files, year)
+    data = scenario(data)
+    validate_input(data, dt)
+    validate_dc_objective(data, objective)
+    validate_valo_decomposition_input(data)
+
+    log_filename = os.path.join(result_dir, '{}.log').format(sce)
+    master, history = solve_valo_decomposition(
+        data, dt, timesteps, Solver, objective, logfile=log_filename,
+        **valo_options)
+
+    save(master, os.path.join(result_dir, '{}.h5'.format(sce)))
+
+    return master
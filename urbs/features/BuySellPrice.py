@@ -15,6 +15,11 @@ def add_buy_sell_price(m):
         initialize=commodity_subset(m.com_tuples, 'Buy'),
         doc='Commodities that can be purchased')
 
+    # buy -> sell process pairs and price column names
+    m = add_sell_buy_pairs(m)
+    m.bsp_price_key = {com: bsp_price_key(m, com)
+                       for com in list(m.com_sell) + list(m.com_buy)}
+
     # Variables
     m.e_co_sell = pyomo.Var(
         m.tm, m.com_tuples,
@@ -110,7 +115,7 @@ def res_sell_buy_symmetry_rule(m, stf, sit_in, pro_in, coin):
     # constraint only for sell and buy processes
     # and the processes must be in the same site
     if coin in m.com_buy:
-        sell_pro = search_sell_buy_tuple(m, stf, sit_in, pro_in, coin)
+        sell_pro = m.sell_buy_pro_dict.get((sit_in, pro_in))
         if sell_pro is None:
             return pyomo.Constraint.Skip
         else:
@@ -120,36 +125,55 @@ def res_sell_buy_symmetry_rule(m, stf, sit_in, pro_in, coin):
         return pyomo.Constraint.Skip
 
 
-def search_sell_buy_tuple(m, stf, sit_in, pro_in, coin):
-    """ Return the equivalent sell-process for a given buy-process.
+def add_sell_buy_pairs(m):
+    """ Find the equivalent sell-process for each buy-process, i.e. the first
+    process with a sell output, which consumes an output commodity of the
+    buy-process in the same site and support timeframe.
     Args:
-        m: a Pyomo ConcreteModel m
-        sit_in: a site
-        pro_in: a process
-        co_in: a commodity
+        m: a Pyomo ConcreteModel m with the sets com_sell, com_buy,
+           pro_input_tuples and pro_output_tuples
     Returns:
-        a process
+        m with the dict sell_buy_pro_dict {(site, buy process): sell process}
     """
-    pro_output_tuples = [x for x in list(m.pro_output_tuples.value) if x[1] == sit_in]
-    pro_input_tuples = [x for x in list(m.pro_input_tuples.value) if x[1] == sit_in]
-    # search the output commodities for the "buy" process
-    # buy_out = (stf, site, output_commodity)
-    buy_out = set([(x[0], x[1], x[3])
-                   for x in pro_output_tuples
-                   if x[2] == pro_in])
-    # search the sell process for the output_commodity from the buy process
-    sell_output_tuple = ([x
-                          for x in pro_output_tuples
-                          if x[3] in m.com_sell])
-    for k in range(len(sell_output_tuple)):
-        sell_pro = sell_output_tuple[k][2]
-        sell_in = set([(x[0], x[1], x[3])
-                       for x in pro_input_tuples
-                       if x[2] == sell_pro])
+    # sell processes per site in order of their output tuples
+    sell_order = {}
+    for (stf, sit, pro, coo) in m.pro_output_tuples.value:
+        if coo in m.com_sell and (sit, pro) not in sell_order:
+            sell_order[(sit, pro)] = len(sell_order)
+
+    # first sell process consuming a commodity, by (stf, site, commodity)
+    sell_by_input = {}
+    for (stf, sit, pro, coin) in m.pro_input_tuples.value:
+        if (sit, pro) not in sell_order:
+            continue
+        sell_pro = sell_by_input.get((stf, sit, coin))
+        if (sell_pro is None or
+                sell_order[(sit, pro)] < sell_order[(sit, sell_pro)]):
+            sell_by_input[(stf, sit, coin)] = pro
+
+    # output commodities per process; buy processes have a buy input
+    buy_out = {}
+    for (stf, sit, pro, coo) in m.pro_output_tuples.value:
+        buy_out.setdefault((sit, pro), []).append((stf, sit, coo))
+
+    m.sell_buy_pro_dict = {}
+    for (stf, sit, pro, coin) in m.pro_input_tuples.value:
+        if coin not in m.com_buy or (sit, pro) in m.sell_buy_pro_dict:
+            continue
         # check: buy - commodity == commodity - sell; for a site
-        if not(sell_in.isdisjoint(buy_out)):
-            return sell_pro
-    return None
+        sell_pros = [sell_by_input[key] for key in buy_out.get((sit, pro), [])
+                     if key in sell_by_input]
+        if sell_pros:
+            m.sell_buy_pro_dict[(sit, pro)] = min(
+                sell_pros, key=lambda sell_pro: sell_order[(sit, sell_pro)])
+    return m
+
+
+# columns of buy_sell_price_dict are either commodity names or 1-tuples
+def bsp_price_key(m, com):
+    if com in m.buy_sell_price_dict:
+        return com
+    return (com,)
 
 
 def bsp_surplus(m, tm, stf, sit, com, com_type):
@@ -171,39 +195,21 @@ def bsp_surplus(m, tm, stf, sit, com, com_type):
 
 def revenue_costs(m):
     sell_tuples = commodity_subset(m.com_tuples, m.com_sell)
-    try:
-        return -sum(
-            m.e_co_sell[(tm,) + c] *
-            m.buy_sell_price_dict[c[2]][(c[0], tm)] * m.weight * m.typeday['weight_typeday'][(m.stf[1],tm)] *
-            m.commodity_dict['price'][c] *
-            m.commodity_dict['cost_factor'][c]
-            for tm in m.tm
-            for c in sell_tuples)
-    except KeyError:
-        return -sum(
-            m.e_co_sell[(tm,) + c] *
-            m.buy_sell_price_dict[c[2], ][(c[0], tm)] * m.weight * m.typeday['weight_typeday'][(m.stf[1],tm)] *
-            m.commodity_dict['price'][c] *
-            m.commodity_dict['cost_factor'][c]
-            for tm in m.tm
-            for c in sell_tuples)
+    return -sum(
+        m.e_co_sell[(tm,) + c] *
+        m.buy_sell_price_dict[m.bsp_price_key[c[2]]][(c[0], tm)] * m.weight * m.typeday['weight_typeday'][(m.stf[1],tm)] *
+        m.commodity_dict['price'][c] *
+        m.commodity_dict['cost_factor'][c]
+        for tm in m.tm
+        for c in sell_tuples)
 
 
 def purchase_costs(m):
     buy_tuples = commodity_subset(m.com_tuples, m.com_buy)
-    try:
-        return sum(
-            m.e_co_buy[(tm,) + c] *
-            m.buy_sell_price_dict[c[2]][(c[0], tm)] * m.weight * m.typeday['weight_typeday'][(m.stf[1],tm)] *
-            m.commodity_dict['price'][c] *
-            m.commodity_dict['cost_factor'][c]
-            for tm in m.tm
-            for c in buy_tuples)
-    except KeyError:
-        return sum(
-            m.e_co_buy[(tm,) + c] *
-            m.buy_sell_price_dict[c[2], ][(c[0], tm)] * m.weight * m.typeday['weight_typeday'][(m.stf[1],tm)] *
-            m.commodity_dict['price'][c] *
-            m.commodity_dict['cost_factor'][c]
-            for tm in m.tm
-            for c in buy_tuples)
+    return sum(
+        m.e_co_buy[(tm,) + c] *
+        m.buy_sell_price_dict[m.bsp_price_key[c[2]]][(c[0], tm)] * m.weight * m.typeday['weight_typeday'][(m.stf[1],tm)] *
+        m.commodity_dict['price'][c] *
+        m.commodity_dict['cost_factor'][c]
+        for tm in m.tm
+        for c in buy_tuples)
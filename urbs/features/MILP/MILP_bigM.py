@@ -0,0 +1,206 @@
+import math
+import pyomo.core as pyomo
+import pandas as pd
+
+
+# Derives the big-M values of the MILP linearizations from the input data
+# instead of using process.cap-up, which is often a large placeholder value.
+# m.pro_cap_bigM: upper bound of cap_pro per process tuple
+#   - process.cap-up
+#   - site area / process area-per-cap
+# m.pro_tau_bigM: upper bound of tau_pro per timestep and process tuple
+#   - cap bound * dt
+#   - cap bound * supim(t) * dt / R for processes with a supim input
+#   - maximum sink of an output demand commodity / R, the sink consists of the
+#     demand(t) and the maximum consumption of other processes, storage
+#     charging and transmission exports at the site
+def MILP_calc_bigM(m):
+    m.pro_cap_bigM = pd.Series(index=m.pro_tuples.value_list, dtype=float)
+    for (stf, sit, pro) in m.pro_cap_bigM.index:
+        m.pro_cap_bigM[(stf, sit, pro)] = process_cap_bound(m, stf, sit, pro)
+
+    static_sinks = commodity_static_sinks(m)
+    m.pro_tau_bigM = {}
+    for (stf, sit, pro) in m.pro_partial_tuples:
+        cap_bound = m.pro_cap_bigM[(stf, sit, pro)]
+        for t in m.t:
+            tau_bound = cap_bound * m.dt
+
+            # intermittent supply: e_pro_in = cap_pro * supim(t) * dt
+            for coin in m.com_supim:
+                if ((stf, sit, pro, coin) not in m.pro_input_tuples or
+                        (stf, sit, pro, coin) in m.pro_partial_input_tuples):
+                    continue
+                try:
+                    supim = m.supim_dict[(sit, coin)][(stf, t)]
+                except KeyError:
+                    continue
+                tau_bound = min(tau_bound, cap_bound * supim * m.dt /
+                                m.r_in_dict[(stf, pro, coin)])
+
+            # output into a demand commodity is limited by its sinks
+            for coo in m.com_demand:
+                if ((stf, sit, pro, coo) not in m.pro_output_tuples or
+                        (stf, sit, pro, coo) in m.pro_partial_output_tuples):
+                    continue
+                r_out = m.r_out_dict[(stf, pro, coo)]
+                if (stf, sit, pro, coo) in m.pro_timevar_output_tuples:
+                    r_out *= m.eff_factor_dict[(sit, pro)].get((stf, t), 0)
+                if r_out <= 0:
+                    continue
+                sink_bound = commodity_sink_bound(m, t, stf, sit, coo, pro,
+                                                  static_sinks)
+                tau_bound = min(tau_bound, sink_bound / r_out)
+
+            m.pro_tau_bigM[(t, stf, sit, pro)] = max(tau_bound, 0)
+    return m
+
+
+def process_cap_bound(m, stf, sit, pro):
+    # cap_pro <= cap-up
+    cap_bound = m.process_dict['cap-up'][(stf, sit, pro)]
+    # cap_pro * area-per-cap <= area
+    area_per_cap = m.process_dict['area-per-cap'][(stf, sit, pro)]
+    area = m.site_dict['area'][(stf, sit)]
+    if area_per_cap > 0 and area >= 0:
+        cap_bound = min(cap_bound, area / area_per_cap)
+    return cap_bound
+
+
+def process_const_cap(m, stf, sit, pro):
+    # capacity of a process without expansion (inst-cap == cap-up), else None
+    if m.mode['int']:
+        return None
+    return m.pro_const_cap_dict.get((stf, sit, pro))
+
+
+# Partial tuples of processes with expansion. Only those need the big-M
+# linearizations of products of cap_pro and a binary, for constant capacities
+# these products are linear terms of the binary.
+def MILP_expansion_tuples(m):
+    m.pro_partial_exp_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro,
+        initialize=[(stf, sit, pro)
+                    for (stf, sit, pro) in m.pro_partial_tuples
+                    if process_const_cap(m, stf, sit, pro) is None],
+        doc='Processes with partial input and capacity expansion')
+    m.pro_partial_input_exp_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro * m.com,
+        initialize=[(stf, sit, pro, coin)
+                    for (stf, sit, pro, coin) in m.pro_partial_input_tuples
+                    if (stf, sit, pro) in m.pro_partial_exp_tuples],
+        doc='Commodities with partial input ratio of processes with '
+            'capacity expansion')
+    m.pro_partial_output_exp_tuples = pyomo.Set(
+        within=m.stf * m.sit * m.pro * m.com,
+        initialize=[(stf, sit, pro, coo)
+                    for (stf, sit, pro, coo) in m.pro_partial_output_tuples
+                    if (stf, sit, pro) in m.pro_partial_exp_tuples],
+        doc='Commodities with partial output ratio of processes with '
+            'capacity expansion')
+    return m
+
+
+def commodity_static_sinks(m):
+    # time-invariant sinks of commodities: ({(stf, sit, com): maximum
+    # consumption per timestep of processes, storage charging and
+    # transmission exports}, {(stf, sit, com): consuming processes})
+    sinks = {}
+    consumers = {}
+
+    # consumption of processes (incl. partload offset and startup)
+    for (stf, sit, pro, com) in m.pro_input_tuples:
+        ratio = m.r_in_dict[(stf, pro, com)]
+        if (stf, sit, pro, com) in m.pro_partial_input_tuples:
+            ratio = max(ratio, m.r_in_min_fraction_dict[(stf, pro, com)])
+            startup_energy = m.process_dict['start-up-energy'][
+                (stf, sit, pro)]
+            if startup_energy > 0:
+                ratio += startup_energy * m.r_in_dict[(stf, pro, com)]
+        sinks[(stf, sit, com)] = (sinks.get((stf, sit, com), 0) +
+                                  ratio * process_cap_bound(m, stf, sit, pro) *
+                                  m.dt)
+        consumers.setdefault((stf, sit, com), set()).add(pro)
+
+    # storage charging
+    if m.mode['sto']:
+        for (stf, sit, sto, com) in m.sto_tuples:
+            sinks[(stf, sit, com)] = (
+                sinks.get((stf, sit, com), 0) +
+                m.storage_dict['cap-up-p'][(stf, sit, sto, com)] * m.dt)
+
+    # transmission exports; DC lines are stored in one direction only, their
+    # negative flows are exports of the site sout
+    if m.mode['tra']:
+        for (stf, sin, sout, tra, com) in m.tra_tuples:
+            export = (m.transmission_dict['cap-up'][
+                (stf, sin, sout, tra, com)] * m.dt)
+            sinks[(stf, sin, com)] = sinks.get((stf, sin, com), 0) + export
+            if (m.mode['dpf'] and
+                    (stf, sin, sout, tra, com) in m.tra_tuples_dc):
+                sinks[(stf, sout, com)] = (sinks.get((stf, sout, com), 0) +
+                                           export)
+    return sinks, consumers
+
+
+def commodity_sink_bound(m, t, stf, sit, com, pro, static_sinks=None):
+    # maximum energy of a demand commodity which can be consumed at a site in
+    # timestep t besides process pro (demand values are energies per
+    # timestep, c.f. vertex_power_surplus); inf if any sink is unbounded.
+    # static_sinks: commodity_static_sinks(m), computed once per model
+    if m.mode['valo'] or m.mode['dsm'] or m.mode['bsp']:
+        return math.inf
+    if com in m.com_stock:
+        return math.inf
+    if static_sinks is None:
+        static_sinks = commodity_static_sinks(m)
+    sinks, consumers = static_sinks
+    if pro in consumers.get((stf, sit, com), ()):
+        # process consumes its own output, no bound on the net output
+        return math.inf
+    try:
+        sink = m.demand_dict[(sit, com)][(stf, t)]
+    except KeyError:
+        sink = 0
+    return sink + sinks.get((stf, sit, com), 0)
+
+
+def startup_duration_bigM(m, tm, stf, sit, pro, com, direction):
+    # e_no_start_up(t) <= |offset_spec| * M_cap * dt + |slope| * M_tau(t);
+    # during a startup, the energy differs by at most
+    # start-up-duration / dt * e_no_start_up(t) from e_no_start_up(t)
+    if direction == 'in':
+        offset_spec = m.pro_p_in_offset_spec[stf, sit, pro, com]
+        slope = m.pro_p_in_slope[stf, sit, pro, com]
+    else:
+        offset_spec = m.pro_p_out_offset_spec[stf, sit, pro, com]
+        slope = m.pro_p_out_slope[stf, sit, pro, com]
+    e_max = (abs(offset_spec) * m.pro_cap_bigM[(stf, sit, pro)] * m.dt +
+             abs(slope) * m.pro_tau_bigM[(tm, stf, sit, pro)])
+    return (m.process_dict['start-up-duration'][(stf, sit, pro)] / m.dt *
+            e_max)
+
+
+def get_bigM_tightening(instance):
+    """Compare the derived big-M values with process.cap-up.
+
+    Args:
+        - instance: a urbs model instance with MILP equations
+
+    Returns:
+        a DataFrame indexed by process tuple with the columns cap-up, M cap,
+        M tau max, M tau mean (both per dt) and the relative tightening of
+        the capacity and mean throughput big-Ms
+    """
+    cap_up = pd.Series(instance.process_dict['cap-up'])
+    tau = pd.Series(instance.pro_tau_bigM)
+    tau = tau.groupby(level=[1, 2, 3]).agg(['max', 'mean']) / instance.dt
+    bigM = pd.DataFrame({
+        'cap-up': cap_up.reindex(instance.pro_cap_bigM.index),
+        'M cap': instance.pro_cap_bigM})
+    bigM['M tau max'] = tau['max']
+    bigM['M tau mean'] = tau['mean']
+    bigM['Tightening cap'] = 1 - bigM['M cap'] / bigM['cap-up']
+    bigM['Tightening tau'] = 1 - bigM['M tau mean'] / bigM['cap-up']
+    bigM.index.names = ['Stf', 'Site', 'Process']
+    return bigM
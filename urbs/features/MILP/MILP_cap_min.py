@@ -120,15 +120,14 @@ def cap_pro_abs_rule(m, stf, sit, pro):
             else:
                 return m.cap_pro[stf, sit, pro] == \
                        (sum(m.cap_pro_new[stf_built, sit, pro]
-                            for stf_built in m.stf
-                            if (sit, pro, stf_built, stf)
-                            in m.operational_pro_tuples) +
+                            for stf_built in m.pro_stf_built_dict.get(
+                                (sit, pro, stf), [])) +
                         m.process_dict['inst-cap'][(min(m.stf), sit, pro)])
         else:
             return m.cap_pro[stf, sit, pro] == sum(
                 m.cap_pro_new[stf_built, sit, pro]
-                for stf_built in m.stf
-                if (sit, pro, stf_built, stf) in m.operational_pro_tuples)
+                for stf_built in m.pro_stf_built_dict.get(
+                    (sit, pro, stf), []))
     else:
         if (sit, pro, stf) in m.pro_const_cap_dict:
             return m.cap_pro[stf, sit, pro] == m.process_dict['inst-cap'][(stf, sit, pro)]
@@ -144,7 +143,7 @@ def res_process_capacity_rule_low(m, stf, sit, pro):
 
 # process capacity <= [0/1] * upper bound
 def res_process_capacity_rule_up(m, stf, sit, pro):
-    return m.cap_pro[stf, sit, pro] <= m.cap_pro_build[stf, sit, pro] * m.process_dict['cap-up'][stf, sit, pro]
+    return m.cap_pro[stf, sit, pro] <= m.cap_pro_build[stf, sit, pro] * m.pro_cap_bigM[(stf, sit, pro)]
 
 
 # storage capacity: capacity = cap_new + cap_installed
@@ -156,16 +155,14 @@ def cap_sto_c_abs_rule(m, stf, sit, sto, com):
             else:
                 return m.cap_sto_c[stf, sit, sto, com] == (
                     sum(m.cap_sto_c_new[stf_built, sit, sto, com]
-                        for stf_built in m.stf
-                        if (sit, sto, com, stf_built, stf) in
-                        m.operational_sto_tuples) +
+                        for stf_built in m.sto_stf_built_dict.get(
+                            (sit, sto, com, stf), [])) +
                     m.storage_dict['inst-cap-c'][(min(m.stf), sit, sto, com)])
         else:
             return m.cap_sto_c[stf, sit, sto, com] == (
                 sum(m.cap_sto_c_new[stf_built, sit, sto, com]
-                    for stf_built in m.stf
-                    if (sit, sto, com, stf_built, stf) in
-                    m.operational_sto_tuples))
+                    for stf_built in m.sto_stf_built_dict.get(
+                        (sit, sto, com, stf), [])))
     else:
         if (stf, sit, sto, com) in m.sto_const_cap_c_dict:
             return m.cap_sto_c[stf, sit, sto, com] == m.storage_dict['inst-cap-c'][(stf, sit, sto, com)]
@@ -195,16 +192,14 @@ def cap_sto_p_abs_rule(m, stf, sit, sto, com):
             else:
                 return m.cap_sto_p[stf, sit, sto, com] == (
                     sum(m.cap_sto_p_new[stf_built, sit, sto, com]
-                        for stf_built in m.stf
-                        if (sit, sto, com, stf_built, stf) in
-                        m.operational_sto_tuples) +
+                        for stf_built in m.sto_stf_built_dict.get(
+                            (sit, sto, com, stf), [])) +
                     m.storage_dict['inst-cap-p'][(min(m.stf), sit, sto, com)])
         else:
             return m.cap_sto_p[stf, sit, sto, com] == (
                 sum(m.cap_sto_p_new[stf_built, sit, sto, com]
-                    for stf_built in m.stf
-                    if (sit, sto, com, stf_built, stf)
-                    in m.operational_sto_tuples))
+                    for stf_built in m.sto_stf_built_dict.get(
+                        (sit, sto, com, stf), [])))
     else:
         if (stf, sit, sto, com) in m.sto_const_cap_p_dict:
             return m.cap_sto_p[stf, sit, sto, com] == m.storage_dict['inst-cap-p'][(stf, sit, sto, com)]
@@ -235,17 +230,15 @@ def cap_tra_abs_rule(m, stf, sin, sout, tra, com):
             else:
                 return m.cap_tra[stf, sin, sout, tra, com] == (
                     sum(m.cap_tra_new[stf_built, sin, sout, tra, com]
-                        for stf_built in m.stf
-                        if (sin, sout, tra, com, stf_built, stf) in
-                        m.operational_tra_tuples) +
+                        for stf_built in m.tra_stf_built_dict.get(
+                            (sin, sout, tra, com, stf), [])) +
                     m.transmission_dict['inst-cap']
                     [(min(m.stf), sin, sout, tra, com)])
         else:
             return m.cap_tra[stf, sin, sout, tra, com] == (
                 sum(m.cap_tra_new[stf_built, sin, sout, tra, com]
-                    for stf_built in m.stf
-                    if (sin, sout, tra, com, stf_built, stf) in
-                    m.operational_tra_tuples))
+                    for stf_built in m.tra_stf_built_dict.get(
+                        (sin, sout, tra, com, stf), [])))
     else:
         if (stf, sin, sout, tra, com) in m.tra_const_cap_dict:
             return m.cap_tra[stf, sin, sout, tra, com] == m.transmission_dict['inst-cap'][(stf, sin, sout, tra, com)]
@@ -47,12 +47,12 @@ def MILP_max_gradient(m):
     # on the throughput but the inputs and outputs directly.
     # t_startup does not have to be regarded since t_startup defines the time until min power
     # tau(t-1) +  cap_pro(t) * max_grad * dt  >= tau(t) * (1 - startup(t))
-    # -> linearized: tau_pro(t) - (tau_pro(t-1) + cap_pro * max_grad * dt) <= startup[1/0](t) * cap_up * dt
+    # -> linearized: tau_pro(t) - (tau_pro(t-1) + cap_pro * max_grad * dt) <= startup[1/0](t) * M_tau(t)
     # If min_fraction > max_grad, tau_pro = min_power in the startup timestep
     # startup(t) * cap_pro(t) * min_fract  * dt <= tau_pro(t)
-    # -> linearized: tau_pro(t) - cap_pro(t) * min_fract  * dt <= (1 - startup(t)) * cap_up * dt
+    # -> linearized: tau_pro(t) - cap_pro(t) * min_fract  * dt <= (1 - startup(t)) * M_tau(t)
     # cap_pro(t) * min_fract  * dt >= startup(t) *  tau_pro(t)
-    # -> linearized: tau_pro(t) - cap_pro(t) * min_fract  * dt >= - (1 - startup(t)) * cap_up * dt
+    # -> linearized: tau_pro(t) - cap_pro(t) * min_fract  * dt >= - (1 - startup(t)) * M_cap * min_fract * dt
 
     m.res_process_maxgrad_start_up_1= pyomo.Constraint(
         m.tm, m.pro_partial_tuples & m.pro_maxgrad_tuples,
@@ -68,7 +68,7 @@ def MILP_max_gradient(m):
         doc='max gradient exception for startup')
     # Similarily, if min_fraction > max_grad, the gradient condition has to be set inactive for the turnoff
     # (tau(t-1) -  cap_pro(t) * max_grad * dt) * (1 - turnoff(t))  <= tau(t)
-    # -> linearized: tau_pro(t) - (tau_pro(t-1) - cap_pro * max_grad * dt) >= - turnoff[1/0](t) * cap_up * dt
+    # -> linearized: tau_pro(t) - (tau_pro(t-1) - cap_pro * max_grad * dt) >= - turnoff[1/0](t) * M_tau(t-1)
     m.res_process_maxgrad_turn_off = pyomo.Constraint(
         m.tm, m.pro_partial_tuples & m.pro_maxgrad_tuples,
         rule=res_process_maxgrad_turn_off_rule,
@@ -106,38 +106,38 @@ def res_process_maxgrad_upper_rule(m, t, stf, sit, pro):
 
 
 def res_process_maxgrad_start_up_rule_1(m, tm, stf, sit, pro):
-    # tau_pro(t) - (tau_pro(t-1) + cap_pro * max_grad * dt) <= startup[1/0](t) * cap_up * dt
+    # tau_pro(t) - (tau_pro(t-1) + cap_pro * max_grad * dt) <= startup[1/0](t) * M_tau(t)
     if m.process_dict['min-fraction'][(stf, sit, pro)] >= m.process_dict['max-grad'][(stf, sit, pro)]:
         return m.tau_pro[tm, stf, sit, pro] - (m.tau_pro[tm - 1, stf, sit, pro] + m.cap_pro[stf, sit, pro] *
                                                m.process_dict['max-grad'][(stf, sit, pro)] * m.dt) \
-               <= m.pro_mode_startup[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+               <= m.pro_mode_startup[tm, stf, sit, pro] * m.pro_tau_bigM[(tm, stf, sit, pro)]
     else:
         return res_process_maxgrad_upper_rule()
 
 def res_process_maxgrad_start_up_rule_2(m, tm, stf, sit, pro):
     if m.process_dict['min-fraction'][(stf, sit, pro)] >= m.process_dict['max-grad'][(stf, sit, pro)]:
-        # tau_pro(t) - cap_pro(t) * min_fract  * dt <= (1 - startup(t)) * cap_up * dt
+        # tau_pro(t) - cap_pro(t) * min_fract  * dt <= (1 - startup(t)) * M_tau(t)
         return (m.tau_pro[tm, stf, sit, pro] - m.cap_pro[stf, sit, pro] * \
         m.process_dict['min-fraction'][(stf, sit, pro)] * m.dt <= (1 - m.pro_mode_startup[tm, stf, sit, pro]) *
-                m.process_dict['cap-up'][(stf, sit, pro)])
+                m.pro_tau_bigM[(tm, stf, sit, pro)])
     else:
         return pyomo.Constraint.Skip
 
 def res_process_maxgrad_start_up_rule_3(m, tm, stf, sit, pro):
     if m.process_dict['min-fraction'][(stf, sit, pro)] >= m.process_dict['max-grad'][(stf, sit, pro)]:
-        # tau_pro(t) - cap_pro(t) * min_fract * dt >= - (1 - startup(t)) * cap_up * dt
+        # tau_pro(t) - cap_pro(t) * min_fract * dt >= - (1 - startup(t)) * M_cap * min_fract * dt
         return (m.tau_pro[tm, stf, sit, pro] - m.cap_pro[stf, sit, pro] * \
                 m.process_dict['min-fraction'][(stf, sit, pro)] * m.dt >= -(1 - m.pro_mode_startup[tm, stf, sit, pro]) *
-                m.process_dict['cap-up'][(stf, sit, pro)] * m.dt)
+                m.pro_cap_bigM[(stf, sit, pro)] * m.process_dict['min-fraction'][(stf, sit, pro)] * m.dt)
     else:
         return pyomo.Constraint.Skip
 
 def res_process_maxgrad_turn_off_rule(m, tm, stf, sit, pro):
     if m.process_dict['min-fraction'][(stf, sit, pro)] >= m.process_dict['max-grad'][(stf, sit, pro)]:
-        # tau_pro(t) - (tau_pro(t-1) - cap_pro * max_grad * dt) >= - turnoff[1/0](t) * cap_up * dt
+        # tau_pro(t) - (tau_pro(t-1) - cap_pro * max_grad * dt) >= - turnoff[1/0](t) * M_tau(t-1)
         return m.tau_pro[tm, stf, sit, pro] - (m.tau_pro[tm - 1, stf, sit, pro] - m.cap_pro[stf, sit, pro] *
                                                m.process_dict['max-grad'][(stf, sit, pro)] * m.dt) \
-               >= - m.pro_mode_turnoff[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+               >= - m.pro_mode_turnoff[tm, stf, sit, pro] * m.pro_tau_bigM[(tm - 1, stf, sit, pro)]
 
     else:
         return res_process_maxgrad_lower_rule
@@ -3,20 +3,28 @@ import pandas as pd
 
 # Ensures a minimum consecutive operation time
 def MILP_min_operation_time(m):
-    m.pro_out_last_n_timesteps = pyomo.Var(
-        m.t, m.pro_partial_tuples,
-        within=pyomo.Boolean,
-        doc='Boolean: True if process inactive/not in operation in one of the last n timesteps.')
+    if 'MILP min_operation_time startup' in m._data['MILP'].index:
+        # compact formulation: a process started within the last n timesteps
+        # has to be running, reuses pro_mode_startup (c.f. MILP_startupcosts)
+        m.res_pro_min_cons_op_time_startup = pyomo.Constraint(
+            m.tm, m.pro_partial_tuples,
+            rule=res_pro_min_cons_op_time_startup_rule,
+            doc='startup(t-n+1) + … + startup(t) <= run(t)')
+    else:
+        m.pro_out_last_n_timesteps = pyomo.Var(
+            m.t, m.pro_partial_tuples,
+            within=pyomo.Boolean,
+            doc='Boolean: True if process inactive/not in operation in one of the last n timesteps.')
 
-    m.res_pro_min_cons_op_time_1 = pyomo.Constraint(
-        m.tm, m.pro_partial_tuples,
-        rule=res_pro_min_cons_op_time_rule_1,
-        doc='n * out_last_n_timesteps[1/0] >= (1 - run(t-1)) + (1 - run(t-i)) + … + (1 - run(t-n))')
+        m.res_pro_min_cons_op_time_1 = pyomo.Constraint(
+            m.tm, m.pro_partial_tuples,
+            rule=res_pro_min_cons_op_time_rule_1,
+            doc='n * out_last_n_timesteps[1/0] >= (1 - run(t-1)) + (1 - run(t-i)) + … + (1 - run(t-n))')
 
-    m.res_pro_min_cons_op_time_2 = pyomo.Constraint(
-        m.tm, m.pro_partial_tuples,
-        rule=res_pro_min_cons_op_time_rule_2,
-        doc='run(t) >= out_last_n_timesteps[1/0] - (1 - run(t-1))')
+        m.res_pro_min_cons_op_time_2 = pyomo.Constraint(
+            m.tm, m.pro_partial_tuples,
+            rule=res_pro_min_cons_op_time_rule_2,
+            doc='run(t) >= out_last_n_timesteps[1/0] - (1 - run(t-1))')
 
     m.res_pro_min_cons_op_time_3 = pyomo.Constraint(
         m.pro_partial_tuples,
@@ -63,6 +71,25 @@ def res_pro_min_cons_op_time_rule_1(m, tm, stf, sit, pro):
                    for i in range(1, m.process_dict['min-con-op-time'][(stf, sit, pro)] + 1))
 
 
+def res_pro_min_cons_op_time_startup_rule(m, tm, stf, sit, pro):
+    tm_relative = tm - m.timesteps[0]
+    min_con_op_time = int(m.process_dict['min-con-op-time'][(stf, sit, pro)])
+    # Constraint is skipped if there is no or a negative min-con-op-time
+    if min_con_op_time <= 0:
+        return pyomo.Constraint.Skip
+    # forced activity of processes already active at the start (c.f. rule 1)
+    if m.process_dict['pre-active-timesteps'][(stf, sit, pro)] > 0 and\
+            tm_relative <= min_con_op_time - m.process_dict['pre-active-timesteps'][(stf, sit, pro)]:
+        return m.pro_mode_run[tm, stf, sit, pro] == 1
+
+    # startup(t-n+1) + … + startup(t) <= run(t)
+    # a startup within the last n timesteps forces the process to run in t,
+    # startups before the first modelled timestep are covered by rule 3
+    return sum(m.pro_mode_startup[tm - i, stf, sit, pro]
+               for i in range(min(min_con_op_time, tm_relative))) <= \
+        m.pro_mode_run[tm, stf, sit, pro]
+
+
 def res_pro_min_cons_op_time_rule_2(m, tm, stf, sit, pro):
     # run(t) >= out_last_n_timesteps[1/0] - (1 - run(t-1))
     if m.process_dict['min-con-op-time'][(stf, sit, pro)] <= 0:
@@ -1,5 +1,6 @@
 import pyomo.core as pyomo
 import pandas as pd
+from .MILP_bigM import process_const_cap
 
 
 
@@ -27,121 +28,150 @@ def MILP_calc_offset_slope(m):
     return m
 
 
-# calculates the offset: p_offset = offset_spec * cap(t) * run[0/1](t) 
-# linearization:
-# 1. p_offset - (offset_spec*cap) <= (1-run) * cap-max * R -> p_offset <= (offset_spec*cap) if run=1
-# 2. p_offset - (offset_spec*cap) >= -(1-run) * cap-max * R -> p_offset >= (offset_spec*cap) if run=1
-# 3. p_offset <= run * cap_max * R
-# 4. p_offset >= -run * cap_max * R
+# calculates the offset: p_offset = offset_spec * cap(t) * run[0/1](t)
+# for processes without expansion, cap is constant and p_offset is linear,
+# else linearization:
+# 1. p_offset - (offset_spec*cap) <= (1-run) * M_cap * |offset_spec| -> p_offset <= (offset_spec*cap) if run=1
+# 2. p_offset - (offset_spec*cap) >= -(1-run) * M_cap * |offset_spec| -> p_offset >= (offset_spec*cap) if run=1
+# 3. p_offset <= run * M_cap * |offset_spec|
+# 4. p_offset >= -run * M_cap * |offset_spec|
 def MILP_pro_p_offset(m):
     # in:
-    m.pro_p_in_offset = pyomo.Var(
-        m.tm, m.pro_partial_input_tuples,
+    m.pro_p_in_offset_var = pyomo.Var(
+        m.tm, m.pro_partial_input_exp_tuples,
         within=pyomo.Reals,
+        doc='offset for calculating process input of processes with expansion')
+    m.pro_p_in_offset = pyomo.Expression(
+        m.tm, m.pro_partial_input_tuples,
+        rule=pro_p_in_offset_rule,
         doc='offset for calculating process input')
 
     m.pro_p_in_offset_lt = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_in_offset_lt_rule,
         doc='offset must be (lower) equal to offset_spec*cap , when run = 1'
-            'p_offset - (offset_spec*cap) <= (1-run) * cap-max * R -> p_offset <= (offset_spec*cap) if run=1.')
+            'p_offset - (offset_spec*cap) <= (1-run) * M_cap * |offset_spec| -> p_offset <= (offset_spec*cap) if run=1.')
 
     m.pro_p_in_offset_gt = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_in_offset_gt_rule,
         doc='offset must be (greater) equal to offset_spec*cap , when run = 1'
-            'p_offset - (offset_spec*cap) >= -(1-run) * cap-max  * R -> p_offset >= (offset_spec*cap) if run=1')
+            'p_offset - (offset_spec*cap) >= -(1-run) * M_cap * |offset_spec| -> p_offset >= (offset_spec*cap) if run=1')
 
     m.pro_p_offset_in_ltzero_when_off = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_in_offset_ltzero_when_off_rule,
         doc='p_offset must be (lower) equal to zero when run=0'
-            'p_offset <= run * cap_max * R')
+            'p_offset <= run * M_cap * |offset_spec|')
 
     m.pro_p_offset_in_gtzero_when_off = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_in_offset_gtzero_when_off_rule,
         doc='p_offset must be (greater) equal to zero when run=0'
-            'p_offset >= -run * cap_max * R')
+            'p_offset >= -run * M_cap * |offset_spec|')
 
     # out:
-    m.pro_p_out_offset = pyomo.Var(
-        m.tm, m.pro_partial_output_tuples,
+    m.pro_p_out_offset_var = pyomo.Var(
+        m.tm, m.pro_partial_output_exp_tuples,
         within=pyomo.Reals,
+        doc='offset for calculating process output of processes with expansion')
+    m.pro_p_out_offset = pyomo.Expression(
+        m.tm, m.pro_partial_output_tuples,
+        rule=pro_p_out_offset_rule,
         doc='offset for calculating process output')
 
     m.pro_p_out_offset_lt = pyomo.Constraint(
-        m.tm, m.pro_partial_output_tuples,
+        m.tm, m.pro_partial_output_exp_tuples,
         rule=pro_p_out_offset_lt_rule,
         doc='offset must be (lower) equal to offset_spec*cap , when run = 1'
-            'p_offset - (offset_spec*cap) <= (1-run) * cap-max * R -> p_offset <= (offset_spec*cap) if run=1.')
+            'p_offset - (offset_spec*cap) <= (1-run) * M_cap * |offset_spec| -> p_offset <= (offset_spec*cap) if run=1.')
 
     m.pro_p_out_offset_gt = pyomo.Constraint(
-        m.tm, m.pro_partial_output_tuples,
+        m.tm, m.pro_partial_output_exp_tuples,
         rule=pro_p_out_offset_gt_rule,
         doc='offset must be (greater) equal to offset_spec*cap , when run = 1'
-            'p_offset - (offset_spec*cap) >= -(1-run) * cap-max  * R -> p_offset >= (offset_spec*cap) if run=1')
+            'p_offset - (offset_spec*cap) >= -(1-run) * M_cap * |offset_spec| -> p_offset >= (offset_spec*cap) if run=1')
 
     m.pro_p_offset_out_ltzero_when_off = pyomo.Constraint(
-        m.tm, m.pro_partial_output_tuples,
+        m.tm, m.pro_partial_output_exp_tuples,
         rule=pro_p_out_offset_ltzero_when_off_rule,
         doc='p_offset must be (lower) equal to zero when run=0'
-            'p_offset <= run * cap_max * R')
+            'p_offset <= run * M_cap * |offset_spec|')
 
     m.pro_p_offset_out_gtzero_when_off = pyomo.Constraint(
-        m.tm, m.pro_partial_output_tuples,
+        m.tm, m.pro_partial_output_exp_tuples,
         rule=pro_p_out_offset_gtzero_when_off_rule,
         doc='p_offset must be (greater) equal to zero when run=0'
-            'p_offset >= run * cap_max * R')
+            'p_offset >= run * M_cap * |offset_spec|')
     return m
 
 
+def pro_p_in_offset_rule(m, tm, stf, sit, pro, coin):
+    cap_pro = process_const_cap(m, stf, sit, pro)
+    if cap_pro is None:
+        return m.pro_p_in_offset_var[tm, stf, sit, pro, coin]
+    # constant capacity: p_offset = offset_spec * cap * run[0/1]
+    return m.pro_p_in_offset_spec[stf, sit, pro, coin] * cap_pro * m.pro_mode_run[tm, stf, sit, pro]
+
+
 def pro_p_in_offset_lt_rule(m, tm, stf, sit, pro, coin):
-    # p_offset - (offset_spec*cap) <= (1-run) * cap-max * R
+    # p_offset - (offset_spec*cap) <= (1-run) * M_cap * |offset_spec|
     return m.pro_p_in_offset[tm, stf, sit, pro, coin] - \
            m.pro_p_in_offset_spec[stf, sit, pro, coin] * m.cap_pro[stf, sit, pro] <= \
-           (1 - m.pro_mode_run[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * \
-           m.r_in_dict[(stf, pro, coin)]
+           (1 - m.pro_mode_run[tm, stf, sit, pro]) * abs(m.pro_p_in_offset_spec[stf, sit, pro, coin]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
 
 def pro_p_in_offset_gt_rule(m, tm, stf, sit, pro, coin):
-    # p_offset - (offset_spec*cap) >= -(1-run) * cap-max  * R
+    # p_offset - (offset_spec*cap) >= -(1-run) * M_cap * |offset_spec|
     return m.pro_p_in_offset[tm, stf, sit, pro, coin] - \
            m.pro_p_in_offset_spec[stf, sit, pro, coin] * m.cap_pro[stf, sit, pro] >= \
-           -(1 - m.pro_mode_run[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * \
-           m.r_in_dict[(stf, pro, coin)]
+           -(1 - m.pro_mode_run[tm, stf, sit, pro]) * abs(m.pro_p_in_offset_spec[stf, sit, pro, coin]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
 
 def pro_p_in_offset_ltzero_when_off_rule(m, tm, stf, sit, pro, coin):
-    # p_offset <= run * cap_max * R
+    # p_offset <= run * M_cap * |offset_spec|
     return m.pro_p_in_offset[tm, stf, sit, pro, coin] <= \
-           m.pro_mode_run[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)]
+           m.pro_mode_run[tm, stf, sit, pro] * abs(m.pro_p_in_offset_spec[stf, sit, pro, coin]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
 
 def pro_p_in_offset_gtzero_when_off_rule(m, tm, stf, sit, pro, coin):
-    # p_offset >= -run * cap_max * R
+    # p_offset >= -run * M_cap * |offset_spec|
     return m.pro_p_in_offset[tm, stf, sit, pro, coin] >= \
-           -m.pro_mode_run[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)]
+           -m.pro_mode_run[tm, stf, sit, pro] * abs(m.pro_p_in_offset_spec[stf, sit, pro, coin]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
+
+
+def pro_p_out_offset_rule(m, tm, stf, sit, pro, coo):
+    cap_pro = process_const_cap(m, stf, sit, pro)
+    if cap_pro is None:
+        return m.pro_p_out_offset_var[tm, stf, sit, pro, coo]
+    # constant capacity: p_offset = offset_spec * cap * run[0/1]
+    return m.pro_p_out_offset_spec[stf, sit, pro, coo] * cap_pro * m.pro_mode_run[tm, stf, sit, pro]
 
 
 def pro_p_out_offset_lt_rule(m, tm, stf, sit, pro, coo):
-    # p_offset - (offset_spec*cap) <= (1-run) * cap-max * R
+    # p_offset - (offset_spec*cap) <= (1-run) * M_cap * |offset_spec|
     return m.pro_p_out_offset[tm, stf, sit, pro, coo] - \
            m.pro_p_out_offset_spec[stf, sit, pro, coo] * m.cap_pro[stf, sit, pro] <= \
-           (1 - m.pro_mode_run[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * \
-           m.r_out_dict[(stf, pro, coo)]
+           (1 - m.pro_mode_run[tm, stf, sit, pro]) * abs(m.pro_p_out_offset_spec[stf, sit, pro, coo]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
 
 def pro_p_out_offset_gt_rule(m, tm, stf, sit, pro, coo):
-    # p_offset - (offset_spec*cap) >= -(1-run) * cap-max  * R
+    # p_offset - (offset_spec*cap) >= -(1-run) * M_cap * |offset_spec|
     return m.pro_p_out_offset[tm, stf, sit, pro, coo] - \
            m.pro_p_out_offset_spec[stf, sit, pro, coo] * m.cap_pro[stf, sit, pro] >= \
-           -(1 - m.pro_mode_run[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * \
-           m.r_out_dict[(stf, pro, coo)]
+           -(1 - m.pro_mode_run[tm, stf, sit, pro]) * abs(m.pro_p_out_offset_spec[stf, sit, pro, coo]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
 
 def pro_p_out_offset_ltzero_when_off_rule(m, tm, stf, sit, pro, coo):
-    # p_offset <= run * cap_max * R
+    # p_offset <= run * M_cap * |offset_spec|
     return m.pro_p_out_offset[tm, stf, sit, pro, coo] <= \
-           m.pro_mode_run[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.r_out_dict[(stf, pro, coo)]
+           m.pro_mode_run[tm, stf, sit, pro] * abs(m.pro_p_out_offset_spec[stf, sit, pro, coo]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
 
 def pro_p_out_offset_gtzero_when_off_rule(m, tm, stf, sit, pro, coo):
-    # p_offset >= run * cap_max * R
+    # p_offset >= run * M_cap * |offset_spec|
     return m.pro_p_out_offset[tm, stf, sit, pro, coo] >= \
-           -m.pro_mode_run[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.r_out_dict[(stf, pro, coo)]
+           -m.pro_mode_run[tm, stf, sit, pro] * abs(m.pro_p_out_offset_spec[stf, sit, pro, coo]) * \
+           m.pro_cap_bigM[(stf, sit, pro)]
 
@@ -5,6 +5,7 @@ from .MILP_min_operation_time import MILP_min_operation_time
 from .MILP_startup_duration import MILP_startup_duration
 from .MILP_max_gradient import MILP_max_gradient
 from .MILP_calculate_startup_output_10eq import MILP_calculate_startup_output
+from .MILP_bigM import MILP_expansion_tuples
 import pyomo.core as pyomo
 import pandas as pd
 
@@ -15,6 +16,7 @@ def MILP_partload(m):
         m.t, m.pro_partial_tuples,
         within=pyomo.Boolean,
         doc='Boolean: True if process in run mode')
+    m = MILP_expansion_tuples(m)
     m = MILP_startupcosts(m)
     m.del_component(m.res_throughput_by_capacity_min)
     m.del_component(m.res_throughput_by_capacity_min_index)
@@ -26,7 +28,7 @@ def MILP_partload(m):
     m.res_process_throughput_by_capacity_MILP = pyomo.Constraint(
         m.tm, m.pro_partial_tuples,
         rule=res_throughput_by_capacity_max_MILP_rule,
-        doc='tau_pro <= run[0/1] * cap-up')
+        doc='tau_pro <= run[0/1] * M_tau')
 
     # Calculate offset and slope for partload behaviour
     m = MILP_calc_offset_slope(m)
@@ -83,16 +85,17 @@ def def_test_rule(m, tm, stf, sit, pro, coo):
 
 def res_throughput_by_capacity_min_MILP_rule(m, tm, stf, sit, pro):
     # run[0/1] * cap_pro * min-fraction * dt <= tau_pro
-    # linearization: tau_pro - cap_pro * min-fraction >= - (1 - run[0/1]) * process.cap-up * dt
+    # linearization: tau_pro - cap_pro * min-fraction >= - (1 - run[0/1]) * M_cap * min-fraction * dt
     return (m.tau_pro[tm, stf, sit, pro] -
             m.cap_pro[stf, sit, pro] * m.process_dict['min-fraction'][(stf, sit, pro)] * m.dt >=
-            - (1 - m.pro_mode_run[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt)
+            - (1 - m.pro_mode_run[tm, stf, sit, pro]) * m.pro_cap_bigM[(stf, sit, pro)] *
+            m.process_dict['min-fraction'][(stf, sit, pro)] * m.dt)
 
 
 def res_throughput_by_capacity_max_MILP_rule(m, tm, stf, sit, pro):
-    # tau_pro <= run[0/1] * cap-up * dt
+    # tau_pro <= run[0/1] * M_tau(t)
     return (m.tau_pro[tm, stf, sit, pro] <=
-            m.pro_mode_run[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt)
+            m.pro_mode_run[tm, stf, sit, pro] * m.pro_tau_bigM[(tm, stf, sit, pro)])
 
 
 
@@ -1,4 +1,5 @@
 import pyomo.core as pyomo
+from .MILP_bigM import startup_duration_bigM
 
 
 def MILP_startup_duration(m):
@@ -11,7 +12,7 @@ def MILP_startup_duration(m):
     # e_pro_in_calc_help(t)  - e_pro_in_no_start_up(t) >= - startup[1/0](t) * e_in_max
     # with
     # e_pro_in_no_start_up(t) = offset(t) + slope * tau_pro(t)
-    # R is not required in the e_in_max, it does not make a difference
+    # e_in_max = start-up-duration / dt * maximum of e_pro_in_no_start_up(t) (c.f. MILP_bigM)
 
     m.del_component(m.def_partial_process_input)
     m.del_component(m.def_partial_process_input_index)
@@ -111,34 +112,36 @@ def def_partial_process_input_MILP_no_start_rule(m, tm, stf, sit, pro, coin):
 
 def def_partial_process_input_rule(m, tm, stf, sit, pro, coin):
     # e_pro_in(t) = e_pro_in_calc_help(t) + startup_costs * startup[1/0](t)
+    # pro_p_startup is already zero without startup (c.f. MILP_startupcosts), thus
+    # startup_costs * startup[1/0](t) = pro_p_startup(t) without a quadratic term
     return m.e_pro_in[tm, stf, sit, pro, coin] == m.e_pro_in_calc_help[tm, stf, sit, pro, coin] \
-           + m.dt * m.pro_p_startup[tm, stf, sit, pro, coin] * m.pro_mode_startup[tm, stf, sit, pro]
+           + m.dt * m.pro_p_startup[tm, stf, sit, pro, coin]
 
 
 def def_partial_process_input_MILP_rule_A(m, tm, stf, sit, pro, coin):
     # Rule A: e_pro_in_calc_help(t) - e_pro_in_no_start(t) * (tm - t_startup)/tm  <= (1 - startup[1/0](t)) * e_in_max
     return m.e_pro_in_calc_help[tm, stf, sit, pro, coin] - m.e_pro_in_no_start_up[tm, stf, sit, pro, coin] * \
            ((m.dt - m.process_dict['start-up-duration'][(stf, sit, pro)]) / m.dt) \
-           <= (1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           <= (1 - m.pro_mode_startup[tm, stf, sit, pro]) * startup_duration_bigM(m, tm, stf, sit, pro, coin, 'in')
 
 
 def def_partial_process_input_MILP_rule_B(m, tm, stf, sit, pro, coin):
     # Rule B: e_pro_in_calc_help(t) - e_pro_in_no_start(t) * (tm - t_startup)/tm  >= -(1 - startup[1/0](t)) * e_in_max
     return m.e_pro_in_calc_help[tm, stf, sit, pro, coin] - m.e_pro_in_no_start_up[tm, stf, sit, pro, coin] * \
            ((m.dt - m.process_dict['start-up-duration'][(stf, sit, pro)]) / m.dt) \
-           >= - (1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           >= - (1 - m.pro_mode_startup[tm, stf, sit, pro]) * startup_duration_bigM(m, tm, stf, sit, pro, coin, 'in')
 
 
 def def_partial_process_input_MILP_rule_C(m, tm, stf, sit, pro, coin):
     # Rule C: e_pro_in_calc_help(t) - e_pro_in_no_start(t) <= startup[1/0](t) * e_in_max
     return m.e_pro_in_calc_help[tm, stf, sit, pro, coin] - m.e_pro_in_no_start_up[tm, stf, sit, pro, coin] \
-           <= m.pro_mode_startup[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           <= m.pro_mode_startup[tm, stf, sit, pro] * startup_duration_bigM(m, tm, stf, sit, pro, coin, 'in')
 
 
 def def_partial_process_input_MILP_rule_D(m, tm, stf, sit, pro, coin):
     # Rule C: e_pro_in_calc_help(t) - e_pro_in_no_start(t) >= - startup[1/0](t) * e_in_max
     return m.e_pro_in_calc_help[tm, stf, sit, pro, coin] - m.e_pro_in_no_start_up[tm, stf, sit, pro, coin] \
-           >= - m.pro_mode_startup[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           >= - m.pro_mode_startup[tm, stf, sit, pro] * startup_duration_bigM(m, tm, stf, sit, pro, coin, 'in')
 
 
 def def_partial_process_output_MILP_no_start_rule(m, tm, stf, sit, pro, coo):
@@ -152,23 +155,23 @@ def def_partial_process_output_MILP_rule_A(m, tm, stf, sit, pro, coo):
     # Rule A: e_pro_out(t) - e_out_no_start(t) <= (1 - startup[1/0](t)) * e_out_max
     return m.e_pro_out[tm, stf, sit, pro, coo] - m.e_pro_out_no_start_up[tm, stf, sit, pro, coo] * \
            ((m.dt - m.process_dict['start-up-duration'][(stf, sit, pro)]) / m.dt) \
-           <= (1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           <= (1 - m.pro_mode_startup[tm, stf, sit, pro]) * startup_duration_bigM(m, tm, stf, sit, pro, coo, 'out')
 
 
 def def_partial_process_output_MILP_rule_B(m, tm, stf, sit, pro, coo):
     # Rule B: e_pro_out(t) - e_out_start(t) >= -(1 - startup[1/0](t)) * e_out_max
     return m.e_pro_out[tm, stf, sit, pro, coo] - m.e_pro_out_no_start_up[tm, stf, sit, pro, coo] * \
            ((m.dt - m.process_dict['start-up-duration'][(stf, sit, pro)]) / m.dt) \
-           >= - (1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           >= - (1 - m.pro_mode_startup[tm, stf, sit, pro]) * startup_duration_bigM(m, tm, stf, sit, pro, coo, 'out')
 
 
 def def_partial_process_output_MILP_rule_C(m, tm, stf, sit, pro, coo):
     # Rule C: e_pro_out - e_pro_out_no_start(t) <= startup[1/0](t) * e_out_max
     return m.e_pro_out[tm, stf, sit, pro, coo] - m.e_pro_out_no_start_up[tm, stf, sit, pro, coo] \
-           <= m.pro_mode_startup[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           <= m.pro_mode_startup[tm, stf, sit, pro] * startup_duration_bigM(m, tm, stf, sit, pro, coo, 'out')
 
 
 def def_partial_process_output_MILP_rule_D(m, tm, stf, sit, pro, coo):
     # Rule C: e_pro_out - e_pro_out_no_start(t) >= - startup[1/0](t) * e_out_max
     return m.e_pro_out[tm, stf, sit, pro, coo] - m.e_pro_out_no_start_up[tm, stf, sit, pro, coo] \
-           >= - m.pro_mode_startup[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * m.dt
+           >= - m.pro_mode_startup[tm, stf, sit, pro] * startup_duration_bigM(m, tm, stf, sit, pro, coo, 'out')
@@ -1,4 +1,5 @@
 import pyomo.core as pyomo
+from .MILP_bigM import process_const_cap
 
 # to_do: Check, why the startup costs don't work in the MILP problem!
 
@@ -32,45 +33,50 @@ def MILP_startupcosts(m):
         rule=pro_mode_start_up_rule3,
         doc='switch on <= 1 - run [t-1]')
 
-    m.pro_p_startup = pyomo.Var(
-        m.tm, m.pro_partial_input_tuples,
+    m.pro_p_startup_var = pyomo.Var(
+        m.tm, m.pro_partial_input_exp_tuples,
         within=pyomo.Reals,
+        doc='switch on loss for MILP processes with expansion')
+    m.pro_p_startup = pyomo.Expression(
+        m.tm, m.pro_partial_input_tuples,
+        rule=pro_p_startup_rule,
         doc='switch on loss for MILP processes')
 
     # calculates the power needed per startup: pro_p_startup = E_start * cap(t) * R start[0/1](t)
     # R = input ratio at maximum operation point
-    # linearization:
-    # 1. p_startup - (cap * startup_spec * R) <= (1-startup) * cap-max * startup_spec * R
+    # for processes without expansion, cap is constant and pro_p_startup is linear,
+    # else linearization:
+    # 1. p_startup - (cap * startup_spec * R) <= (1-startup) * M_cap * startup_spec * R
     #    -> p_startup <= (p_startup_spec*cap) if startup = 1
-    # 2. p_startup - (cap * startup_spec * R) >= -(1-startup) * cap-max * startup_spec * R
+    # 2. p_startup - (cap * startup_spec * R) >= -(1-startup) * M_cap * startup_spec * R
     #    -> p_startup >= (p_startup_spec*cap) if startup = 1
-    # 3. p_startup <= startup * startup_spec * cap_max * R
-    # 4. p_startup >= - startup * startup_spec * cap_max * R
+    # 3. p_startup <= startup * startup_spec * M_cap * R
+    # 4. p_startup >= - startup * startup_spec * M_cap * R
     m.pro_p_in_startup_lt = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_in_startup_lt_rule,
         doc='switch on loss must be (lower) equal to E_start * cap(t) * R, when startup = 1'
-            'p_startup - (cap * startup_spec * R) <= (1-startup) * cap-max * startup_spec * R'
+            'p_startup - (cap * startup_spec * R) <= (1-startup) * M_cap * startup_spec * R'
             '-> p_startup <= (p_startup_spec * cap) if startup = 1.')
 
     m.pro_p_in_startup_gt = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_in_startup_gt_rule,
         doc='switch on loss must be (greater) equal to E_start * cap(t) * R, when run = 1'
-            'p_startup - (cap * startup_spec * R) >= -(1-startup) * cap-max * startup_spec * R'
+            'p_startup - (cap * startup_spec * R) >= -(1-startup) * M_cap * startup_spec * R'
             'p_startup >= (p_startup_spec * cap) if startup = 1.')
 
     m.pro_p_startup_in_ltzero_when_off = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_startup_in_ltzero_when_off_rule,
         doc='p_startup must be (lower) equal to zero when run = 0'
-            'p_startup <= startup * cap_max * startup_spec * R')
+            'p_startup <= startup * M_cap * startup_spec * R')
 
     m.pro_p_startup_in_gtzero_when_off = pyomo.Constraint(
-        m.tm, m.pro_partial_input_tuples,
+        m.tm, m.pro_partial_input_exp_tuples,
         rule=pro_p_startup_in_gtzero_when_off_rule,
         doc='p_startup must be (greater) equal to zero when run = 0'
-            'p_startup >= -startup * cap_max * startup_spec * R')
+            'p_startup >= -startup * M_cap * startup_spec * R')
     return m
 
 
@@ -90,31 +96,40 @@ def pro_mode_start_up_rule3(m, tm, stf, sit, pro):
     return m.pro_mode_startup[tm, stf, sit, pro] <= 1 - m.pro_mode_run[tm - 1, stf, sit, pro]
 
 
+def pro_p_startup_rule(m, tm, stf, sit, pro, coin):
+    cap_pro = process_const_cap(m, stf, sit, pro)
+    if cap_pro is None:
+        return m.pro_p_startup_var[tm, stf, sit, pro, coin]
+    # constant capacity: p_startup = startup_spec * cap * R * startup[0/1]
+    return m.process_dict['start-up-energy'][(stf, sit, pro)] * cap_pro * \
+           m.r_in_dict[(stf, pro, coin)] * m.pro_mode_startup[tm, stf, sit, pro]
+
+
 def pro_p_in_startup_lt_rule(m, tm, stf, sit, pro, coin):
-    # p_startup - (cap * startup_spec * R) <= (1-startup) * cap-max * startup_spec * R
+    # p_startup - (cap * startup_spec * R) <= (1-startup) * M_cap * startup_spec * R
     return m.pro_p_startup[tm, stf, sit, pro, coin] - m.cap_pro[stf, sit, pro] * \
            m.process_dict['start-up-energy'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)] <= \
-           (1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * \
+           (1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.pro_cap_bigM[(stf, sit, pro)] * \
            m.process_dict['start-up-energy'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)]
 
 
 def pro_p_in_startup_gt_rule(m, tm, stf, sit, pro, coin):
-    # p_startup - (cap * startup_spec * R) >= -(1-startup) * cap-max * startup_spec * R
+    # p_startup - (cap * startup_spec * R) >= -(1-startup) * M_cap * startup_spec * R
     return m.pro_p_startup[tm, stf, sit, pro, coin] - m.cap_pro[stf, sit, pro] * \
            m.process_dict['start-up-energy'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)] >= \
-           -(1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.process_dict['cap-up'][(stf, sit, pro)] * \
+           -(1 - m.pro_mode_startup[tm, stf, sit, pro]) * m.pro_cap_bigM[(stf, sit, pro)] * \
            m.process_dict['start-up-energy'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)]
 
 
 def pro_p_startup_in_ltzero_when_off_rule(m, tm, stf, sit, pro, coin):
-    # p_startup <= startup * startup_spec * cap_max * R
+    # p_startup <= startup * startup_spec * M_cap * R
     return m.pro_p_startup[tm, stf, sit, pro, coin] <= \
-           m.pro_mode_startup[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * \
+           m.pro_mode_startup[tm, stf, sit, pro] * m.pro_cap_bigM[(stf, sit, pro)] * \
            m.process_dict['start-up-energy'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)]
 
 
 def pro_p_startup_in_gtzero_when_off_rule(m, tm, stf, sit, pro, coin):
-    # p_startup >= -startup * startup_spec * cap_max * R
+    # p_startup >= -startup * startup_spec * M_cap * R
     return m.pro_p_startup[tm, stf, sit, pro, coin] >= \
-           -m.pro_mode_startup[tm, stf, sit, pro] * m.process_dict['cap-up'][(stf, sit, pro)] * \
+           -m.pro_mode_startup[tm, stf, sit, pro] * m.pro_cap_bigM[(stf, sit, pro)] * \
            m.process_dict['start-up-energy'][(stf, sit, pro)] * m.r_in_dict[(stf, pro, coin)]
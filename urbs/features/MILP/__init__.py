@@ -1,6 +1,7 @@
 """ add MILP features to urbs model
 """
 
+from .MILP_bigM import MILP_calc_bigM, get_bigM_tightening
 from .MILP_cap_min import MILP_cap_min
 from .MILP_partload import MILP_partload
 from .MILP_startupcosts import MILP_startupcosts
@@ -4,6 +4,9 @@ from urbs.pyomoio import get_entity
 
 
 def add_MILP_equations(m):
+    # big-M values derived from the input data (c.f. MILP_bigM)
+    m = MILP_calc_bigM(m)
+
     if 'MILP min_cap' in m._data['MILP'].index:
         m = MILP_cap_min(m)
 
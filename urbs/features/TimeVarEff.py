@@ -14,9 +14,9 @@ def add_time_variable_efficiency(m):
         initialize=[(stf, site, process, commodity)
                     for stf in tve_stflist
                     for (site, process) in tuple(m.eff_factor_dict.keys())
-                    for (st, pro, commodity) in tuple(m.r_out_dict.keys())
-                    if process == pro and st == stf and commodity not in
-                    m.com_env],
+                    for commodity in m.pro_output_com_dict.get((stf, process),
+                                                               [])
+                    if commodity not in m.com_env],
         doc='Outputs of processes with time dependent efficiency')
 
     # time variable efficiency rules
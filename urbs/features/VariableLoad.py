@@ -29,13 +29,31 @@ def add_valo(m):
         initialize=tuple(m.valo_dict["capacity"].keys()),
         doc='Combinations of possible storage by site,'
             'e.g. (2020,Mid,Bat,Elec)')
+    m.valo_goal_tuples = pyomo.Set(
+        within=m.t * m.valo_tuples,
+        initialize=[(t, stf, sit, valo, com)
+                    for (stf, sit, valo, com) in m.valo_tuples
+                    if (sit, valo) in m.valo_operation_plan_dict
+                    for t in sorted(m.valo_operation_plan_dict[(sit, valo)]
+                                    ['production_goals'])
+                    if t in m.t],
+        doc='Timesteps with an energy content goal per valo, '
+            'e.g. (40,2020,Mid,Forklift,Elec)')
 
 
     # Variables
-    m.valo_mode_run = pyomo.Var(
-        m.t, m.valo_tuples,
-        within=pyomo.Boolean,
-        doc='Boolean: True if valo is actively operating')
+    if hasattr(m, 'valo_fleet_dict'):
+        # number of operating members of an aggregated fleet (c.f. aggregate_valo_fleet)
+        m.valo_mode_run = pyomo.Var(
+            m.t, m.valo_tuples,
+            within=pyomo.NonNegativeIntegers,
+            bounds=valo_fleet_size_rule,
+            doc='Number of actively operating valos of a fleet')
+    else:
+        m.valo_mode_run = pyomo.Var(
+            m.t, m.valo_tuples,
+            within=pyomo.Boolean,
+            doc='Boolean: True if valo is actively operating')
 
     m.e_valo_in = pyomo.Var(
         m.tm, m.valo_tuples,
@@ -75,29 +93,28 @@ def add_valo(m):
         rule=res_valo_input_by_power_rule_min,
         doc='e_in(t) >= min_power * availability * run(t)')
 
-    for (site_name, valo_name) in m.valo_operation_plan_dict:
-        for stf, sit, v, com in m.valo_tuples:
-            if v == valo_name and sit == site_name:
-                # Adding constraints for Energy Content Goals at specified time points
-                for goal_time in m.valo_operation_plan_dict[(sit, valo_name)]['production_goals']:
-                    m.add_component(
-                        f"res_production_goal_{goal_time}_{stf}_{sit}_{valo_name}_{com}",
-                        pyomo.Constraint(
-                            rule=lambda m, t=goal_time, stf=stf, sit=sit, valo=valo_name, com=com:
-                            res_production_goal_rule(m, t, stf, sit, valo_name, com)
-                        )
-                    )
+    # Energy Content Goals at specified time points
+    m.res_production_goal = pyomo.Constraint(
+        m.valo_goal_tuples,
+        rule=res_production_goal_rule,
+        doc='E_con(t) >= energy content goal(t) * capacity')
 
     return m
 
 
+def valo_fleet_size_rule(m, t, stf, sit, valo, com):
+    return (0, len(m.valo_fleet_dict[(sit, valo)]))
+
+
 # E_con(t) = E_con(t-1) * (1-reset[t]) +
 #            E_reset(t) * reset[t] +
 #            e_in * eff
 def def_valo_state_rule(m, t, stf, sit, valo, com):
+    plan = m.valo_operation_plan_dict[(sit, valo)]
+    reset = plan['reset'][t - plan['first_timestep']]
     return m.e_valo_con[t, stf, sit, valo, com] == \
-           m.e_valo_con[t-1, stf, sit, valo, com] * (1 - m.valo_operation_plan_dict[(sit, valo)]['reset'].loc[t]) + \
-           m.e_valo_reset[t, stf, sit, valo, com] * m.valo_operation_plan_dict[(sit, valo)]['reset'].loc[t] + \
+           m.e_valo_con[t-1, stf, sit, valo, com] * (1 - reset) + \
+           m.e_valo_reset[t, stf, sit, valo, com] * reset + \
            m.e_valo_in[t, stf, sit, valo, com] * m.valo_dict['eff'][(stf, sit, valo, com)]
 
 
@@ -108,14 +125,21 @@ def def_valo_state_rule(m, t, stf, sit, valo, com):
 # In case of a BEV, this simulates that the vehicle was in use and thus discharged before returning. The SOC is in this
 # case still dependent on what was charged before the vehicle left for the pause period.
 def def_valo_reset_rule(m, t, stf, sit, valo, com):
-    if m.valo_operation_plan_dict[(sit, valo)]['set_energy_content'][t] > 0:
-        return m.e_valo_reset[t, stf, sit, valo, com] == m.valo_operation_plan_dict[(sit, valo)]['set_energy_content'][t] * \
+    plan = m.valo_operation_plan_dict[(sit, valo)]
+    set_energy_content = plan['set_energy_content'][t - plan['first_timestep']]
+    if set_energy_content > 0:
+        return m.e_valo_reset[t, stf, sit, valo, com] == set_energy_content * \
                m.valo_dict['capacity'][(stf, sit, valo, com)]
-    elif m.valo_operation_plan_dict[(sit, valo)]['set_energy_content'][t] < 0:
-        latest_previous_charging_timestep = m.valo_operation_plan_dict[(sit, valo)]['state'].loc[:t - 1][m.valo_operation_plan_dict[(sit, valo)]['state'].loc[:t - 1] == 1][::-1].idxmax()
+    elif set_energy_content < 0:
+        # latest active timestep before t, precomputed in read_in_valo_availability_data
+        last_active = plan['last_active'][t - 1 - plan['first_timestep']]
+        if last_active < 0:
+            raise ValueError("Negative 'Set Energy Content' of valo '{}', '{}' at timestep {} without a previous "
+                             "active timestep.".format(sit, valo, t))
+        latest_previous_charging_timestep = int(last_active) + plan['first_timestep']
         return m.e_valo_reset[t, stf, sit, valo, com] == \
                m.e_valo_con[latest_previous_charging_timestep, stf, sit, valo, com] + \
-               m.valo_operation_plan_dict[(sit, valo)]['set_energy_content'][t] * m.valo_dict['capacity'][(stf, sit, valo, com)]
+               set_energy_content * m.valo_dict['capacity'][(stf, sit, valo, com)]
     else:
         if t == 1:
             return m.e_valo_reset[t, stf, sit, valo, com] == 0
@@ -131,14 +155,16 @@ def res_valo_state_by_capacity_rule(m, t, stf, sit, valo, com):
 
 # e_in(t) <= max_power * availability * run(t) * dt
 def res_valo_input_by_power_rule_max(m, t, stf, sit, valo, com):
+    plan = m.valo_operation_plan_dict[(sit, valo)]
     return m.e_valo_in[t, stf, sit, valo, com] <= m.valo_dict['max-p'][(stf, sit, valo, com)] * \
-           m.valo_operation_plan_dict[(sit, valo)]['state'].loc[t] * m.valo_mode_run[t, stf, sit, valo, com] * m.dt
+           plan['state'][t - plan['first_timestep']] * m.valo_mode_run[t, stf, sit, valo, com] * m.dt
 
 
 # e_in(t) >= min_power * availability * run(t)
 def res_valo_input_by_power_rule_min(m, t, stf, sit, valo, com):
+    plan = m.valo_operation_plan_dict[(sit, valo)]
     return m.e_valo_in[t, stf, sit, valo, com] >= m.valo_dict['min-p'][(stf, sit, valo, com)] * \
-           m.valo_operation_plan_dict[(sit, valo)]['state'].loc[t] * m.valo_mode_run[t, stf, sit, valo, com] * m.dt
+           plan['state'][t - plan['first_timestep']] * m.valo_mode_run[t, stf, sit, valo, com] * m.dt
 
 
 # Reach Energy Content Goal at given time as defined in the valo_input file
@@ -159,5 +185,147 @@ def valo_balance(m, tm, stf, sit, com):
                if site == sit and stframe == stf and commodity == com)
 
 
+# Fleet aggregation (optional, c.f. create_model argument valo_fleet). Valos of one site and commodity with identical
+# parameters (capacity, max-p, min-p, eff, is-vehicle) and identical operation plans are replaced by a single fleet
+# valo. The capacity of the fleet is the sum of the capacities of its members and valo_mode_run becomes an integer
+# number of operating members. Thus, the valo restrictions form the energy envelope of the fleet: the energy content
+# lies within the summed bounds and resets and goals of the members, the input power is limited by the number of
+# operating members. The min-p restriction is only enforced for the fleet, not per member; disaggregate_valo_fleet
+# recovers a schedule per member from the fleet results.
+valo_fleet_params = ['capacity', 'max-p', 'min-p', 'eff', 'is-vehicle']
+
+
+def aggregate_valo_fleet(m):
+    # group valos by site, commodity, parameters of all support timeframes and operation plan
+    valo_stfs = {}
+    for (stf, sit, valo, com) in sorted(m.valo_dict['capacity']):
+        valo_stfs.setdefault((sit, valo, com), []).append(stf)
+
+    fleets = {}
+    for (sit, valo, com), stfs in sorted(valo_stfs.items()):
+        plan = m.valo_operation_plan_dict[(sit, valo)]
+        params = tuple((stf, tuple(m.valo_dict[param][(stf, sit, valo, com)] for param in valo_fleet_params))
+                       for stf in stfs)
+        plan_key = (plan['first_timestep'],
+                    plan['state'].tobytes(),
+                    plan['reset'].tobytes(),
+                    np.nan_to_num(plan['set_energy_content'], nan=2.0).tobytes(),
+                    tuple(sorted(plan['production_goals'].items())))
+        fleets.setdefault((sit, com, params, plan_key), []).append(valo)
+
+    m.valo_fleet_dict = {}
+    for (sit, com, params, plan_key), members in fleets.items():
+        if len(members) == 1:
+            m.valo_fleet_dict[(sit, members[0])] = members
+            continue
+        fleet = '{} fleet'.format(members[0])
+        if (sit, fleet) in m.valo_operation_plan_dict:
+            raise ValueError("Fleet name '{}', '{}' is already used by a valo.".format(sit, fleet))
+        m.valo_operation_plan_dict[(sit, fleet)] = m.valo_operation_plan_dict[(sit, members[0])]
+        for stf, _ in params:
+            for column in m.valo_dict:
+                m.valo_dict[column][(stf, sit, fleet, com)] = m.valo_dict[column][(stf, sit, members[0], com)]
+            m.valo_dict['capacity'][(stf, sit, fleet, com)] *= len(members)
+            for valo in members:
+                for column in m.valo_dict:
+                    del m.valo_dict[column][(stf, sit, valo, com)]
+        for valo in members:
+            del m.valo_operation_plan_dict[(sit, valo)]
+        m.valo_fleet_dict[(sit, fleet)] = members
+    return m
 
 
+# Schedule of the members of all fleets, derived from the fleet results. In every timestep, the integer number of
+# operating members of the fleet is assigned to concrete members, lowest energy content first, and the fleet input is
+# split equally among them. As the fleet input lies within the summed min-p and max-p of the operating members, every
+# member keeps its own binary and power limits. The energy content of the members follows from their own resets and
+# inputs, so the members sum up to the fleet. Capacities and goals hold for the fleet, but not necessarily for every
+# member; the number of such member timesteps is returned per fleet.
+def valo_fleet_schedule(m):
+    timesteps = sorted(m.t)
+    schedule = {name: {} for name in ['e_valo_in', 'e_valo_con', 'e_valo_reset', 'valo_mode_run']}
+    violations = {}
+    for (stf, sit, fleet, com) in m.valo_tuples:
+        members = m.valo_fleet_dict.get((sit, fleet), [fleet])
+        if members == [fleet]:
+            continue
+        plan = m.valo_operation_plan_dict[(sit, fleet)]
+        first = plan['first_timestep']
+        capacity = m.valo_dict['capacity'][(stf, sit, fleet, com)] / len(members)
+        eff = m.valo_dict['eff'][(stf, sit, fleet, com)]
+
+        def fleet_value(var, t):
+            return var[t, stf, sit, fleet, com].value or 0
+
+        # initial timestep: no input, content split equally
+        t = timesteps[0]
+        con = [fleet_value(m.e_valo_con, t) / len(members)] * len(members)
+        history = {t: list(con)}
+        running = int(round(fleet_value(m.valo_mode_run, t)))
+        for i, valo in enumerate(members):
+            schedule['e_valo_con'][(t, stf, sit, valo, com)] = con[i]
+            schedule['e_valo_reset'][(t, stf, sit, valo, com)] = \
+                fleet_value(m.e_valo_reset, t) / len(members)
+            schedule['valo_mode_run'][(t, stf, sit, valo, com)] = int(i < running)
+
+        violations[(stf, sit, fleet)] = 0
+        for t in timesteps[1:]:
+            # content reset, c.f. def_valo_reset_rule and def_valo_state_rule
+            reset = plan['reset'][t - first]
+            set_energy_content = plan['set_energy_content'][t - first]
+            if set_energy_content > 0:
+                reset_value = [set_energy_content * capacity] * len(members)
+            elif set_energy_content < 0:
+                last_active = int(plan['last_active'][t - 1 - first]) + first
+                reset_value = [c + set_energy_content * capacity for c in history[last_active]]
+            elif t == 1:
+                reset_value = [0] * len(members)
+            else:
+                reset_value = list(con)
+            base = [con[i] * (1 - reset) + reset_value[i] * reset for i in range(len(members))]
+
+            # operating members, lowest energy content first
+            running = min(int(round(fleet_value(m.valo_mode_run, t))), len(members))
+            order = sorted(range(len(members)), key=lambda i: (base[i], i))
+            operating = set(order[:running])
+            power = fleet_value(m.e_valo_in, t) / running if running else 0
+            goal = plan['production_goals'].get(t)
+            for i, valo in enumerate(members):
+                e_in = power if i in operating else 0
+                con[i] = base[i] + e_in * eff
+                if con[i] > capacity + 1e-6 or con[i] < -1e-6 or \
+                        (goal is not None and con[i] < goal * capacity - 1e-6):
+                    violations[(stf, sit, fleet)] += 1
+                schedule['e_valo_in'][(t, stf, sit, valo, com)] = e_in
+                schedule['e_valo_con'][(t, stf, sit, valo, com)] = con[i]
+                schedule['e_valo_reset'][(t, stf, sit, valo, com)] = reset_value[i]
+                schedule['valo_mode_run'][(t, stf, sit, valo, com)] = int(i in operating)
+            history[t] = list(con)
+    return schedule, violations
+
+
+# Replaces the results of the fleet valos by the schedule of their members (c.f. valo_fleet_schedule).
+def disaggregate_valo_fleet(m, result_cache):
+    names = [name for name in ['e_valo_in', 'e_valo_con', 'e_valo_reset', 'valo_mode_run']
+             if name in result_cache and not result_cache[name].empty]
+    if not names:
+        return result_cache
+    fleets = set(key for key, members in m.valo_fleet_dict.items() if members != [key[1]])
+    schedule, violations = valo_fleet_schedule(m)
+    if 'e_valo_con' in names:
+        for (stf, sit, fleet), count in sorted(violations.items()):
+            if count:
+                print("Warning from disaggregate_valo_fleet: {} member timesteps of fleet '{}', '{}' ({}) exceed the "
+                      "capacity or miss a goal of a single valo; these energy contents only hold for the fleet as a "
+                      "whole.".format(count, sit, fleet, stf))
+    for name in names:
+        entity = result_cache[name]
+        df = entity.reset_index()
+        mask = [key in fleets for key in zip(df['sit'], df['valo'])]
+        members = pd.Series(schedule[name], name=name)
+        if members.empty:
+            continue
+        members.index.names = entity.index.names
+        df = pd.concat([df[~np.array(mask, dtype=bool)], members.reset_index()], ignore_index=True)
+        result_cache[name] = df.set_index(entity.index.names)[name].sort_index()
+    return result_cache
@@ -1,4 +1,5 @@
 import math
+import numpy as np
 import pyomo.core as pyomo
 
 
@@ -18,13 +19,24 @@ def add_dsm(m):
         initialize=tuple(m.dsm_dict["delay"].keys()),
         doc='Combinations of possible dsm by site, e.g. '
             '(2020, Mid, Elec)')
+
+    # delay and recovery time in time steps and the modelled time range are
+    # computed once, the rules only derive their time windows from these
+    m.dsm_time_bounds = (min(m.timesteps[1:]), max(m.timesteps[1:]))
+    m.dsm_delay_steps = {
+        (stf, sit, com): max(int(1 / pyomo.value(m.dt) *
+                                 m.dsm_dict['delay'][(stf, sit, com)]), 1)
+        for (stf, sit, com) in m.dsm_site_tuples}
+    m.dsm_recov_steps = {
+        (stf, sit, com): max(int(1 / pyomo.value(m.dt) *
+                                 m.dsm_dict['recov'][(stf, sit, com)]), 1)
+        for (stf, sit, com) in m.dsm_site_tuples}
+
     m.dsm_down_tuples = pyomo.Set(
         within=m.tm*m.tm*m.stf*m.sit*m.com,
-        initialize=[(t, tt, stf, site, commodity)
-                    for (t, tt, stf, site, commodity)
-                    in dsm_down_time_tuples(m.timesteps[1:],
-                                            m.dsm_site_tuples,
-                                            m)],
+        initialize=dsm_down_time_tuples(m.timesteps[1:],
+                                        m.dsm_site_tuples,
+                                        m),
         doc='Combinations of possible dsm_down combinations, e.g. '
             '(5001,5003,2020,Mid,Elec)')
 
@@ -72,10 +84,7 @@ def add_dsm(m):
 # DSMup == DSMdo * efficiency factor n
 def def_dsm_variables_rule(m, tm, stf, sit, com):
     dsm_down_sum = 0
-    for tt in dsm_time_tuples(tm,
-                              m.timesteps[1:],
-                              max(int(1 / m.dt *
-                                  m.dsm_dict['delay'][(stf, sit, com)]), 1)):
+    for tt in dsm_time_tuples(m, tm, stf, sit, com):
         dsm_down_sum += m.dsm_down[tm, tt, stf, sit, com]
     return dsm_down_sum == (m.dsm_up[tm, stf, sit, com] *
                             m.dsm_dict['eff'][(stf, sit, com)])
@@ -91,10 +100,7 @@ def res_dsm_upward_rule(m, tm, stf, sit, com):
 # DSMdo <= Cdo (threshold capacity of DSMdo)
 def res_dsm_downward_rule(m, tm, stf, sit, com):
     dsm_down_sum = 0
-    for t in dsm_time_tuples(tm,
-                             m.timesteps[1:],
-                             max(int(1 / m.dt *
-                                 m.dsm_dict['delay'][(stf, sit, com)]), 1)):
+    for t in dsm_time_tuples(m, tm, stf, sit, com):
         dsm_down_sum += m.dsm_down[t, tm, stf, sit, com]
     return dsm_down_sum <= (m.dt * m.dsm_dict['cap-max-do'][(stf, sit, com)])
 
@@ -102,10 +108,7 @@ def res_dsm_downward_rule(m, tm, stf, sit, com):
 # DSMup + DSMdo <= max(Cup,Cdo)
 def res_dsm_maximum_rule(m, tm, stf, sit, com):
     dsm_down_sum = 0
-    for t in dsm_time_tuples(tm,
-                             m.timesteps[1:],
-                             max(int(1 / m.dt *
-                                 m.dsm_dict['delay'][(stf, sit, com)]), 1)):
+    for t in dsm_time_tuples(m, tm, stf, sit, com):
         dsm_down_sum += m.dsm_down[t, tm, stf, sit, com]
 
     max_dsm_limit = m.dt * max(m.dsm_dict['cap-max-up'][(stf, sit, com)],
@@ -116,10 +119,7 @@ def res_dsm_maximum_rule(m, tm, stf, sit, com):
 # DSMup(t, t + recovery time R) <= Cup * delay time L
 def res_dsm_recovery_rule(m, tm, stf, sit, com):
     dsm_up_sum = 0
-    for t in dsm_recovery(tm,
-                          m.timesteps[1:],
-                          max(int(1 / m.dt *
-                              m.dsm_dict['recov'][(stf, sit, com)]), 1)):
+    for t in dsm_recovery(m, tm, stf, sit, com):
         dsm_up_sum += m.dsm_up[t, stf, sit, com]
     return dsm_up_sum <= (m.dsm_dict['cap-max-up'][(stf, sit, com)] *
                           m.dsm_dict['delay'][(stf, sit, com)])
@@ -132,10 +132,7 @@ def dsm_surplus(m, tm, stf, sit, com):
     if (stf, sit, com) in m.dsm_site_tuples:
         return (- m.dsm_up[tm, stf, sit, com] +
                 sum(m.dsm_down[t, tm, stf, sit, com]
-                    for t in dsm_time_tuples(
-                    tm, m.timesteps[1:],
-                    max(int(1 / m.dt *
-                        m.dsm_dict['delay'][(stf, sit, com)]), 1))))
+                    for t in dsm_time_tuples(m, tm, stf, sit, com)))
     else:
         return 0
 
@@ -149,66 +146,49 @@ def dsm_down_time_tuples(time, sit_com_tuple, m):
     Returns:
         A list of possible time tuples depending on site and commodity
     """
-
-    delay = m.dsm_dict['delay']
-    ub = max(time)
-    lb = min(time)
+    lb, ub = m.dsm_time_bounds
+    steps = np.asarray(list(time))
     time_list = []
 
     for (stf, site, commodity) in sit_com_tuple:
-        for step1 in time:
-            for step2 in range(step1 -
-                               max(int(delay[stf, site, commodity] /
-                                   m.dt.value), 1),
-                               step1 +
-                               max(int(delay[stf, site, commodity] /
-                                   m.dt.value), 1) + 1):
-                if lb <= step2 <= ub:
-                    time_list.append((step1, step2, stf, site, commodity))
+        delay = m.dsm_delay_steps[(stf, site, commodity)]
+        # all (step1, step2) combinations within the delay window, rows of
+        # step1 in the order of time, clipped to the modelled time range
+        step1 = np.repeat(steps, 2 * delay + 1)
+        step2 = (steps[:, None] + np.arange(-delay, delay + 1)).ravel()
+        valid = (step2 >= lb) & (step2 <= ub)
+        time_list.extend(
+            (t, tt, stf, site, commodity)
+            for t, tt in zip(step1[valid].tolist(), step2[valid].tolist()))
 
     return time_list
 
 
-def dsm_time_tuples(timestep, time, delay):
+def dsm_time_tuples(m, timestep, stf, sit, com):
     """ Tuples for the two time instances of DSM_down
     Args:
+        m: model instance
         timestep: current timestep
-        time: list with time indices
-        delay: allowed dsm delay in particular site and commodity
+        stf, sit, com: support timeframe, site and commodity of the dsm
     Returns:
-        A list of possible time tuples of a current time step in a specific
-        stf, site and commodity
+        A range of possible time steps within the allowed dsm delay of a
+        current time step in a specific stf, site and commodity
     """
+    lb, ub = m.dsm_time_bounds
+    delay = m.dsm_delay_steps[(stf, sit, com)]
+    return range(max(timestep - delay, lb), min(timestep + delay, ub) + 1)
 
-    ub = max(time)
-    lb = min(time)
-
-    time_list = list()
-
-    for step in range(timestep - delay, timestep + delay + 1):
-        if step >= lb and step <= ub:
-            time_list.append(step)
-
-    return time_list
 
-
-def dsm_recovery(timestep, time, recov):
+def dsm_recovery(m, timestep, stf, sit, com):
     """ Time frame for the allowed time indices in case of recovery
     Args:
+        m: model instance
         timestep: current timestep
-        time: list with time indices
-        recov: allowed dsm recovery in particular site and commodity
+        stf, sit, com: support timeframe, site and commodity of the dsm
     Returns:
-        A list of possible time indices which are within the modelled time
+        A range of possible time indices which are within the modelled time
         area
     """
-
-    ub = max(time)
-
-    time_list = list()
-
-    for step in range(timestep, timestep+recov):
-        if step <= ub:
-            time_list.append(step)
-
-    return time_list
+    ub = m.dsm_time_bounds[1]
+    recov = m.dsm_recov_steps[(stf, sit, com)]
+    return range(timestep, min(timestep + recov - 1, ub) + 1)
@@ -0,0 +1,84 @@
+import numpy as np
+
+
+# Operational windows of units (processes, storages, transmissions) for
+# intertemporal planning. A unit counts as operational in a support timeframe,
+# if its depreciation (lifetime for already installed units) lasts until
+#   - 'midpoint': the midpoint to the next support timeframe (processes)
+#   - 'next': the next support timeframe (storages, transmissions)
+# and, for the last support timeframe, until its end (stf + weight - 1).
+def operational_window(m, build_year, duration, mode, installed=False):
+    """Operational status of units in all support timeframes.
+
+    Args:
+        - m: the model object
+        - build_year: support timeframes the units are built in
+        - duration: depreciation periods of the units (lifetimes for
+          installed units)
+        - mode: 'midpoint' or 'next', c.f. above
+        - installed: units are already installed in the first support
+          timeframe
+
+    Returns:
+        (sorted_stf, window): the sorted support timeframes and a boolean
+        array window[unit, stf]
+    """
+    sorted_stf = sorted(m.stf)
+    stf = np.array(sorted_stf, dtype=float)
+    thresholds = np.empty(len(stf))
+    if mode == 'midpoint':
+        thresholds[:-1] = (stf[:-1] + stf[1:]) / 2
+    elif mode == 'next':
+        thresholds[:-1] = stf[1:]
+    else:
+        raise ValueError("Unknown operational window mode '{}'.".format(mode))
+    thresholds[-1] = (stf[-1] +
+                      m.global_prop_dict['value'][(sorted_stf[-1], 'Weight')]
+                      - 1)
+
+    build_year = np.asarray(build_year, dtype=float).reshape(-1, 1)
+    duration = np.asarray(duration, dtype=float).reshape(-1, 1)
+    if installed:
+        end = stf[0] + duration
+        window = thresholds <= end
+        window[:, -1] = thresholds[-1] < end[:, 0]
+    else:
+        end = build_year + duration
+        window = (thresholds <= end) & (build_year <= stf)
+        window[:, -1] = thresholds[-1] <= end[:, 0]
+    return sorted_stf, window
+
+
+def op_tuples(m, unit_tuples, depreciation, mode):
+    """ Tuples (unit..., stf, stf_later) of units built in stf, which are
+    still operational in stf_later. unit_tuples are (stf, unit...).
+    """
+    unit_tuples = [tuple(key) for key in unit_tuples]
+    sorted_stf, window = operational_window(
+        m, [key[0] for key in unit_tuples],
+        [depreciation[key] for key in unit_tuples], mode)
+    return [unit_tuples[i][1:] + (unit_tuples[i][0], sorted_stf[j])
+            for i, j in zip(*np.nonzero(window))]
+
+
+def inst_tuples(m, unit_tuples, lifetime, mode):
+    """ Tuples (unit..., stf) of installed units, which are still operational
+    in stf. unit_tuples are (stf, unit...).
+    """
+    unit_tuples = [tuple(key) for key in unit_tuples]
+    sorted_stf, window = operational_window(
+        m, [key[0] for key in unit_tuples],
+        [lifetime[key] for key in unit_tuples], mode, installed=True)
+    return [unit_tuples[i][1:] + (sorted_stf[j],)
+            for i, j in zip(*np.nonzero(window))]
+
+
+def stf_built_dict(operational_tuples):
+    """ Support timeframes in which the units operational in a support
+    timeframe are built: {(unit..., stf): [stf_built, ...]} from tuples
+    (unit..., stf_built, stf).
+    """
+    stf_built = {}
+    for key in operational_tuples:
+        stf_built.setdefault(key[:-2] + (key[-1],), []).append(key[-2])
+    return stf_built
@@ -1,6 +1,7 @@
 from .transmission import transmission_balance
 from .storage import storage_balance
 from .VariableLoad import valo_balance
+from .lifetime import op_tuples, inst_tuples
 
 
 def invcost_factor(dep_prd, interest, discount=None, year_built=None,
@@ -113,6 +114,27 @@ def effective_distance(dist, m):
         return (1 - (1 + discount) ** (-dist)) / discount
 
 
+def stf_factors(m):
+    """Distance, discount and cost factors of all support timeframes.
+    Evaluated once per support timeframe, so that the cost factors of
+    commodities, processes, transmissions and storages as well as the CO2
+    rules only need a lookup.
+    Returns:
+        a dict {factor: {stf: value}} with the factors stf_dist,
+        discount-factor, eff-distance and cost_factor
+    """
+    factors = {'stf_dist': {}, 'discount-factor': {}, 'eff-distance': {},
+               'cost_factor': {}}
+    for stf in sorted(m.stf_list):
+        factors['stf_dist'][stf] = stf_dist(stf, m)
+        factors['discount-factor'][stf] = discount_factor(stf, m)
+        factors['eff-distance'][stf] = effective_distance(
+            factors['stf_dist'][stf], m)
+        factors['cost_factor'][stf] = (factors['discount-factor'][stf] *
+                                       factors['eff-distance'][stf])
+    return factors
+
+
 def commodity_balance(m, tm, stf, sit, com):
     """Calculate commodity balance at given timestep.
     For a given commodity co and timestep tm, calculate the balance of
@@ -173,25 +195,8 @@ def op_pro_tuples(pro_tuple, m):
     Only such tuples where the unit is still operational until the next
     support time frame are valid.
     """
-    op_pro = []
-    sorted_stf = sorted(list(m.stf))
-
-    for (stf, sit, pro) in pro_tuple:
-        for stf_later in sorted_stf:
-            index_helper = sorted_stf.index(stf_later)
-            if stf_later == max(sorted_stf):
-                if (stf_later +
-                    m.global_prop.loc[(max(sorted_stf), 'Weight'), 'value'] -
-                    1 <= stf + m.process_dict['depreciation'][
-                                              (stf, sit, pro)]):
-                    op_pro.append((sit, pro, stf, stf_later))
-            elif ((stf_later + sorted_stf[index_helper + 1])/2 <= stf + m.process_dict['depreciation'][(stf, sit, pro)]
-                  and stf <= stf_later):
-                op_pro.append((sit, pro, stf, stf_later))
-            else:
-                pass
-
-    return op_pro
+    return op_tuples(m, pro_tuple, m.process_dict['depreciation'],
+                     'midpoint')
 
 
 def inst_pro_tuples(m):
@@ -200,20 +205,5 @@ def inst_pro_tuples(m):
     Only such tuples where the unit is still operational until the next
     support time frame are valid.
     """
-    inst_pro = []
-    sorted_stf = sorted(list(m.stf))
-
-    for (stf, sit, pro) in m.inst_pro.index:
-        for stf_later in sorted_stf:
-            index_helper = sorted_stf.index(stf_later)
-            if stf_later == max(m.stf):
-                if (stf_later +
-                   m.global_prop.loc[(max(sorted_stf), 'Weight'), 'value'] -
-                   1 < min(m.stf) + m.process_dict['lifetime'][
-                                                   (stf, sit, pro)]):
-                    inst_pro.append((sit, pro, stf_later))
-            elif (stf_later + sorted_stf[index_helper + 1])/2 <= (min(m.stf)
-                                                                  + m.process_dict['lifetime'][(stf, sit, pro)]):
-                inst_pro.append((sit, pro, stf_later))
-
-    return inst_pro
+    return inst_tuples(m, m.inst_pro.index, m.process_dict['lifetime'],
+                       'midpoint')
@@ -1,5 +1,6 @@
 import math
 import pyomo.core as pyomo
+from .lifetime import op_tuples, inst_tuples, stf_built_dict
 
 
 def add_storage(m):
@@ -35,6 +36,7 @@ def add_storage(m):
                         for (sit, sto, com, stf)
                         in inst_sto_tuples(m)],
             doc='Installed storages that are still operational through stf')
+        m.sto_stf_built_dict = stf_built_dict(m.operational_sto_tuples)
 
     # storage tuples for storages with fixed initial state
     m.sto_init_bound_tuples = pyomo.Set(
@@ -153,16 +155,14 @@ def def_storage_capacity_rule(m, stf, sit, sto, com):
             else:
                 cap_sto_c = (
                     sum(m.cap_sto_c_new[stf_built, sit, sto, com]
-                        for stf_built in m.stf
-                        if (sit, sto, com, stf_built, stf) in
-                        m.operational_sto_tuples) +
+                        for stf_built in m.sto_stf_built_dict.get(
+                            (sit, sto, com, stf), [])) +
                     m.storage_dict['inst-cap-c'][(min(m.stf), sit, sto, com)])
         else:
             cap_sto_c = (
                 sum(m.cap_sto_c_new[stf_built, sit, sto, com]
-                    for stf_built in m.stf
-                    if (sit, sto, com, stf_built, stf) in
-                    m.operational_sto_tuples))
+                    for stf_built in m.sto_stf_built_dict.get(
+                        (sit, sto, com, stf), [])))
     else:
         if (stf, sit, sto, com) in m.sto_const_cap_c_dict:
             cap_sto_c = m.storage_dict['inst-cap-c'][(stf, sit, sto, com)]
@@ -183,16 +183,14 @@ def def_storage_power_rule(m, stf, sit, sto, com):
             else:
                 cap_sto_p = (
                     sum(m.cap_sto_p_new[stf_built, sit, sto, com]
-                        for stf_built in m.stf
-                        if (sit, sto, com, stf_built, stf) in
-                        m.operational_sto_tuples) +
+                        for stf_built in m.sto_stf_built_dict.get(
+                            (sit, sto, com, stf), [])) +
                     m.storage_dict['inst-cap-p'][(min(m.stf), sit, sto, com)])
         else:
             cap_sto_p = (
                 sum(m.cap_sto_p_new[stf_built, sit, sto, com]
-                    for stf_built in m.stf
-                    if (sit, sto, com, stf_built, stf)
-                    in m.operational_sto_tuples))
+                    for stf_built in m.sto_stf_built_dict.get(
+                        (sit, sto, com, stf), [])))
     else:
         if (stf, sit, sto, com) in m.sto_const_cap_p_dict:
             cap_sto_p = m.storage_dict['inst-cap-p'][(stf, sit, sto, com)]
@@ -318,47 +316,11 @@ def storage_cost(m, cost_type):
 def op_sto_tuples(sto_tuple, m):
     """ s.a. op_pro_tuples
     """
-    op_sto = []
-    sorted_stf = sorted(list(m.stf))
-
-    for (stf, sit, sto, com) in sto_tuple:
-        for stf_later in sorted_stf:
-            index_helper = sorted_stf.index(stf_later)
-            if stf_later == max(sorted_stf):
-                if (stf_later +
-                    m.global_prop_dict['value'][(max(sorted_stf), 'Weight')] -
-                    1 <= stf +
-                        m.storage_dict['depreciation'][(stf, sit, sto, com)]):
-                    op_sto.append((sit, sto, com, stf, stf_later))
-            elif (sorted_stf[index_helper + 1] <=
-                  stf +
-                  m.storage_dict['depreciation'][(stf, sit, sto, com)] and
-                  stf <= stf_later):
-                op_sto.append((sit, sto, com, stf, stf_later))
-            else:
-                pass
-
-    return op_sto
+    return op_tuples(m, sto_tuple, m.storage_dict['depreciation'], 'next')
 
 
 def inst_sto_tuples(m):
     """ s.a. inst_pro_tuples
     """
-    inst_sto = []
-    sorted_stf = sorted(list(m.stf))
-
-    for (stf, sit, sto, com) in m.inst_sto.index:
-        for stf_later in sorted_stf:
-            index_helper = sorted_stf.index(stf_later)
-            if stf_later == max(m.stf):
-                if (stf_later +
-                    m.global_prop_dict['value'][(max(sorted_stf), 'Weight')] -
-                    1 < min(m.stf) +
-                        m.storage_dict['lifetime'][(stf, sit, sto, com)]):
-                    inst_sto.append((sit, sto, com, stf_later))
-            elif (sorted_stf[index_helper + 1] <=
-                  min(m.stf) + m.storage_dict['lifetime'][
-                                (stf, sit, sto, com)]):
-                inst_sto.append((sit, sto, com, stf_later))
-
-    return inst_sto
+    return inst_tuples(m, m.inst_sto.index, m.storage_dict['lifetime'],
+                       'next')
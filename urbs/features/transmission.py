@@ -1,5 +1,6 @@
 import math
 import pyomo.core as pyomo
+from .lifetime import op_tuples, inst_tuples, stf_built_dict
 
 def e_tra_domain_rule(m, tm, stf, sin, sout, tra, com):
     # assigning e_tra_in and e_tra_out variable domains for transport and DCPF
@@ -59,6 +60,7 @@ def add_transmission(m):
                         in inst_tra_tuples(m)],
             doc='Installed transmissions that are still operational'
                 'through stf')
+        m.tra_stf_built_dict = stf_built_dict(m.operational_tra_tuples)
 
     # Variables
     m.cap_tra_new = pyomo.Var(
@@ -161,6 +163,7 @@ def add_transmission_dc(m):
                         in inst_tra_tuples(m)],
             doc='Installed transmissions that are still operational'
                 'through stf')
+        m.tra_stf_built_dict = stf_built_dict(m.operational_tra_tuples)
 
     # Variables
     m.cap_tra_new = pyomo.Var(
@@ -248,17 +251,15 @@ def def_transmission_capacity_rule(m, stf, sin, sout, tra, com):
             else:
                 cap_tra = (
                     sum(m.cap_tra_new[stf_built, sin, sout, tra, com]
-                        for stf_built in m.stf
-                        if (sin, sout, tra, com, stf_built, stf) in
-                        m.operational_tra_tuples) +
+                        for stf_built in m.tra_stf_built_dict.get(
+                            (sin, sout, tra, com, stf), [])) +
                     m.transmission_dict['inst-cap']
                     [(min(m.stf), sin, sout, tra, com)])
         else:
             cap_tra = (
                 sum(m.cap_tra_new[stf_built, sin, sout, tra, com]
-                    for stf_built in m.stf
-                    if (sin, sout, tra, com, stf_built, stf) in
-                    m.operational_tra_tuples))
+                    for stf_built in m.tra_stf_built_dict.get(
+                        (sin, sout, tra, com, stf), [])))
     else:
         if (stf, sin, sout, tra, com) in m.tra_const_cap_dict:
             cap_tra = \
@@ -391,46 +392,12 @@ def transmission_cost(m, cost_type):
 def op_tra_tuples(tra_tuple, m):
     """ s.a. op_pro_tuples
     """
-    op_tra = []
-    sorted_stf = sorted(list(m.stf))
-
-    for (stf, sit1, sit2, tra, com) in tra_tuple:
-        for stf_later in sorted_stf:
-            index_helper = sorted_stf.index(stf_later)
-            if stf_later == max(sorted_stf):
-                if (stf_later +
-                    m.global_prop_dict['value'][(max(sorted_stf), 'Weight')] -
-                    1 <= stf + m.transmission_dict['depreciation'][
-                        (stf, sit1, sit2, tra, com)]):
-                    op_tra.append((sit1, sit2, tra, com, stf, stf_later))
-            elif (sorted_stf[index_helper + 1] <=
-                  stf + m.transmission_dict['depreciation'][
-                      (stf, sit1, sit2, tra, com)] and stf <= stf_later):
-                op_tra.append((sit1, sit2, tra, com, stf, stf_later))
-            else:
-                pass
-
-    return op_tra
+    return op_tuples(m, tra_tuple, m.transmission_dict['depreciation'],
+                     'next')
 
 
 def inst_tra_tuples(m):
     """ s.a. inst_pro_tuples
     """
-    inst_tra = []
-    sorted_stf = sorted(list(m.stf))
-
-    for (stf, sit1, sit2, tra, com) in m.inst_tra.index:
-        for stf_later in sorted_stf:
-            index_helper = sorted_stf.index(stf_later)
-            if stf_later == max(m.stf):
-                if (stf_later +
-                    m.global_prop_dict['value'][(max(sorted_stf), 'Weight')] -
-                    1 < min(m.stf) + m.transmission_dict['lifetime'][
-                        (stf, sit1, sit2, tra, com)]):
-                    inst_tra.append((sit1, sit2, tra, com, stf_later))
-            elif (sorted_stf[index_helper + 1] <= min(m.stf) +
-                  m.transmission_dict['lifetime'][
-                      (stf, sit1, sit2, tra, com)]):
-                inst_tra.append((sit1, sit2, tra, com, stf_later))
-
-    return inst_tra
+    return inst_tuples(m, m.inst_tra.index, m.transmission_dict['lifetime'],
+                       'next')
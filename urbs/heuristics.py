@@ -0,0 +1,111 @@
+import pyomo.core as pyomo
+from .pyomoio import _get_onset_names
+from .warmstart import relax_integer_vars, restore_integer_vars
+
+
+def time_indexed_integer_vars(m):
+    """Group the binary and integer variables of a model by timestep.
+
+    Only variables whose first index set is a time step set (t or tm) are
+    considered, e.g. pro_mode_run, pro_mode_startup or valo_mode_run.
+    Variables without time index (e.g. cap_pro_build) are not returned.
+
+    Args:
+        - m: a urbs model instance
+
+    Returns:
+        a dict {timestep: [var, ...]}
+    """
+    variables = {t: [] for t in m.t}
+    for var in m.component_objects(pyomo.Var, descend_into=True):
+        labels = _get_onset_names(var)
+        if not labels or labels[0] not in ('t', 'tm'):
+            continue
+        for index, var_data in var.items():
+            if var_data.is_binary() or var_data.is_integer():
+                t = index[0] if isinstance(index, tuple) else index
+                variables[t].append(var_data)
+    return variables
+
+
+def _solve_window(prob, optim, description):
+    result = optim.solve(prob, load_solutions=False)
+    if str(result.solver.termination_condition) != 'optimal':
+        raise RuntimeError('relax_and_fix: {} could not be solved: {}'
+                           .format(description,
+                                   result.solver.termination_condition))
+    prob.solutions.load_from(result)
+
+
+def relax_and_fix(prob, optim, window=96, step=None, polish=False):
+    """Relax-and-fix heuristic for MILP problems with time indexed binaries.
+
+    The time horizon is split into windows of `window` timesteps. In each
+    iteration, the binaries of the current window are integer, the binaries
+    of later timesteps are relaxed and those of earlier windows are fixed
+    to the previous solution. Windows advance by `step` timesteps (overlapping
+    windows for step < window). With polish=True, a fix-and-optimize pass
+    afterwards re-optimizes the binaries of one window at a time while all
+    others stay fixed.
+
+    After the heuristic, all binaries are unfixed again; their values form a
+    feasible schedule, which can be used as a MIP start (c.f. run_scenario
+    argument warmstart).
+
+    Args:
+        - prob: a urbs model instance
+        - optim: a pyomo solver object
+        - window: number of timesteps with integer binaries per iteration
+        - step: number of timesteps the window advances (default: window)
+        - polish: run a fix-and-optimize pass after relax-and-fix
+
+    Returns:
+        the objective value of the found solution
+    """
+    if step is None:
+        step = window
+    if not 0 < step <= window:
+        raise ValueError('relax_and_fix: step must be within 1 and window.')
+
+    variables = time_indexed_integer_vars(prob)
+    timesteps = list(prob.t)
+    relaxed = relax_integer_vars(
+        prob, [var for t in timesteps for var in variables[t]])
+
+    try:
+        # relax-and-fix
+        start = 0
+        while start < len(timesteps):
+            end = min(start + window, len(timesteps))
+            for t in timesteps[start:end]:
+                restore_integer_vars({var: relaxed[var]
+                                      for var in variables[t]})
+            _solve_window(prob, optim, 'window {}-{}'.format(
+                timesteps[start], timesteps[end - 1]))
+
+            # fix the part of the window, which is not revisited
+            fix_end = end if end == len(timesteps) else start + step
+            for t in timesteps[start:fix_end]:
+                for var in variables[t]:
+                    var.fix(int(round(var.value)))
+            start = fix_end
+
+        # fix-and-optimize
+        if polish:
+            for start in range(0, len(timesteps), window):
+                end = min(start + window, len(timesteps))
+                for t in timesteps[start:end]:
+                    for var in variables[t]:
+                        var.unfix()
+                _solve_window(prob, optim, 'polishing window {}-{}'.format(
+                    timesteps[start], timesteps[end - 1]))
+                for t in timesteps[start:end]:
+                    for var in variables[t]:
+                        var.fix(int(round(var.value)))
+    finally:
+        restore_integer_vars(relaxed)
+        for t in timesteps:
+            for var in variables[t]:
+                var.unfix()
+
+    return pyomo.value(prob.objective_function)
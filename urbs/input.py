@@ -265,11 +265,29 @@ def read_in_valo_availability_data(m, timesteps, dt):
                     production_goals[timestep] = energy_content_goal
             site_valo_key = (site_name, file_name)
 
+            # The operation plan is stored as numpy arrays indexed by timestep - first_timestep for constant time
+            # lookups in the valo rules. last_active holds for each timestep the position of the latest timestep up
+            # to it in which the valo is active (forward fill, -1 if there is none).
+            # the positions are only valid for consecutive timesteps covering all modelled timesteps
+            first_timestep = int(operation_plan.index[0])
+            plan_timesteps = np.arange(first_timestep, first_timestep + len(operation_plan))
+            if (not np.array_equal(operation_plan.index.to_numpy(), plan_timesteps) or
+                    first_timestep > min(timesteps) or plan_timesteps[-1] < max(timesteps)):
+                raise ValueError("The operation plan '{}', '{}' must consist of consecutive timesteps covering all "
+                                 "modelled timesteps {} to {}.".format(site_dir, file_name,
+                                                                       min(timesteps), max(timesteps)))
+
+            state = operation_plan['State'].to_numpy(dtype=float)
+            positions = np.arange(len(state))
+            last_active = np.maximum.accumulate(np.where(state == 1, positions, -1))
+
             m.valo_operation_plan_dict[site_valo_key] = {
-                'set_energy_content': operation_plan['Set Energy Content'],
+                'first_timestep': first_timestep,
+                'set_energy_content': operation_plan['Set Energy Content'].to_numpy(dtype=float),
                 'production_goals': production_goals,
-                'state': operation_plan['State'],
-                'reset': operation_plan['Reset Energy Content']
+                'state': state,
+                'reset': operation_plan['Reset Energy Content'].to_numpy(dtype=float),
+                'last_active': last_active
             }
     if len(remaining_valos) != 0:
         raise ValueError("There is no operation plan for the variable loads '{}' introduced in the input "
@@ -278,6 +296,10 @@ def read_in_valo_availability_data(m, timesteps, dt):
 
 
 def validate_valo_input_files(m, dt, site_name, file_name, op_plan, valo):
+    # Ensure consecutive timesteps, the operation plan is accessed by position
+    if not (np.diff(op_plan.index.to_numpy()) == 1).all():
+        raise ValueError("The timesteps in '{}', '{}' have to be consecutive integers.".format(site_name, file_name))
+
     # Ensure State only contains 0,1,2,3:
     unique_states = op_plan['State'].unique()
     allowed_values = {0, 1, 2, 3}
@@ -529,6 +551,14 @@ def add_valo_fix_part_to_demand(m, dt, op_plan, valo):
 
 
 # preparing the pyomo model
+def group_process_commodities(ratio_dict):
+    # {(stf, pro): [com, ...]} from a dict with keys (stf, pro, com)
+    grouped = {}
+    for (stf, pro, com) in ratio_dict:
+        grouped.setdefault((stf, pro), []).append(com)
+    return grouped
+
+
 def pyomo_model_prep(data, timesteps, dt):
     '''Performs calculations on the data frames in dictionary "data" for
     further usage by the model.
@@ -660,6 +690,15 @@ def pyomo_model_prep(data, timesteps, dt):
     r_out_min_fraction = r_out_min_fraction[r_out_min_fraction > 0]
     m.r_out_min_fraction_dict = r_out_min_fraction.to_dict()
 
+    # commodities per (stf, process) of the ratio dicts, shared by all
+    # process input/output tuple sets (joined with the process tuples)
+    m.pro_input_com_dict = group_process_commodities(m.r_in_dict)
+    m.pro_output_com_dict = group_process_commodities(m.r_out_dict)
+    m.pro_partial_input_com_dict = \
+        group_process_commodities(m.r_in_min_fraction_dict)
+    m.pro_partial_output_com_dict = \
+        group_process_commodities(m.r_out_min_fraction_dict)
+
     # storages with fixed initial state
     if m.mode['sto']:
         stor_init_bound = storage['init']
@@ -682,15 +721,21 @@ def pyomo_model_prep(data, timesteps, dt):
                     pro_const_cap.loc[index]['inst-cap']):
                 pro_const_cap = pro_const_cap.drop(index)
 
+        # distance, discount and cost factors per support timeframe
+        m.stf_factor_dict = stf_factors(m)
+        discount = (m.global_prop.xs('Discount rate', level=1)
+                    .loc[m.global_prop.index.min()[0]]['value'])
+        stf_min = m.global_prop.index.min()[0]
+        stf_end = (m.global_prop.index.max()[0] +
+                   m.global_prop.loc[
+                   (max(commodity.index.get_level_values
+                        ('support_timeframe').unique()),
+                    'Weight')]['value'] - 1)
+
         # derive invest factor from WACC, depreciation and discount untility
-        process['discount'] = (m.global_prop.xs('Discount rate', level=1)
-                                .loc[m.global_prop.index.min()[0]]['value'])
-        process['stf_min'] = m.global_prop.index.min()[0]
-        process['stf_end'] = (m.global_prop.index.max()[0] +
-                              m.global_prop.loc[
-                              (max(commodity.index.get_level_values
-                                   ('support_timeframe').unique()),
-                               'Weight')]['value'] - 1)
+        process['discount'] = discount
+        process['stf_min'] = stf_min
+        process['stf_end'] = stf_end
         process['invcost-factor'] = (process.apply(
                                      lambda x: invcost_factor(
                                          x['depreciation'],
@@ -715,22 +760,11 @@ def pyomo_model_prep(data, timesteps, dt):
                      .isnull()), 'overpay-factor'] = 0
 
         # Derive multiplier for all energy based costs
-        commodity['stf_dist'] = (commodity['support_timeframe'].
-                                 apply(stf_dist, m=m))
-        commodity['discount-factor'] = (commodity['support_timeframe'].
-                                        apply(discount_factor, m=m))
-        commodity['eff-distance'] = (commodity['stf_dist'].
-                                     apply(effective_distance, m=m))
-        commodity['cost_factor'] = (commodity['discount-factor'] *
-                                    commodity['eff-distance'])
-        process['stf_dist'] = (process['support_timeframe'].
-                               apply(stf_dist, m=m))
-        process['discount-factor'] = (process['support_timeframe'].
-                                      apply(discount_factor, m=m))
-        process['eff-distance'] = (process['stf_dist'].
-                                   apply(effective_distance, m=m))
-        process['cost_factor'] = (process['discount-factor'] *
-                                  process['eff-distance'])
+        for factor in m.stf_factor_dict:
+            commodity[factor] = (commodity['support_timeframe'].
+                                 map(m.stf_factor_dict[factor]))
+            process[factor] = (process['support_timeframe'].
+                               map(m.stf_factor_dict[factor]))
 
         # Additional features
         # transmission mode
@@ -744,15 +778,9 @@ def pyomo_model_prep(data, timesteps, dt):
                     tra_const_cap = tra_const_cap.drop(index)
             # derive invest factor from WACC, depreciation and
             # discount untility
-            transmission['discount'] = (
-                m.global_prop.xs('Discount rate', level=1)
-                .loc[m.global_prop.index.min()[0]]['value'])
-            transmission['stf_min'] = m.global_prop.index.min()[0]
-            transmission['stf_end'] = (m.global_prop.index.max()[0] +
-                                       m.global_prop.loc[
-                                       (max(commodity.index.get_level_values
-                                            ('support_timeframe').unique()),
-                                        'Weight')]['value'] - 1)
+            transmission['discount'] = discount
+            transmission['stf_min'] = stf_min
+            transmission['stf_end'] = stf_end
             transmission['invcost-factor'] = (
                 transmission.apply(lambda x: invcost_factor(
                     x['depreciation'],
@@ -776,14 +804,9 @@ def pyomo_model_prep(data, timesteps, dt):
             transmission.loc[(transmission['overpay-factor'] < 0) |
                              (transmission['overpay-factor'].isnull()),
                              'overpay-factor'] = 0
-            transmission['stf_dist'] = (transmission['support_timeframe'].
-                                        apply(stf_dist, m=m))
-            transmission['discount-factor'] = (
-                transmission['support_timeframe'].apply(discount_factor, m=m))
-            transmission['eff-distance'] = (transmission['stf_dist'].
-                                            apply(effective_distance, m=m))
-            transmission['cost_factor'] = (transmission['discount-factor'] *
-                                           transmission['eff-distance'])
+            for factor in m.stf_factor_dict:
+                transmission[factor] = (transmission['support_timeframe'].
+                                        map(m.stf_factor_dict[factor]))
         # storage mode
         if m.mode['sto']:
             # modify sto_const_cap_c and sto_const_cap_p for intertemporal mode
@@ -801,14 +824,9 @@ def pyomo_model_prep(data, timesteps, dt):
 
             # derive invest factor from WACC, depreciation and
             # discount untility
-            storage['discount'] = m.global_prop.xs('Discount rate', level=1) \
-                                   .loc[m.global_prop.index.min()[0]]['value']
-            storage['stf_min'] = m.global_prop.index.min()[0]
-            storage['stf_end'] = (m.global_prop.index.max()[0] +
-                                  m.global_prop.loc[
-                                  (max(commodity.index.get_level_values
-                                       ('support_timeframe').unique()),
-                                   'Weight')]['value'] - 1)
+            storage['discount'] = discount
+            storage['stf_min'] = stf_min
+            storage['stf_end'] = stf_end
             storage['invcost-factor'] = (
                 storage.apply(
                     lambda x: invcost_factor(
@@ -832,14 +850,9 @@ def pyomo_model_prep(data, timesteps, dt):
                         (storage['overpay-factor'].isnull()),
                         'overpay-factor'] = 0
 
-            storage['stf_dist'] = (storage['support_timeframe']
-                                   .apply(stf_dist, m=m))
-            storage['discount-factor'] = (storage['support_timeframe']
-                                          .apply(discount_factor, m=m))
-            storage['eff-distance'] = (storage['stf_dist']
-                                       .apply(effective_distance, m=m))
-            storage['cost_factor'] = (storage['discount-factor'] *
-                                      storage['eff-distance'])
+            for factor in m.stf_factor_dict:
+                storage[factor] = (storage['support_timeframe']
+                                   .map(m.stf_factor_dict[factor]))
     else:
         # for one year problems
         process['invcost-factor'] = (
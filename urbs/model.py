@@ -2,12 +2,13 @@ import math
 import pyomo.core as pyomo
 from datetime import datetime
 from .features import *
-from .features.VariableLoad import add_valo
+from .features.VariableLoad import add_valo, aggregate_valo_fleet
+from .features.lifetime import stf_built_dict
 from .input import *
 
 
 def create_model(data, dt=1, timesteps=None, objective='cost',
-                 dual=True):
+                 dual=True, valo_fleet=False):
     """Create a pyomo ConcreteModel urbs object from given input data.
 
     Args:
@@ -18,6 +19,9 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
           default: "cost"
         - dual: set True to add dual variables to model output
           (marginally slower), default: True
+        - valo_fleet: set True to aggregate valos with identical parameters
+          and operation plans to fleets (c.f. aggregate_valo_fleet),
+          default: False
 
     Returns:
         a pyomo ConcreteModel object
@@ -27,6 +31,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
     if not timesteps:
         timesteps = data['demand'].index.tolist()
     m = pyomo_model_prep(data, timesteps, dt)  # preparing pyomo model
+    if valo_fleet and m.mode['valo']:
+        m = aggregate_valo_fleet(m)
     m.name = 'urbs'
     m.created = datetime.now().strftime('%Y%m%dT%H%M')
     m._data = data
@@ -156,6 +162,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
                         for (sit, pro, stf)
                         in inst_pro_tuples(m)],
             doc='Installed processes that are still operational through stf')
+        # support timeframes of new capacities operational in stf
+        m.pro_stf_built_dict = stf_built_dict(m.operational_pro_tuples)
 
     # commodity type subsets
     m.com_supim = pyomo.Set(
@@ -182,16 +190,16 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
         within=m.stf * m.sit * m.pro * m.com,
         initialize=[(stf, site, process, commodity)
                     for (stf, site, process) in m.pro_tuples
-                    for (s, pro, commodity) in tuple(m.r_in_dict.keys())
-                    if process == pro and s == stf],
+                    for commodity in m.pro_input_com_dict.get((stf, process),
+                                                      [])],
         doc='Commodities consumed by process by site,'
             'e.g. (2020,Mid,PV,Solar)')
     m.pro_output_tuples = pyomo.Set(
         within=m.stf * m.sit * m.pro * m.com,
         initialize=[(stf, site, process, commodity)
                     for (stf, site, process) in m.pro_tuples
-                    for (s, pro, commodity) in tuple(m.r_out_dict.keys())
-                    if process == pro and s == stf],
+                    for commodity in m.pro_output_com_dict.get((stf, process),
+                                                       [])],
         doc='Commodities produced by process by site, e.g. (2020,Mid,PV,Elec)')
 
     # process tuples for maximum gradient feature
@@ -207,17 +215,15 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
         within=m.stf * m.sit * m.pro,
         initialize=[(stf, site, process)
                     for (stf, site, process) in m.pro_tuples
-                    for (s, pro, _) in tuple(m.r_in_min_fraction_dict.keys())
-                    if process == pro and s == stf],
+                    if (stf, process) in m.pro_partial_input_com_dict],
         doc='Processes with partial input')
 
     m.pro_partial_input_tuples = pyomo.Set(
         within=m.stf * m.sit * m.pro * m.com,
         initialize=[(stf, site, process, commodity)
                     for (stf, site, process) in m.pro_partial_tuples
-                    for (s, pro, commodity) in tuple(m.r_in_min_fraction_dict
-                                                     .keys())
-                    if process == pro and s == stf],
+                    for commodity in m.pro_partial_input_com_dict.get(
+                        (stf, process), [])],
         doc='Commodities with partial input ratio,'
             'e.g. (2020,Mid,Coal PP,Coal)')
 
@@ -225,9 +231,8 @@ def create_model(data, dt=1, timesteps=None, objective='cost',
         within=m.stf * m.sit * m.pro * m.com,
         initialize=[(stf, site, process, commodity)
                     for (stf, site, process) in m.pro_partial_tuples
-                    for (s, pro, commodity) in tuple(m.r_out_min_fraction_dict
-                                                     .keys())
-                    if process == pro and s == stf],
+                    for commodity in m.pro_partial_output_com_dict.get(
+                        (stf, process), [])],
         doc='Commodities with partial input ratio, e.g. (Mid,Coal PP,CO2)')
 
     # Variables
@@ -460,6 +465,12 @@ def res_vertex_rule(m, tm, stf, sit, com, com_type):
     if com in m.com_supim:
         return pyomo.Constraint.Skip
 
+    return vertex_power_surplus(m, tm, stf, sit, com, com_type) == 0
+
+
+# power surplus of the vertex equation; shared by res_vertex_rule and the
+# Benders subproblems (c.f. decomposition.py), which add slack terms to it
+def vertex_power_surplus(m, tm, stf, sit, com, com_type):
     # helper function commodity_balance calculates balance from input to
     # and output from processes, valo, storage and transmission.
     # if power_surplus > 0: production/valo/storage/imports create net positive
@@ -489,7 +500,7 @@ def res_vertex_rule(m, tm, stf, sit, com, com_type):
     if m.mode['dsm']:
         power_surplus += dsm_surplus(m, tm, stf, sit, com)
 
-    return power_surplus == 0
+    return power_surplus
 
 # stock commodity purchase == commodity consumption, according to
 # commodity_balance of current (time step, site, commodity);
@@ -561,15 +572,14 @@ def def_process_capacity_rule(m, stf, sit, pro):
             else:
                 cap_pro = \
                     (sum(m.cap_pro_new[stf_built, sit, pro]
-                         for stf_built in m.stf
-                         if (sit, pro, stf_built, stf)
-                         in m.operational_pro_tuples) +
+                         for stf_built in m.pro_stf_built_dict.get(
+                             (sit, pro, stf), [])) +
                      m.process_dict['inst-cap'][(min(m.stf), sit, pro)])
         else:
             cap_pro = sum(
                 m.cap_pro_new[stf_built, sit, pro]
-                for stf_built in m.stf
-                if (sit, pro, stf_built, stf) in m.operational_pro_tuples)
+                for stf_built in m.pro_stf_built_dict.get(
+                    (sit, pro, stf), []))
     else:
         if (sit, pro, stf) in m.pro_const_cap_dict:
             cap_pro = m.process_dict['inst-cap'][(stf, sit, pro)]
@@ -708,6 +718,10 @@ def res_global_co2_budget_rule(m):
     elif (m.global_prop_dict['value'][min(m.stf_list), 'CO2 budget']) >= 0:
         co2_output_sum = 0
         for stf in m.stf:
+            if m.mode['int']:
+                dist = m.stf_factor_dict['stf_dist'][stf]
+            else:
+                dist = stf_dist(stf, m)
             for tm in m.tm:
                 for sit in m.sit:
                     # minus because negative commodity_balance represents
@@ -715,8 +729,7 @@ def res_global_co2_budget_rule(m):
                     co2_output_sum += (- commodity_balance
                                        (m, tm, stf, sit, 'CO2') *
                                        m.typeday['weight_typeday'][(stf, tm)] *
-                                       m.weight *
-                                       stf_dist(stf, m))
+                                       m.weight * dist)
 
         return (co2_output_sum <=
                 m.global_prop_dict['value'][min(m.stf), 'CO2 budget'])
@@ -842,6 +855,8 @@ def cost_rule(m):
 def co2_rule(m):
     co2_output_sum = 0
     for stf in m.stf:
+        if m.mode['int']:
+            dist = m.stf_factor_dict['stf_dist'][stf]
         for tm in m.tm:
             for sit in m.sit:
                 # minus because negative commodity_balance represents
@@ -849,7 +864,7 @@ def co2_rule(m):
                 if m.mode['int']:
                     co2_output_sum += (- commodity_balance(m, tm, stf, sit, 'CO2') *
                                        m.typeday['weight_typeday'][(stf, tm)] *
-                                       m.weight * stf_dist(stf, m))
+                                       m.weight * dist)
                 else:
                     co2_output_sum += (- commodity_balance(m, tm, stf, sit, 'CO2') *
                                        m.weight)
@@ -55,7 +55,106 @@ def get_constants(instance):
     return costs, cpro, ctra, csto
 
 
-def get_timeseries(instance, stf, com, sites, timesteps=None):
+def _pivot_blocks(entity, keys, rows, columns):
+    # {key: DataFrame rows x columns} of an entity (Series or DataFrame), the
+    # values are summed over all index levels not in keys, rows and columns
+    if entity.empty:
+        return {}
+    entity = entity.groupby(level=keys + rows + columns).sum()
+    blocks = {}
+    for key, block in entity.groupby(level=keys):
+        if not isinstance(key, tuple):
+            key = (key,)
+        blocks[key] = block.droplevel(keys).unstack(columns)
+    return blocks
+
+
+def _sum_sites(block, sites, level='sit', strict=True):
+    # sum the columns of a block over the given sites; raises a KeyError if
+    # a site (strict) or all sites are missing
+    labels = block.columns.get_level_values(level)
+    missing = set(sites).difference(labels)
+    if (strict and missing) or len(missing) == len(set(sites)):
+        raise KeyError(sorted(missing, key=str))
+    selected = block.loc[:, labels.isin(sites)]
+    others = [k for k, name in enumerate(block.columns.names)
+              if name != level]
+    if not others:
+        return selected.sum(axis=1)
+    return selected.T.groupby(level=others).sum().T
+
+
+class TimeseriesCache(object):
+    """ Flow entities of a model instance or result container, pivoted once
+    per entity into blocks {key: DataFrame} with the timesteps as rows and
+    the sites (and processes or partner sites) as columns. get_timeseries
+    answers all commodities, sites and periods with slices of these blocks.
+
+    A cache refers to the solution at its creation, so callers create one
+    per report or set of figures and pass it down instead of keeping it.
+    """
+    # block name: (entities, key levels, row levels, column levels)
+    layouts = {
+        'created': (['e_pro_out'], ['stf', 'com'], ['t'], ['sit', 'pro']),
+        'consumed': (['e_pro_in'], ['stf', 'com'], ['t'], ['sit', 'pro']),
+        'stock': (['e_co_stock'], ['stf', 'com', 'com_type'], ['t'],
+                  ['sit']),
+        'imported': (['e_tra_out'], ['stf', 'com'], ['t'], ['sit', 'sit_']),
+        'exported': (['e_tra_in'], ['stf', 'com'], ['t'], ['sit', 'sit_']),
+        'stored': (['e_sto_con', 'e_sto_in', 'e_sto_out'], ['stf', 'com'],
+                   ['t'], ['sit']),
+        'charged': (['e_valo_con', 'e_valo_in'], ['stf', 'com'], ['t'],
+                    ['sit']),
+        'dsm_up': (['dsm_up'], ['stf', 'com'], ['t'], ['sit']),
+        'dsm_down': (['dsm_down'], ['stf', 'com'], ['t_'], ['sit']),
+        'voltage_angle': (['voltage_angle'], ['stf'], ['t'], ['sit'])}
+
+    def __init__(self, instance):
+        self._instance = instance
+        self._blocks = {}
+        self._demand = None
+        self._timesteps = None
+
+    def timesteps(self):
+        """ Sorted list of all modelled timesteps """
+        if self._timesteps is None:
+            self._timesteps = sorted(get_entity(self._instance, 'tm').index)
+        return self._timesteps
+
+    def demand(self):
+        """ DataFrame (stf, t) x (sit, com) of the demand """
+        if self._demand is None:
+            self._demand = pd.DataFrame.from_dict(
+                get_input(self._instance, 'demand_dict'))
+        return self._demand
+
+    def _entity(self, name):
+        entities = self.layouts[name][0]
+        if len(entities) > 1:
+            return get_entities(self._instance, entities)
+        entity = get_entity(self._instance, entities[0])
+        if name in ('imported', 'exported') and self._instance.mode['dpf']:
+            # avoid negative values for DCPF transmissions, they are flows
+            # in the opposite direction (-0.01 to avoid numerical errors
+            # such as -0)
+            reverse = entity[(entity < -0.01)]
+            reverse = -1 * reverse.swaplevel('sit', 'sit_')
+            entity = pd.concat([entity[entity >= 0], reverse])
+        return entity
+
+    def blocks(self, name):
+        """ All blocks {key: DataFrame} of a block name (c.f. layouts) """
+        if name not in self._blocks:
+            self._blocks[name] = _pivot_blocks(self._entity(name),
+                                               *self.layouts[name][1:])
+        return self._blocks[name]
+
+    def block(self, name, key):
+        """ Block of a key tuple, raises a KeyError if there is none """
+        return self.blocks(name)[key]
+
+
+def get_timeseries(instance, stf, com, sites, timesteps=None, cache=None):
     """Return DataFrames of all timeseries referring to given commodity
 
     Usage:
@@ -68,6 +167,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         - sites: a site name or list of site names
         - timesteps: optional list of timesteps, default: all modelled
           timesteps
+        - cache: optional TimeseriesCache of instance, shared by several
+          calls; default: a new cache for this call
 
     Returns:
         a tuple of (created, consumed, storage, imported, exported, dsm) with
@@ -79,10 +180,15 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         - imported: timeseries of commodity import
         - exported: timeseries of commodity export
         - dsm: timeseries of demand-side management
+
+    The entities are pivoted once per cache (c.f. TimeseriesCache), so
+    further calls with the same cache only slice and sum the cached blocks.
     """
+    if cache is None:
+        cache = TimeseriesCache(instance)
     if timesteps is None:
         # default to all simulated timesteps
-        timesteps = sorted(get_entity(instance, 'tm').index)
+        timesteps = cache.timesteps()
     else:
         timesteps = sorted(timesteps)  # implicit: convert range to list
 
@@ -96,53 +202,29 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         # select relevant timesteps (=rows)
         # select commodity (xs), then the sites from remaining simple columns
         # and sum all together to form a Series
-        demand = (
-            pd.DataFrame.from_dict(
-                get_input(
-                    instance,
-                    'demand_dict')).loc[stf] .loc[timesteps].xs(
-                com,
-                axis=1,
-                level=1)[sites].sum(
-                    axis=1))
+        demand = (cache.demand().loc[stf].loc[timesteps]
+                  .xs(com, axis=1, level=1)[sites].sum(axis=1))
     except KeyError:
         demand = pd.Series(0, index=timesteps)
     demand.name = 'Demand'
 
     # STOCK
-    eco = get_entity(instance, 'e_co_stock')
     try:
-        eco = eco.xs([stf, com, 'Stock'], level=['stf', 'com', 'com_type'])
-        stock = eco.unstack()[sites].sum(axis=1)
+        stock = cache.block('stock', (stf, com, 'Stock'))[sites].sum(axis=1)
     except KeyError:
         stock = pd.Series(0, index=timesteps)
     stock.name = 'Stock'
 
     # PROCESS
-    run = get_entity(instance, 'pro_mode_run')
-    start_up = get_entity(instance, 'pro_mode_startup')
-    pro_out_no_start_up = get_entity(instance, 'pro_out_no_start_up')
-    tau_pro = get_entity(instance, 'tau_pro')
-    pro_out_help_var = get_entity(instance, 'pro_out_help_var')
-    cap_pro = get_entity(instance, 'cap_pro')
-
-    # def_partial_process_output_MILP_3 = get_entity(instance, 'def_partial_process_output_MILP_3')
-
-    created = get_entity(instance, 'e_pro_out')
     try:
-        created = created.xs([stf, com], level=['stf', 'com']).loc[timesteps]
-        created = created.unstack(level='sit')[sites].fillna(0).sum(axis=1)
-        created = created.unstack(level='pro')
-        created = drop_all_zero_columns(created)
+        created = cache.block('created', (stf, com)).loc[timesteps]
+        created = drop_all_zero_columns(_sum_sites(created, sites))
     except KeyError:
         created = pd.DataFrame(index=timesteps[1:])
 
-    consumed = get_entity(instance, 'e_pro_in')
     try:
-        consumed = consumed.xs([stf, com], level=['stf', 'com']).loc[timesteps]
-        consumed = consumed.unstack(level='sit')[sites].fillna(0).sum(axis=1)
-        consumed = consumed.unstack(level='pro')
-        consumed = drop_all_zero_columns(consumed)
+        consumed = cache.block('consumed', (stf, com)).loc[timesteps]
+        consumed = drop_all_zero_columns(_sum_sites(consumed, sites))
     except KeyError:
         consumed = pd.DataFrame(index=timesteps[1:])
 
@@ -154,21 +236,9 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     try:
         df_transmission = get_input(instance, 'transmission')
         if com in set(df_transmission.index.get_level_values('Commodity')):
-            imported = get_entity(instance, 'e_tra_out')
-            # avoid negative value import for DCPF transmissions
-            if instance.mode['dpf']:
-                # -0.01 to avoid numerical errors such as -0
-                minus_imported = imported[(imported < -0.01)]
-                minus_imported = -1 * minus_imported.swaplevel('sit', 'sit_')
-                imported = imported[imported >= 0]
-                imported = pd.concat([imported, minus_imported])
-            imported = imported.loc[timesteps].xs(
-                [stf, com], level=['stf', 'com'])
-            imported = imported.unstack(level='tra').sum(axis=1)
-            imported = imported.unstack(
-                level='sit_')[sites].fillna(0).sum(
-                axis=1)
-            imported = imported.unstack(level='sit')
+            # imports into sit from sit_ in sites
+            imported = cache.block('imported', (stf, com)).loc[timesteps]
+            imported = _sum_sites(imported.fillna(0), sites, level='sit_')
 
             internal_import = imported[sites].sum(axis=1)  # ...from sites
             if instance.mode['dpf']:
@@ -177,21 +247,9 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
                 imported = imported[other_sites]  # ...from other_sites
             imported = drop_all_zero_columns(imported.fillna(0))
 
-            exported = get_entity(instance, 'e_tra_in')
-            # avoid negative value export for DCPF transmissions
-            if instance.mode['dpf']:
-                # -0.01 to avoid numerical errors such as -0
-                minus_exported = exported[(exported < -0.01)]
-                minus_exported = -1 * minus_exported.swaplevel('sit', 'sit_')
-                exported = exported[exported >= 0]
-                exported = pd.concat([exported, minus_exported])
-            exported = exported.loc[timesteps].xs(
-                [stf, com], level=['stf', 'com'])
-            exported = exported.unstack(level='tra').sum(axis=1)
-            exported = exported.unstack(
-                level='sit')[sites].fillna(0).sum(
-                axis=1)
-            exported = exported.unstack(level='sit_')
+            # exports from sit in sites to sit_
+            exported = cache.block('exported', (stf, com)).loc[timesteps]
+            exported = _sum_sites(exported.fillna(0), sites)
 
             internal_export = exported[sites].sum(
                 axis=1)  # ...to sites (internal)
@@ -214,36 +272,27 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         imported = exported = pd.DataFrame(index=timesteps)
 
     # STORAGE
-    # group storage energies by commodity
-    # select all entries with desired commodity co
-    stored = get_entities(instance, ['e_sto_con', 'e_sto_in', 'e_sto_out'])
+    # storage energies of the commodity, summed over storages and sites
     try:
-        stored = stored.loc[timesteps].xs([stf, com], level=['stf', 'com'])
-        stored = stored.groupby(level=['t', 'sit']).sum()
-        stored = stored.loc[(slice(None), sites), :].sum(level='t')
+        stored = cache.block('stored', (stf, com)).loc[timesteps]
+        stored = _sum_sites(stored, sites, strict=False)
         stored.columns = ['Level', 'Stored', 'Retrieved']
     except (KeyError, ValueError):
         stored = pd.DataFrame(0, index=timesteps,
                               columns=['Level', 'Stored', 'Retrieved'])
 
     # valo
-    # group valo energies by commodity
-    # select all entries with desired commodity co
-    charged = get_entities(instance, ['e_valo_con', 'e_valo_in'])
+    # valo energies of the commodity, summed over valos and sites
     try:
-        charged = charged.loc[timesteps].xs([stf, com], level=['stf', 'com'])
-        charged = charged.groupby(level=['t', 'sit']).sum()
-        charged = charged.loc[(slice(None), sites), :].sum(level='t')
+        charged = cache.block('charged', (stf, com)).loc[timesteps]
+        charged = _sum_sites(charged, sites, strict=False)
         charged.columns = ['SOC', 'Charged']
     except (KeyError, ValueError):
         charged = pd.DataFrame(0, index=timesteps,
-                              columns=['SOC', 'Charged'])
+                               columns=['SOC', 'Charged'])
 
     # DEMAND SIDE MANAGEMENT (load shifting)
-    dsmup = get_entity(instance, 'dsm_up')
-    dsmdo = get_entity(instance, 'dsm_down')
-
-    if dsmup.empty:
+    if not cache.blocks('dsm_up'):
         # if no DSM happened, the demand is not modified (delta = 0)
         delta = pd.Series(0, index=timesteps)
 
@@ -251,18 +300,11 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
         # DSM happened (dsmup implies that dsmdo must be non-zero, too)
         # so the demand will be modified by the difference of DSM up and
         # DSM down uses
-        # for sit in m.dsm_site_tuples:
         try:
-            # select commodity
-            dsmup = dsmup.xs([stf, com], level=['stf', 'com'])
-            dsmdo = dsmdo.xs([stf, com], level=['stf', 'com'])
-
-            # select sites
-            dsmup = dsmup.unstack()[sites].sum(axis=1)
-            dsmdo = dsmdo.unstack()[sites].sum(axis=1)
+            dsmup = cache.block('dsm_up', (stf, com))[sites].sum(axis=1)
 
-            # convert dsmdo to Series by summing over the first time level
-            dsmdo = dsmdo.unstack().sum(axis=0)
+            # dsmdo is already summed over the first time level
+            dsmdo = cache.block('dsm_down', (stf, com))[sites].sum(axis=1)
             dsmdo.index.names = ['t']
 
             # derive secondary timeseries
@@ -285,9 +327,8 @@ def get_timeseries(instance, stf, com, sites, timesteps=None):
     # VOLTAGE ANGLE of sites
 
     try:
-        voltage_angle = get_entity(instance, 'voltage_angle')
-        voltage_angle = voltage_angle.xs([stf], level=['stf']).loc[timesteps]
-        voltage_angle = voltage_angle.unstack(level='sit')[sites]
+        voltage_angle = cache.block('voltage_angle', (stf,)).loc[timesteps]
+        voltage_angle = voltage_angle[sites]
     except (KeyError, AttributeError):
         voltage_angle = pd.DataFrame(index=timesteps)
     voltage_angle.name = 'Voltage Angle'
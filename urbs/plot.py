@@ -1,11 +1,13 @@
 import matplotlib.pyplot as plt
+import multiprocessing
 import numpy as np
 import os
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from random import random
 from .colorcodes import COLORS
 from .input import get_input
-from .output import get_constants, get_timeseries
+from .output import get_constants, get_timeseries, TimeseriesCache
 from .pyomoio import get_entity
 from .util import is_string
 
@@ -56,50 +58,101 @@ def sort_plot_elements(elements):
     return elements_sorted
 
 
-def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
-         power_name='Power', energy_name='Energy',
-         power_unit='MW', energy_unit='MWh', time_unit='h',
-         figure_size=(20, 40)):
-    """Plot a stacked timeseries of commodity balance and storage.
+def envelope_indices(values, max_points):
+    """Positions of the min/max envelope of a timeseries.
+
+    The timeseries is split into max_points / 2 buckets of consecutive
+    values. The positions of the minimum and maximum of each bucket are
+    kept, so peaks stay visible when a long timeseries is downsampled for
+    plotting.
+
+    Args:
+        values: 1-D array of a timeseries
+        max_points: maximum number of positions
+
+    Returns:
+        sorted array of positions (all positions for short timeseries)
+    """
+    values = np.nan_to_num(np.asarray(values, dtype=float))
+    n = len(values)
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    size = int(np.ceil(n / max(max_points // 2, 1)))
+    buckets = int(np.ceil(n / size))
+    padded = np.pad(values, (0, buckets * size - n), mode='edge')
+    padded = padded.reshape(buckets, size)
+    starts = np.arange(buckets) * size
+    positions = np.concatenate([starts + padded.argmin(axis=1),
+                                starts + padded.argmax(axis=1), [n - 1]])
+    return np.unique(np.minimum(positions, n - 1))
+
+
+def decimate(x, values, max_points, x_range=None):
+    """Downsample a timeseries to its min/max envelope (c.f.
+    envelope_indices).
+
+    Args:
+        x: 1-D array of the x values (hours)
+        values: 1-D array or DataFrame of the timeseries; the envelope of a
+                DataFrame is taken of its row sums, i.e. the top of a
+                stackplot, and applied to all columns
+        max_points: maximum number of points, None disables downsampling
+        x_range: (optional) (first, last) x value of the plotted period; the
+                 timeseries is clipped to it before downsampling, so that
+                 short periods keep every timestep
+
+    Returns:
+        (x, values) tuple of the kept points
+    """
+    if len(values) != len(x):
+        return x, values
+    x = np.asarray(x)
+    if x_range is not None:
+        clip = (x >= x_range[0]) & (x <= x_range[1])
+        x = x[clip]
+        if isinstance(values, pd.DataFrame):
+            values = values.iloc[clip]
+        else:
+            values = np.asarray(values)[clip]
+    if isinstance(values, pd.DataFrame):
+        positions = envelope_indices(values.sum(axis=1).values, max_points)
+        return x[positions], values.iloc[positions]
+    positions = envelope_indices(values, max_points)
+    return x[positions], np.asarray(values)[positions]
 
-    Creates a stackplot of the energy balance of a given commodity, together
-    with stored energy in a second subplot.
+
+def plot_data(prob, stf, com, sit, timesteps=None, cache=None):
+    """Timeseries of a commodity plot (c.f. plot).
+
+    The timeseries cover all timesteps and do not depend on the plotted
+    period. They are a small, picklable slice of the results, from which
+    draw_plot creates the figures without the model instance.
 
     Args:
         - prob: urbs model instance
         - stf: support timeframe
         - com: commodity name to plot
-        - sit: site name to plot
-        - dt: length of each time step (unit: hours)
-        - timesteps: modelled timesteps
-        - timesteps_plot: timesteps to be plotted
-        - power_name: optional string for 'power' label; default: 'Power'
-        - power_unit: optional string for unit; default: 'MW'
-        - energy_name: optional string for 'energy' label; default: 'Energy'
-        - energy_unit: optional string for storage plot; default: 'MWh'
-        - time_unit: optional string for time unit label; default: 'h'
-        - figure_size: optional (width, height) tuple in inch; default: (16, 12)
+        - sit: site name or list of site names to plot
+        - timesteps: modelled timesteps, default: all simulated timesteps
+        - cache: (optional) TimeseriesCache of prob shared by several plots,
+          c.f. get_timeseries
 
     Returns:
-        fig: figure handle
+        a dict of the timeseries created, consumed, stored, demand, original
+        (unshifted demand), deltademand, the timesteps and whether the DSM
+        subplot is shown (plot_dsm)
     """
-    import matplotlib.pyplot as plt
-    import matplotlib as mpl
-
     if timesteps is None:
         # default to all simulated timesteps
         timesteps = sorted(get_entity(prob, 'tm').index)
 
-    # convert timesteps to hour series for the plots
-    hoursteps = timesteps * dt[0]
-    hoursteps_plot = timesteps_plot * dt[0]
-
     if is_string(sit):
         # wrap single site in 1-element list for consistent behaviour
         sit = [sit]
 
     (created, consumed, stored, charged, imported, exported,
-     dsm, voltage_angle) = get_timeseries(prob, stf, com, sit, timesteps)
+     dsm, voltage_angle) = get_timeseries(prob, stf, com, sit, timesteps,
+                                          cache=cache)
 
     # move retrieved/stored storage timeseries to created/consumed and
     # rename storage columns back to 'storage' for color mapping
@@ -156,6 +209,88 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     created = sort_plot_elements(created)
     consumed = sort_plot_elements(consumed)
 
+    return {'created': created, 'consumed': consumed, 'stored': stored,
+            'demand': demand, 'original': original,
+            'deltademand': deltademand, 'plot_dsm': plot_dsm,
+            'timesteps': timesteps}
+
+
+def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
+         power_name='Power', energy_name='Energy',
+         power_unit='MW', energy_unit='MWh', time_unit='h',
+         figure_size=(20, 40), max_points=4000):
+    """Plot a stacked timeseries of commodity balance and storage.
+
+    Creates a stackplot of the energy balance of a given commodity, together
+    with stored energy in a second subplot.
+
+    Args:
+        - prob: urbs model instance
+        - stf: support timeframe
+        - com: commodity name to plot
+        - sit: site name to plot
+        - dt: length of each time step (unit: hours)
+        - timesteps: modelled timesteps
+        - timesteps_plot: timesteps to be plotted
+        - power_name: optional string for 'power' label; default: 'Power'
+        - power_unit: optional string for unit; default: 'MW'
+        - energy_name: optional string for 'energy' label; default: 'Energy'
+        - energy_unit: optional string for storage plot; default: 'MWh'
+        - time_unit: optional string for time unit label; default: 'h'
+        - figure_size: optional (width, height) tuple in inch; default: (16, 12)
+        - max_points: optional maximum number of points per plotted
+          timeseries; the timeseries are clipped to timesteps_plot and, if
+          still longer, downsampled to their min/max envelope (c.f.
+          decimate); None plots every timestep; default: 4000
+
+    Returns:
+        fig: figure handle
+    """
+    return draw_plot(plot_data(prob, stf, com, sit, timesteps), stf, com, sit,
+                     dt, timesteps_plot, power_name=power_name,
+                     energy_name=energy_name, power_unit=power_unit,
+                     energy_unit=energy_unit, time_unit=time_unit,
+                     figure_size=figure_size, max_points=max_points)
+
+
+def draw_plot(data, stf, com, sit, dt, timesteps_plot,
+              power_name='Power', energy_name='Energy',
+              power_unit='MW', energy_unit='MWh', time_unit='h',
+              figure_size=(20, 40), max_points=4000):
+    """Draw the figure of a commodity plot from its timeseries.
+
+    Args:
+        - data: timeseries of the plot (c.f. plot_data)
+        - stf, com, sit, dt, timesteps_plot: c.f. plot
+        - power_name, energy_name, power_unit, energy_unit, time_unit,
+          figure_size, max_points: c.f. plot
+
+    Returns:
+        fig: figure handle
+    """
+    import matplotlib.pyplot as plt
+    import matplotlib as mpl
+
+    if is_string(sit):
+        # wrap single site in 1-element list for consistent behaviour
+        sit = [sit]
+
+    created = data['created']
+    consumed = data['consumed']
+    stored = data['stored']
+    demand = data['demand']
+    original = data['original']
+    deltademand = data['deltademand']
+    plot_dsm = data['plot_dsm']
+
+    # convert timesteps to hour series for the plots
+    hoursteps = data['timesteps'] * dt[0]
+    hoursteps_plot = timesteps_plot * dt[0]
+
+    # long timeseries are clipped to the plotted period and downsampled to
+    # their min/max envelope (c.f. decimate)
+    period = (hoursteps_plot[0], hoursteps_plot[-1])
+
     # FIGURE
     fig = plt.figure(figsize=figure_size)
     all_axes = []
@@ -173,15 +308,17 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     # PLOT CONSUMED
 
     # stack plot for consumed commodities (divided by dt for power)
-    sp00 = ax0.stackplot(hoursteps[1:],
-                         -consumed.values.T / dt[0],
+    x, stack = decimate(hoursteps[1:], consumed, max_points, period)
+    sp00 = ax0.stackplot(x,
+                         -stack.values.T / dt[0],
                          labels=tuple(consumed.columns),
                          linewidth=0.15)
 
     # line plot for consumed commodities (divided by dt for power)
     for label, series in consumed.items():
         commodity_color = to_color(label)  # get color for current commodity
-        ax1.plot(hoursteps[1:], -series.values / dt[0], label=label, linewidth=0.15, color=commodity_color)
+        x, values = decimate(hoursteps[1:], series.values, max_points, period)
+        ax1.plot(x, -values / dt[0], label=label, linewidth=0.15, color=commodity_color)
 
     # color
     for k, commodity in enumerate(consumed.columns):
@@ -193,15 +330,17 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     # PLOT CREATED
 
     # stack plot for created commodities (divided by dt for power)
-    sp0 = ax0.stackplot(hoursteps[1:],
-                        created.values.T / dt[0],
+    x, stack = decimate(hoursteps[1:], created, max_points, period)
+    sp0 = ax0.stackplot(x,
+                        stack.values.T / dt[0],
                         labels=tuple(created.columns),
                         linewidth=0.15)
 
     # line plot for created commodities (divided by dt for power)
     for label, series in created.items():
         commodity_color = to_color(label)
-        ax1.plot(hoursteps[1:], series.values / dt[0], label=label, linewidth=0.15, color=commodity_color)
+        x, values = decimate(hoursteps[1:], series.values, max_points, period)
+        ax1.plot(x, values / dt[0], label=label, linewidth=0.15, color=commodity_color)
 
     for k, commodity in enumerate(created.columns):
         commodity_color = to_color(commodity)
@@ -219,19 +358,22 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     # line plot for demand (unshifted / shifted) commodities (divided by dt for power)
     # only ax0 requires labeling, since it is used for the legend
 
+    x_original, original = decimate(hoursteps, original.values, max_points,
+                                    period)
     if plot_dsm:
         # line plot for demand (in case of DSM mode: shifted) commodities (divided by dt for power)
-        ax0.plot(hoursteps[1:], demand.values / dt[0], linewidth=1.0,
+        x, demand = decimate(hoursteps[1:], demand.values, max_points, period)
+        ax0.plot(x, demand / dt[0], linewidth=1.0,
                  color=to_color('Shifted'), label='Demand Shifted')
-        ax1.plot(hoursteps[1:], demand.values / dt[0], linewidth=1.0,
+        ax1.plot(x, demand / dt[0], linewidth=1.0,
                  color=to_color('Shifted'))
-        ax0.plot(hoursteps, original.values / dt[0], linewidth=0.8, color=to_color('Unshifted'),
+        ax0.plot(x_original, original / dt[0], linewidth=0.8, color=to_color('Unshifted'),
                  label='Demand')
-        ax1.plot(hoursteps, original.values / dt[0], linewidth=0.8, color=to_color('Unshifted'))
+        ax1.plot(x_original, original / dt[0], linewidth=0.8, color=to_color('Unshifted'))
     else:
-        ax0.plot(hoursteps, original.values / dt[0], linewidth=1.5, color='darkred',
+        ax0.plot(x_original, original / dt[0], linewidth=1.5, color='darkred',
                  label='Demand')
-        ax1.plot(hoursteps, original.values / dt[0], linewidth=1.5, color='darkred')
+        ax1.plot(x_original, original / dt[0], linewidth=1.5, color='darkred')
 
     # legend
     handles, labels = ax0.get_legend_handles_labels()
@@ -280,19 +422,22 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
     all_axes.append(ax2)
 
     # stack plot for stored commodities
+    x, stored = decimate(hoursteps, stored.values, max_points, period)
     try:
-        sp1 = ax2.stackplot(hoursteps, stored.values, linewidth=0.15)
+        sp1 = ax2.stackplot(x, stored, linewidth=0.15)
     except BaseException:
-        stored = pd.Series(0, index=hoursteps)
-        sp1 = ax2.stackplot(hoursteps, stored.values, linewidth=0.15)
+        x, _ = decimate(hoursteps, np.zeros(len(hoursteps)), max_points,
+                        period)
+        stored = pd.Series(0, index=x)
+        sp1 = ax2.stackplot(x, stored.values, linewidth=0.15)
 
     # line plot for stored commodities
     try:
         for series in stored:
-            ax2.plot(hoursteps, series, linewidth=0.15)
+            ax2.plot(x, series, linewidth=0.15)
     except BaseException:
-        stored = pd.Series(0, index=hoursteps)
-        ax2.plot(hoursteps, stored.values, linewidth=0.15)
+        stored = pd.Series(0, index=x)
+        ax2.plot(x, stored.values, linewidth=0.15)
 
     if plot_dsm:
         # hide xtick labels only if DSM plot follows
@@ -319,8 +464,10 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
         all_axes.append(ax3)
 
         # bar plot for DSM up-/downshift power (bar width depending on dt)
-        ax3.bar(hoursteps,
-                deltademand.values / dt[0], width=0.8 * dt[0],
+        x, deltademand = decimate(hoursteps, deltademand.values, max_points,
+                                  period)
+        ax3.bar(x,
+                deltademand / dt[0], width=0.8 * dt[0],
                 color=to_color('Delta'),
                 edgecolor='none')
 
@@ -372,11 +519,42 @@ def plot(prob, stf, com, sit, dt, timesteps, timesteps_plot,
 
     return fig
 
+
+def _render_figures(data, stf, com, sit, site_name, dt, periods,
+                    figure_basename, extensions, colors, kwds):
+    """ Draw and save the figures of one plot tuple for all periods; runs in
+    the processes of result_figures with the headless Agg backend. """
+    if multiprocessing.current_process().name != 'MainProcess':
+        plt.switch_backend('Agg')
+        COLORS.update(colors)
+
+    for period, periodrange in periods.items():
+        # do the plotting
+        fig = draw_plot(data, stf, com, sit, dt, periodrange, **kwds)
+
+        # change the figure title
+        ax0 = fig.get_axes()[0]
+        new_figure_title = 'Stacked Plot of {} in {}, {}'.format(
+            com, site_name, stf)
+        ax0.set_title(new_figure_title)
+
+        # save plot to files
+        for ext in extensions:
+            fig_filename = '{}-{}-{}-{}-{}.{}'.format(
+                figure_basename, stf, com, ''.join(site_name), period, ext)
+            fig.savefig(fig_filename, bbox_inches='tight')
+        plt.close(fig)
+
+
 def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
                    plot_tuples=None, plot_sites_name={},
-                   periods=None, extensions=None, **kwds):
+                   periods=None, extensions=None, processes=None, **kwds):
     """Create plots for multiple periods and sites and save them to files.
 
+    The timeseries of each plot tuple are sliced from the results once
+    (c.f. plot_data), the figures of all periods are drawn and saved in a
+    pool of processes.
+
     Args:
         - prob: urbs model instance
         - figure_basename: relative filename prefix that is shared;
@@ -390,7 +568,13 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
           default: one period 'all' with all timesteps is assumed;
         - extensions: (optional) list of file extensions for plot images,
           default: png, pdf;
-        - ``**kwds: (optional) keyword arguments are forwarded to urbs.plot()``
+        - processes: (optional) number of rendering processes, 1 renders
+          in this process; default: number of CPUs if processes are forked,
+          else 1 (spawned processes re-import the calling script, which
+          then needs an "if __name__ == '__main__':" guard);
+        - ``**kwds: (optional) keyword arguments are forwarded to urbs.plot()``,
+          e.g. max_points to change or disable (None) the downsampling of
+          long timeseries
     """
 
     # retrieve parameter 'dt' from the model
@@ -408,7 +592,19 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
     if extensions is None:
         extensions = ['png', 'pdf']
 
-    # create timeseries plot for each demand (site, commodity) timeseries
+    if processes is None:
+        if multiprocessing.get_start_method() == 'fork':
+            processes = os.cpu_count() or 1
+        else:
+            processes = 1
+    if multiprocessing.current_process().daemon:
+        # daemonic processes are not allowed to have children
+        processes = 1
+
+    # slice the timeseries of each demand (site, commodity) plot tuple from
+    # the flow entities, which are pivoted once for all plot tuples
+    jobs = []
+    cache = TimeseriesCache(prob)
     for stf, sit, com in plot_tuples:
         # wrap single site name in 1-element list for consistent behaviour
         if is_string(sit):
@@ -422,31 +618,22 @@ def result_figures(prob, figure_basename, timesteps, plot_title_prefix=None,
         except BaseException:
             plot_sites_name[sit] = str(sit)
 
-        for period, periodrange in periods.items():
-            # do the plotting
-            fig = plot(prob, stf, com, help_sit, dt, timesteps, periodrange,
-                       **kwds)
-
-            # change the figure title
-            ax0 = fig.get_axes()[0]
-            # if no custom title prefix is specified, use the figure_basename
-            if not plot_title_prefix:
-                plot_title_prefix = os.path.basename(figure_basename)
-
-            # new_figure_title = '{}: {} in {}, {}'.format(
-            #     plot_title_prefix, com, plot_sites_name[sit], stf)
-            # ax0.set_title(new_figure_title)
-            new_figure_title = 'Stacked Plot of {} in {}, {}'.format(
-                com, plot_sites_name[sit], stf)
-            ax0.set_title(new_figure_title)
-
-            # save plot to files
-            for ext in extensions:
-                fig_filename = '{}-{}-{}-{}-{}.{}'.format(
-                    figure_basename, stf, com, ''.join(
-                        plot_sites_name[sit]), period, ext)
-                fig.savefig(fig_filename, bbox_inches='tight')
-            plt.close(fig)
+        data = plot_data(prob, stf, com, help_sit, timesteps, cache=cache)
+        jobs.append((data, stf, com, help_sit, plot_sites_name[sit], dt,
+                     periods, figure_basename, extensions, dict(COLORS),
+                     kwds))
+
+    # draw and save the figures
+    if processes > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(
+                max_workers=min(processes, len(jobs))) as executor:
+            futures = [executor.submit(_render_figures, *job)
+                       for job in jobs]
+            for future in futures:
+                future.result()
+    else:
+        for job in jobs:
+            _render_figures(*job)
 
 
 def to_color(obj=None):
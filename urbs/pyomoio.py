@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 import pyomo.core as pyomo
 
@@ -16,7 +17,13 @@ def get_entity(instance, name):
     # magic: short-circuit if problem contains a result cache
     if hasattr(instance, '_result') and name in instance._result:
         return instance._result[name].copy(deep=True)
+    return _extract_entity(instance, name)
 
+
+def _extract_entity(instance, name):
+    """ Extract values (or duals) of an entity from the model instance,
+    c.f. get_entity; the result cache is not consulted.
+    """
     # retrieve entity, its type and its onset names
     try:
         entity = instance.__getattribute__(name)
@@ -65,33 +72,21 @@ def get_entity(instance, name):
             labels = ['None']
 
     elif isinstance(entity, pyomo.Constraint):
-        if entity.dim() > 1:
-            # check whether all entries of the constraint have
-            # an existing dual variable
-            # in that case add to results
-            results = pd.DataFrame(
-                [key + (instance.dual[entity.__getitem__(key)],)
-                 for (id, key) in entity.id_index_map().items()
-                 if id in instance.dual._dict.keys()])
-        elif entity.dim() == 1:
-            results = pd.DataFrame(
-                [(v[0], instance.dual[v[1]]) for v in entity.iteritems()])
+        if not hasattr(instance, 'dual'):
+            return pd.Series(name=name)
+        if entity.dim() >= 1:
+            # only entries of the constraint with an existing dual variable
+            results = _bulk_dual_values(entity, instance.dual)
         else:
             results = pd.DataFrame(
                 [(v[0], instance.dual[v[1]]) for v in entity.iteritems()])
             labels = ['None']
 
     else:
-        # create DataFrame
-        if entity.dim() > 1:
-            # concatenate index tuples with value if entity has
-            # multidimensional indices v[0]
-            results = pd.DataFrame(
-                [v[0] + (v[1].value,) for v in entity.iteritems()])
-        elif entity.dim() == 1:
-            # otherwise, create tuple from scalar index v[0]
-            results = pd.DataFrame(
-                [(v[0], v[1].value) for v in entity.iteritems()])
+        if entity.dim() >= 1:
+            # bulk extraction: values into a float array (NaN if unset),
+            # index tuples transposed into one array per index level
+            results = _bulk_var_values(entity)
         else:
             # assert(entity.dim() == 0)
             results = pd.DataFrame(
@@ -104,7 +99,13 @@ def get_entity(instance, name):
         if label in labels[:k] or label == name:
             labels[k] = labels[k] + "_"
 
-    if not results.empty:
+    if isinstance(results, pd.Series):
+        # bulk extracted variable values or duals
+        if results.empty:
+            return pd.Series(name=name)
+        results.index.names = labels
+        results.name = name
+    elif not results.empty:
         # name columns according to labels + entity name
         results.columns = labels + [name]
         results.set_index(labels, inplace=True)
@@ -117,6 +118,58 @@ def get_entity(instance, name):
     return results
 
 
+def _bulk_var_values(entity):
+    """ Values of an indexed variable as Series, whose (Multi)Index is built
+    from per-level codes instead of one tuple per value, c.f. _bulk_index.
+    """
+    keys = list(entity.keys())
+    if not keys:
+        return pd.Series(dtype=float)
+    values = np.fromiter(
+        (np.nan if var.value is None else var.value
+         for var in entity.values()),
+        dtype=float, count=len(keys))
+    return pd.Series(values, index=_bulk_index(keys, entity.dim()))
+
+
+def _bulk_dual_values(entity, duals):
+    """ Duals of an indexed constraint as Series, c.f. _bulk_var_values;
+    entries without dual value are left out. duals is the dual suffix, whose
+    lookups are by id of the constraint data, i.e. O(1) per entry.
+    """
+    keys = []
+    values = []
+    for index, con in entity.items():
+        value = duals.get(con)
+        if value is not None:
+            keys.append(index)
+            values.append(value)
+    if not keys:
+        return pd.Series(dtype=float)
+    return pd.Series(np.array(values, dtype=float),
+                     index=_bulk_index(keys, entity.dim()))
+
+
+def _bulk_index(keys, dim):
+    """ (Multi)Index of a list of index tuples. Every level is factorized
+    separately (hash table in C) and the MultiIndex is assembled from levels
+    and integer codes without further checks.
+    """
+    if dim <= 1:
+        return pd.Index(keys)
+    levels = []
+    codes = []
+    for level in zip(*keys):
+        try:
+            level_codes, uniques = pd.factorize(list(level), sort=True)
+        except TypeError:
+            # mixed types, e.g. numbers and strings, can not be sorted
+            level_codes, uniques = pd.factorize(list(level))
+        levels.append(uniques)
+        codes.append(level_codes)
+    return pd.MultiIndex(levels=levels, codes=codes, verify_integrity=False)
+
+
 def get_entities(instance, names):
     """ Return one DataFrame with entities in columns and a common index.
 
@@ -1,19 +1,188 @@
+import math
+import os
 import pandas as pd
+from collections import Counter
 from .input import get_input
-from .output import get_constants, get_timeseries
+from .output import get_constants, get_timeseries, TimeseriesCache
+from .features import get_bigM_tightening
 from .util import is_string
 
 
-def report(instance, filename, report_tuples=None, report_sites_name={}):
+def _cell_value(value):
+    # python value of a table cell, None for missing values
+    if isinstance(value, tuple):
+        return str(value)
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _merged_labels(labels):
+    # label rows of a MultiIndex, repeated labels are left out like the
+    # merged cells of DataFrame.to_excel
+    previous = None
+    for label in labels:
+        row = []
+        changed = previous is None
+        for k, part in enumerate(label):
+            changed = changed or part != previous[k]
+            row.append(_cell_value(part) if changed else None)
+        previous = label
+        yield row
+
+
+def _table_rows(frame):
+    # rows of a DataFrame in the layout of DataFrame.to_excel
+    nindex = frame.index.nlevels
+    index_names = list(frame.index.names)
+    has_index_names = any(name is not None for name in index_names)
+    if frame.columns.nlevels > 1:
+        columns = zip(*_merged_labels(frame.columns))
+        for level, labels in enumerate(columns):
+            yield ([None] * (nindex - 1) + [frame.columns.names[level]] +
+                   list(labels))
+        yield index_names if has_index_names else []
+    else:
+        yield ((index_names if has_index_names else [None] * nindex) +
+               [_cell_value(column) for column in frame.columns])
+
+    if nindex > 1:
+        index_rows = _merged_labels(frame.index)
+    else:
+        index_rows = ([_cell_value(label)] for label in frame.index)
+    for index_row, values in zip(index_rows,
+                                 frame.itertuples(index=False, name=None)):
+        yield index_row + [_cell_value(value) for value in values]
+
+
+class ExcelStreamWriter(object):
+    """ Spreadsheet writer with constant memory: rows are streamed to an
+    openpyxl write-only workbook, which is saved on close. """
+    def __init__(self, filename):
+        from openpyxl import Workbook
+        self._filename = filename
+        self._workbook = Workbook(write_only=True)
+        self._sheets = {}
+
+    def reserve(self, name):
+        """ Create an empty sheet, which is written later (sheet order) """
+        if name not in self._sheets:
+            # sheet names cannot be longer than 31 characters, names which
+            # collide after truncation get a counter suffix
+            titles = {sheet.title for sheet in self._sheets.values()}
+            title = name[:31]
+            counter = 1
+            while title in titles:
+                counter += 1
+                suffix = '~{}'.format(counter)
+                title = name[:31 - len(suffix)] + suffix
+            self._sheets[name] = self._workbook.create_sheet(title)
+        return self._sheets[name]
+
+    def write(self, name, frame):
+        sheet = self.reserve(name)
+        for row in _table_rows(frame):
+            sheet.append(row)
+
+    def close(self):
+        self._workbook.save(self._filename)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class TableFileWriter(object):
+    """ Report writer with one CSV or Parquet file per sheet in a
+    directory. """
+    def __init__(self, dirname, file_format):
+        self._dirname = dirname
+        self._file_format = file_format
+        os.makedirs(dirname, exist_ok=True)
+
+    def reserve(self, name):
+        pass
+
+    def write(self, name, frame):
+        filename = os.path.join(self._dirname, '{}.{}'.format(
+            name.replace(os.sep, '_'), self._file_format))
+        if self._file_format == 'csv':
+            frame.to_csv(filename)
+            return
+        # Parquet needs string column names
+        table = frame.copy()
+        table.columns = ['.'.join(map(str, column))
+                         if isinstance(column, tuple) else str(column)
+                         for column in table.columns]
+        table.index.names = [
+            name if name is not None else 'level_{}'.format(k)
+            for k, name in enumerate(table.index.names)]
+        table.reset_index().to_parquet(filename, compression='zstd')
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def report_writer(filename, report_format=None):
+    """Create the writer of a report.
+
+    Args:
+        - filename: spreadsheet filename (xlsx) or directory name (csv,
+          parquet)
+        - report_format: 'xlsx', 'csv' or 'parquet', default: 'csv' or
+          'parquet' for filenames with this extension, else 'xlsx'
+
+    Returns:
+        an ExcelStreamWriter or TableFileWriter
+    """
+    if report_format is None:
+        extension = os.path.splitext(filename)[1].lstrip('.').lower()
+        report_format = extension if extension in ('csv', 'parquet') \
+            else 'xlsx'
+    if report_format == 'xlsx':
+        return ExcelStreamWriter(filename)
+    if report_format in ('csv', 'parquet'):
+        return TableFileWriter(filename, report_format)
+    raise ValueError("Unknown report format '{}'.".format(report_format))
+
+
+def _report_sites(sit):
+    # sites of a report tuple and their hashable name key
+    if is_string(sit):
+        # wrap single site name in 1-element list for consistent behavior
+        return [sit], sit
+    return sit, tuple(sit)
+
+
+def report(instance, filename, report_tuples=None, report_sites_name={},
+           report_format=None, max_timeseries_rows=None):
     """Write result summary to a spreadsheet file
 
+    Rows are streamed to the file (c.f. ExcelStreamWriter), a timeseries sheet
+    is written as soon as its last report tuple is processed.
+
     Args:
         - instance: a urbs model instance;
         - filename: Excel spreadsheet filename, will be overwritten if exists;
+          directory name for report_format 'csv' or 'parquet';
         - report_tuples: (optional) list of (sit, com) tuples for which to
           create detailed timeseries sheets;
         - report_sites_name: (optional) dict of names for created timeseries
           sheets
+        - report_format: (optional) 'xlsx', 'csv' or 'parquet' (one file per
+          sheet), c.f. report_writer
+        - max_timeseries_rows: (optional) timeseries sheets with more rows
+          are skipped, their sums are still reported
     """
 
     # default to all demand (sit, com) tuples if none are specified
@@ -23,38 +192,44 @@ def report(instance, filename, report_tuples=None, report_sites_name={}):
     costs, cpro, ctra, csto = get_constants(instance)
 
     # create spreadsheet writer object
-    with pd.ExcelWriter(filename) as writer:
+    with report_writer(filename, report_format) as writer:
 
         # write constants to spreadsheet
-        costs.to_frame().to_excel(writer, 'Costs')
-        cpro.to_excel(writer, 'Process caps')
-        ctra.to_excel(writer, 'Transmission caps')
-        csto.to_excel(writer, 'Storage caps')
+        writer.write('Costs', costs.to_frame())
+        writer.write('Process caps', cpro)
+        writer.write('Transmission caps', ctra)
+        writer.write('Storage caps', csto)
 
-        # initialize timeseries tableaus
+        # write big-M values of MILP problems compared to cap-up
+        if hasattr(instance, 'pro_cap_bigM'):
+            writer.write('Big-M', get_bigM_tightening(instance))
+
+        # initialize timeseries tableaus, the flow entities are pivoted once
+        # for all report tuples
         energies = []
         timeseries = {}
-        help_ts = {}
+        cache = TimeseriesCache(instance)
 
-        # collect timeseries data
+        # check existence of predefined names, else define them
+        keys = []
         for stf, sit, com in report_tuples:
-
-            # wrap single site name in 1-element list for consistent behavior
-            if is_string(sit):
-                help_sit = [sit]
-            else:
-                help_sit = sit
-                sit = tuple(sit)
-
-            # check existence of predefined names, else define them
-            try:
-                report_sites_name[sit]
-            except BaseException:
+            help_sit, sit = _report_sites(sit)
+            if sit not in report_sites_name:
                 report_sites_name[sit] = str(sit)
+            keys.append((stf, report_sites_name[sit], com))
+        remaining = Counter(keys)
+        if keys:
+            # commodity sums precede the timeseries sheets
+            writer.reserve('Commodity sums')
+
+        # collect timeseries data
+        for (stf, sit, com), key in zip(report_tuples, keys):
+            help_sit, sit = _report_sites(sit)
 
             for lv in help_sit:
                 (created, consumed, stored, charged, imported, exported,
-                 dsm, voltage_angle) = get_timeseries(instance, stf, com, lv)
+                 dsm, voltage_angle) = get_timeseries(instance, stf, com, lv,
+                                                      cache=cache)
 
                 overprod = pd.DataFrame(
                     columns=['Overproduction'],
@@ -68,7 +243,6 @@ def report(instance, filename, report_tuples=None, report_sites_name={}):
                     axis=1,
                     keys=['Created', 'Consumed', 'Storage', 'valo', 'Import from',
                           'Export to', 'Balance', 'DSM', 'Voltage Angle'])
-                help_ts[(stf, lv, com)] = tableau.copy()
 
                 # timeseries sums
                 help_sums = pd.concat([created.sum(), consumed.sum(),
@@ -80,13 +254,11 @@ def report(instance, filename, report_tuples=None, report_sites_name={}):
                                             'Import', 'Export', 'Balance',
                                             'DSM'])
                 try:
-                    timeseries[(stf, report_sites_name[sit], com)] = \
-                        timeseries[(stf, report_sites_name[sit], com)].add(
-                        help_ts[(stf, lv, com)], axis=1, fill_value=0)
+                    timeseries[key] = timeseries[key].add(
+                        tableau, axis=1, fill_value=0)
                     sums = sums.add(help_sums, fill_value=0)
                 except BaseException:
-                    timeseries[(stf, report_sites_name[sit], com)] = help_ts[
-                        (stf, lv, com)]
+                    timeseries[key] = tableau
                     sums = help_sums
 
             # timeseries sums
@@ -99,18 +271,21 @@ def report(instance, filename, report_tuples=None, report_sites_name={}):
                                    'Export', 'Balance', 'DSM'])
             energies.append(sums.to_frame("{}.{}.{}".format(stf, sit, com)))
 
+            # write timeseries to an individual sheet after its last tuple
+            remaining[key] -= 1
+            if remaining[key] == 0:
+                tableau = timeseries.pop(key)
+                sheet_name = "{}.{}.{} timeseries".format(*key)
+                if (max_timeseries_rows is not None and
+                        len(tableau) > max_timeseries_rows):
+                    print("Warning from report: sheet '{}' with {} rows "
+                          "skipped (max_timeseries_rows).".format(
+                              sheet_name, len(tableau)))
+                else:
+                    writer.write(sheet_name, tableau)
+
         # write timeseries data (if any)
-        if timeseries:
+        if energies:
             # concatenate Commodity sums
             energy = pd.concat(energies, axis=1).fillna(0)
-            energy.to_excel(writer, 'Commodity sums')
-
-            # write timeseries to individual sheets
-            for stf, sit, com in report_tuples:
-                if isinstance(sit, list):
-                    sit = tuple(sit)
-                # sheet names cannot be longer than 31 characters...
-                sheet_name = "{}.{}.{} timeseries".format(
-                    stf, report_sites_name[sit], com)[:31]
-                timeseries[(stf, report_sites_name[sit], com)].to_excel(
-                    writer, sheet_name)
+            writer.write('Commodity sums', energy)
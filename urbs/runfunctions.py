@@ -1,4 +1,9 @@
+import multiprocessing
+import multiprocessing.connection
 import os
+import time
+import traceback
+import pandas as pd
 import pyomo.environ
 from pyomo.opt.base import SolverFactory
 from datetime import datetime, date
@@ -9,6 +14,8 @@ from .input import *
 from .validation import *
 from .saveload import *
 from .features import *
+from .colorcodes import COLORS
+from .warmstart import set_warmstart
 
 
 def prepare_result_directory(result_name):
@@ -32,14 +39,17 @@ def prepare_result_directory(result_name):
     return result_dir
 
 
-def setup_solver(optim, logfile='solver.log'):
-    """ """
+def setup_solver(optim, logfile='solver.log', threads=None):
+    """ set solver options: logfile and, if given, the number of threads
+    the solver may use (ignored by glpk, which is single-threaded) """
     if optim.name == 'gurobi':
         # reference with list of option names
         # http://www.gurobi.com/documentation/5.6/reference-manual/parameters
         optim.set_options("logfile={}".format(logfile))
         # optim.set_options("timelimit=7200")  # seconds
         optim.set_options("mipgap=5e-4")  # default = 1e-4
+        if threads:
+            optim.set_options("threads={}".format(threads))
     elif optim.name == 'glpk':
         # reference with list of options
         # execute 'glpsol --help'
@@ -48,6 +58,8 @@ def setup_solver(optim, logfile='solver.log'):
         # optim.set_options("mipgap=.0005")
     elif optim.name == 'cplex':
         optim.set_options("log={}".format(logfile))
+        if threads:
+            optim.set_options("threads={}".format(threads))
     else:
         print("Warning from setup_solver: no options set for solver "
               "'{}'!".format(optim.name))
@@ -57,7 +69,10 @@ def setup_solver(optim, logfile='solver.log'):
 def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
                  objective, plot_tuples=None,  plot_sites_name=None,
                  plot_periods=None, report_tuples=None,
-                 report_sites_name=None):
+                 report_sites_name=None, threads=None, tee=True,
+                 warmstart=None, valo_fleet=False, result_preset='full',
+                 result_format='hdf5', report_format='xlsx',
+                 max_timeseries_rows=None, plot_processes=None):
     """ run an urbs model for given input, time steps and scenario
 
     Args:
@@ -76,6 +91,24 @@ def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
           (c.f. urbs.report)
         - report_sites_name: (optional) dict of names for sites in
           report_tuples
+        - threads: (optional) number of threads for the solver
+        - tee: print the solver output to the console, default: True
+        - warmstart: (optional) start solution for MILP problems, either
+          'relaxation' (rounded LP relaxation), a ResultContainer (c.f.
+          urbs.load), the filename of a HDF5 result file or a heuristic
+          f(prob, optim), e.g. urbs.relax_and_fix
+        - valo_fleet: aggregate identical valos to fleets, default: False
+        - result_preset: entities saved to the result file, 'full'
+          (default), 'report-only' or 'duals'
+          (c.f. urbs.saveload.result_entities)
+        - result_format: 'hdf5' (default, <scenario>.h5) or 'parquet'
+          (result directory <scenario>.parquet, c.f. urbs.save_parquet)
+        - report_format: 'xlsx' (default, <scenario>.xlsx), 'csv' or
+          'parquet' (report directory <scenario>-report, c.f. urbs.report)
+        - max_timeseries_rows: (optional) timeseries sheets of the report
+          with more rows are skipped
+        - plot_processes: (optional) number of processes rendering the
+          figures (c.f. urbs.result_figures)
 
     Returns:
         the urbs model instance
@@ -93,7 +126,8 @@ def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
     validate_dc_objective(data, objective)
 
     # create model
-    prob = create_model(data, dt, timesteps, objective)
+    prob = create_model(data, dt, timesteps, objective,
+                        valo_fleet=valo_fleet)
     # prob_filename = os.path.join(result_dir, 'model.lp')
     # prob.write(prob_filename, io_options={'symbolic_solver_labels':True})
 
@@ -102,20 +136,31 @@ def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
 
     # solve model and read results
     optim = SolverFactory(Solver)  # cplex, glpk, gurobi, ...
-    optim = setup_solver(optim, logfile=log_filename)
-    result = optim.solve(prob, tee=True)
+    optim = setup_solver(optim, logfile=log_filename, threads=threads)
+    if warmstart is not None and set_warmstart(prob, optim, warmstart):
+        result = optim.solve(prob, tee=tee, warmstart=True)
+    else:
+        result = optim.solve(prob, tee=tee)
     assert str(result.solver.termination_condition) == 'optimal'
     validate_MILP_results(prob)
 
-    # save problem solution (and input data) to HDF5 file
-    save(prob, os.path.join(result_dir, '{}.h5'.format(sce)))
+    # save problem solution (and input data) to HDF5 file or Parquet directory
+    extension = 'parquet' if result_format == 'parquet' else 'h5'
+    save(prob, os.path.join(result_dir, '{}.{}'.format(sce, extension)),
+         preset=result_preset, file_format=result_format)
 
-    # write report to spreadsheet
+    # write report to spreadsheet (or CSV/Parquet directory)
+    if report_format == 'xlsx':
+        report_filename = os.path.join(result_dir, '{}.xlsx').format(sce)
+    else:
+        report_filename = os.path.join(result_dir, '{}-report').format(sce)
     report(
         prob,
-        os.path.join(result_dir, '{}.xlsx').format(sce),
+        report_filename,
         report_tuples=report_tuples,
-        report_sites_name=report_sites_name)
+        report_sites_name=report_sites_name,
+        report_format=report_format,
+        max_timeseries_rows=max_timeseries_rows)
 
     # result plots
     result_figures(
@@ -126,6 +171,132 @@ def run_scenario(input_files, Solver, timesteps, scenario, result_dir, dt,
         plot_tuples=plot_tuples,
         plot_sites_name=plot_sites_name,
         periods=plot_periods,
+        processes=plot_processes,
         figure_size=(24, 9))
 
     return prob
+
+
+def _run_scenario_process(connection, input_files, Solver, timesteps,
+                          scenario, result_dir, dt, objective, colors,
+                          kwargs):
+    """ worker of run_scenarios: runs one scenario and sends a status dict
+    instead of the (not picklable) model instance via connection.
+    Exceptions, e.g. a non-optimal termination condition, are sent as status
+    'failed'.
+    """
+    COLORS.update(colors)
+    start = time.time()
+    try:
+        prob = run_scenario(input_files, Solver, timesteps, scenario,
+                            result_dir, dt, objective, **kwargs)
+        status = {'scenario': scenario.__name__,
+                  'status': 'optimal',
+                  'objective': pyomo.environ.value(prob.objective_function),
+                  'error': None}
+    except Exception:
+        status = {'scenario': scenario.__name__,
+                  'status': 'failed',
+                  'objective': None,
+                  'error': traceback.format_exc()}
+    status['duration'] = time.time() - start
+    connection.send(status)
+    connection.close()
+
+
+def run_scenarios(input_files, Solver, timesteps, scenarios, result_dir, dt,
+                  objective, processes=None, threads=None, colors=None,
+                  **kwargs):
+    """ run several scenarios in a pool of processes
+
+    Every scenario is solved by run_scenario in its own process and writes
+    its own solver log, HDF5 file, spreadsheet and plots to result_dir. A
+    failing scenario does not affect the others. As scenarios are executed
+    in separate processes, calling scripts must protect their entry point
+    with "if __name__ == '__main__':" on platforms without fork (Windows).
+
+    Args:
+        - input_files: filenames of input Excel spreadsheets
+        - Solver: the user specified solver
+        - timesteps: a list of timesteps, e.g. range(0,8761)
+        - scenarios: a list of scenario functions
+        - result_dir: directory name for result spreadsheet and plots
+        - dt: length of each time step (unit: hours)
+        - objective: objective function chosen (either "cost" or "CO2")
+        - processes: (optional) number of scenarios solved concurrently,
+          default: number of CPUs
+        - threads: (optional) number of threads per solver, default: number
+          of CPUs divided by the number of concurrent scenarios
+        - colors: (optional) dict of plot colors added to urbs.COLORS in
+          each process
+        - kwargs: further arguments of run_scenario (plot_tuples,
+          report_tuples, ...)
+
+    Returns:
+        a DataFrame with status, objective value, duration and error message
+        per scenario
+    """
+    # scenario names are used for result files and the summary index
+    names = [scenario.__name__ for scenario in scenarios]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        raise ValueError('Duplicate scenario names: {}'
+                         .format(', '.join(duplicates)))
+
+    if colors is None:
+        colors = {}
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if threads is None:
+        # share the CPUs among the scenarios running at the same time
+        concurrent = max(1, min(processes, len(names)))
+        threads = max(1, (os.cpu_count() or 1) // concurrent)
+    kwargs['tee'] = False
+    kwargs['threads'] = threads
+    # scenarios already run in parallel, figures are rendered sequentially
+    kwargs.setdefault('plot_processes', 1)
+
+    summary = []
+    pending = list(scenarios)
+    running = {}  # connection: (scenario name, process, start time)
+    while pending or running:
+        # a new process for every scenario, so that no solver or pyomo
+        # state is shared and a dying process only fails its own scenario
+        while pending and len(running) < processes:
+            scenario = pending.pop(0)
+            connection, child = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(
+                target=_run_scenario_process,
+                args=(child, input_files, Solver, timesteps, scenario,
+                      result_dir, dt, objective, colors, kwargs))
+            process.start()
+            child.close()
+            running[connection] = (scenario.__name__, process, time.time())
+
+        for connection in multiprocessing.connection.wait(list(running)):
+            name, process, start = running.pop(connection)
+            try:
+                status = connection.recv()
+            except EOFError:
+                # the worker process itself died (e.g. out of memory)
+                process.join()
+                status = {'scenario': name,
+                          'status': 'failed',
+                          'objective': None,
+                          'error': 'process exited with code {}'.format(
+                              process.exitcode),
+                          'duration': time.time() - start}
+            connection.close()
+            process.join()
+            summary.append(status)
+            print('[{}/{}] {}: {}'.format(len(summary), len(scenarios),
+                                          status['scenario'],
+                                          status['status']))
+            if status['error']:
+                print(status['error'])
+
+    summary = (pd.DataFrame(summary)
+                 .set_index('scenario')
+                 .reindex(names))
+    print(summary[['status', 'objective', 'duration']])
+    return summary
@@ -1,32 +1,179 @@
+import json
+import os
 import pandas as pd
-from .pyomoio import get_entity, list_entities
+from collections import OrderedDict
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .pyomoio import _extract_entity, list_entities
+from .features.VariableLoad import disaggregate_valo_fleet
 
+# entities read by report, result_figures and validate_MILP_results
+report_entities = [
+    'tm', 'dt', 'costs',
+    'cap_pro', 'cap_pro_new', 'cap_tra', 'cap_tra_new',
+    'cap_sto_c', 'cap_sto_c_new', 'cap_sto_p', 'cap_sto_p_new',
+    'cap_pro_build', 'cap_sto_build', 'cap_tra_build',
+    'e_co_stock', 'e_pro_in', 'e_pro_out', 'tau_pro',
+    'pro_mode_run', 'pro_mode_startup', 'pro_out_no_start_up',
+    'pro_out_help_var', 'e_tra_in', 'e_tra_out',
+    'e_sto_con', 'e_sto_in', 'e_sto_out', 'e_valo_con', 'e_valo_in',
+    'dsm_up', 'dsm_down', 'voltage_angle']
 
-def create_result_cache(prob):
-    entity_types = ['set', 'par', 'var', 'exp']
-    if hasattr(prob, 'dual'):
-        entity_types.append('con')
+# constraints whose duals are marginal prices (c.f. dual_families)
+marginal_price_constraints = ['res_vertex', 'res_global_co2_limit',
+                              'res_global_co2_budget']
+
+# valo variables, which are split onto the members of aggregated fleets
+valo_fleet_entities = ['e_valo_in', 'e_valo_con', 'e_valo_reset',
+                       'valo_mode_run']
+
+
+def result_entities(prob, preset='full', include=None, exclude=None,
+                    dual_families=None):
+    """Names of the entities of a model instance for the result cache.
+
+    Args:
+        - prob: a urbs model instance
+        - preset: 'full' (all sets, params, variables, expressions and, if
+          the instance has duals, constraints), 'report-only' (entities read
+          by report, result_figures and validate_MILP_results) or 'duals'
+          ('report-only' and the duals of all constraints)
+        - include: (optional) list of further entity names
+        - exclude: (optional) list of entity names to leave out
+        - dual_families: (optional) list of constraint names whose duals
+          are kept, e.g. marginal_price_constraints; default: all
+
+    Returns:
+        a list of entity names
+    """
+    if preset == 'full':
+        entity_types = ['set', 'par', 'var', 'exp']
+        if hasattr(prob, 'dual'):
+            entity_types.append('con')
+    elif preset == 'report-only':
+        entity_types = []
+    elif preset == 'duals':
+        entity_types = []
+        if hasattr(prob, 'dual'):
+            entity_types.append('con')
+        else:
+            print("Warning from result_entities: the model instance has no "
+                  "duals!")
+    else:
+        raise ValueError("Unknown result preset '{}'; choose 'full', "
+                         "'report-only' or 'duals'.".format(preset))
 
     entities = []
+    if preset != 'full':
+        entities.extend(name for name in report_entities
+                        if hasattr(prob, name))
     for entity_type in entity_types:
-        entities.extend(list_entities(prob, entity_type).index.tolist())
+        names = list_entities(prob, entity_type).index.tolist()
+        if entity_type == 'con' and dual_families is not None:
+            names = [name for name in names if name in dual_families]
+        entities.extend(names)
+    if include:
+        entities.extend(name for name in include if name not in entities)
+    if exclude:
+        entities = [name for name in entities if name not in exclude]
+    return entities
+
+
+def _extract_result(prob, name):
+    result = _extract_entity(prob, name)
+    if hasattr(prob, 'valo_fleet_dict') and name in valo_fleet_entities:
+        # results per valo instead of per fleet
+        result = disaggregate_valo_fleet(prob, {name: result})[name]
+    return result
+
 
-    result_cache = {}
-    for entity in entities:
-        result_cache[entity] = get_entity(prob, entity)
-    return result_cache
+class LazyResultCache(Mapping):
+    """ Result cache of a model instance: an entity is extracted on first
+    access and kept afterwards. """
+    def __init__(self, prob, entities):
+        self._prob = prob
+        self._entities = list(entities)
+        self._names = set(self._entities)
+        self._cache = {}
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            if name not in self._names:
+                raise KeyError(name)
+            self._cache[name] = _extract_result(self._prob, name)
+        return self._cache[name]
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._entities)
+
+    def __len__(self):
+        return len(self._entities)
+
+
+def create_result_cache(prob, preset='full', include=None, exclude=None,
+                        lazy=True, dual_families=None):
+    """Create the result cache of a model instance.
+
+    Args:
+        - prob: a urbs model instance containing a solution
+        - preset, include, exclude, dual_families: selection of entities
+          (c.f. result_entities)
+        - lazy: extract entities on first access (default) instead of all
+          at once; a lazy cache refers to prob and is not picklable
+
+    Returns:
+        a dict-like {entity name: Series}
+    """
+    entities = result_entities(prob, preset, include, exclude,
+                               dual_families)
+    if lazy:
+        return LazyResultCache(prob, entities)
+    return {name: _extract_result(prob, name) for name in entities}
 
 
-def save(prob, filename):
-    """Save urbs model input and result cache to a HDF5 store file.
+def save(prob, filename, preset='full', include=None, exclude=None,
+         dual_families=None, file_format=None, threads=None):
+    """Save urbs model input and result cache to a HDF5 store file or a
+    Parquet result directory.
 
     Args:
         - prob: a urbs model instance containing a solution
-        - filename: HDF5 store file to be written
+        - filename: HDF5 store file or Parquet result directory to be written
+        - preset: entities to be saved: 'full' (default), 'report-only' or
+          'duals' (c.f. result_entities)
+        - include: (optional) list of further entity names
+        - exclude: (optional) list of entity names to leave out
+        - dual_families: (optional) list of constraint names whose duals
+          are saved, default: all
+        - file_format: 'hdf5' or 'parquet' (c.f. save_parquet), default:
+          'parquet' for filenames ending with '.parquet', else 'hdf5'
+        - threads: (optional) number of threads writing Parquet files
 
     Returns:
         Nothing
     """
+    if not hasattr(prob, '_result'):
+        prob._result = create_result_cache(prob)
+    if isinstance(prob, ResultContainer):
+        names = [name for name in prob._result
+                 if not exclude or name not in exclude]
+    else:
+        names = result_entities(prob, preset, include, exclude,
+                                dual_families)
+
+    if file_format is None:
+        file_format = 'parquet' if filename.endswith('.parquet') else 'hdf5'
+    if file_format == 'parquet':
+        save_parquet(prob, filename, names, threads)
+        return
+    if file_format != 'hdf5':
+        raise ValueError("Unknown result file format '{}'.".format(
+            file_format))
+
     import warnings
     import tables
     warnings.filterwarnings('ignore',
@@ -34,14 +181,12 @@ def save(prob, filename):
     warnings.filterwarnings('ignore',
                             category=tables.NaturalNameWarning)
 
-    if not hasattr(prob, '_result'):
-        prob._result = create_result_cache(prob)
-
     with pd.HDFStore(filename, mode='w') as store:
         for name in prob._data.keys():
             store['data/'+name] = prob._data[name]
-        for name in prob._result.keys():
-            store['result/'+name] = prob._result[name]
+        for name in names:
+            if name in prob._result:
+                store['result/'+name] = prob._result[name]
 
 
 class ResultContainer(object):
@@ -51,22 +196,385 @@ class ResultContainer(object):
         self._result = result
 
 
-def load(filename):
-    """Load a urbs model result container from a HDF5 store file.
+def _memory_size(value):
+    # memory usage of a cached entity in bytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    return 0
+
+
+class LazyFileCache(Mapping):
+    """ Input or result cache of a result file: an entity is read on first
+    access. With max_memory, the least recently used entities are released
+    when the cached entities exceed max_memory bytes and read again on their
+    next access. """
+    def __init__(self, reader, entities, max_memory=None):
+        self._reader = reader
+        self._entities = list(entities)
+        self._names = set(self._entities)
+        self._max_memory = max_memory
+        self._cache = OrderedDict()
+        self._sizes = {}
+        self._memory = 0
+
+    def __getitem__(self, name):
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return self._cache[name]
+        if name not in self._names:
+            raise KeyError(name)
+        value = self._reader(name)
+        self._cache[name] = value
+        self._sizes[name] = _memory_size(value)
+        self._memory += self._sizes[name]
+        if self._max_memory is not None:
+            # keep at least the entity just read
+            while self._memory > self._max_memory and len(self._cache) > 1:
+                released, _ = self._cache.popitem(last=False)
+                self._memory -= self._sizes.pop(released)
+        return value
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(self._entities)
+
+    def __len__(self):
+        return len(self._entities)
+
+
+def _read_hdf_entity(filename, group, name):
+    return pd.read_hdf(filename, '{}/{}'.format(group, name))
+
+
+def load(filename, entities=None, filters=None, lazy=True, max_memory=None,
+         memory_map=True):
+    """Load a urbs model result container from a HDF5 store file or a
+    Parquet result directory (c.f. save_parquet).
 
     Args:
-        filename: an existing HDF5 store file
+        - filename: an existing HDF5 store file or Parquet result directory
+        - entities: (optional) list of result entity names to be read,
+          default: all
+        - filters: (optional) row selection of the result entities in a
+          Parquet result directory as list of (index level, operator, value),
+          e.g. [('t', '>=', 100), ('t', '<', 200)]; a filter only applies to
+          entities with this index level
+        - lazy: read entities on first access (default) instead of all at
+          once; the caches of a lazy container are LazyFileCache mappings,
+          which keep a reference to filename
+        - max_memory: (optional) memory cap of a lazy container in bytes,
+          per input and result cache; least recently used entities are
+          released and read again on their next access
+        - memory_map: memory-map Parquet files while reading, default: True
+          (HDF5 store files are read without memory mapping)
 
     Returns:
-        prob: the modified instance containing the result cache
+        a ResultContainer whose _data and _result are the input and result
+        caches: LazyFileCache mappings for lazy=True, else dicts
+        {name: DataFrame/Series}; filters restrict the rows of the result
+        entities
     """
-    with pd.HDFStore(filename, mode='r') as store:
-        data_cache = {}
-        for group in store.get_node('data'):
-            data_cache[group._v_name] = store[group._v_pathname]
+    if os.path.isdir(filename):
+        return load_parquet(filename, entities, filters, lazy, max_memory,
+                            memory_map)
+    if filters:
+        print('Warning from load: filters are only applied to Parquet '
+              'result directories!')
 
-        result_cache = {}
-        for group in store.get_node('result'):
-            result_cache[group._v_name] = store[group._v_pathname]
+    with pd.HDFStore(filename, mode='r') as store:
+        names = {'data': [], 'result': []}
+        for key in store.keys():
+            group, _, name = key.lstrip('/').partition('/')
+            if group in names:
+                names[group].append(name)
+        if not lazy:
+            data_cache = {name: store['data/' + name]
+                          for name in names['data']}
+            result_cache = {name: store['result/' + name]
+                            for name in names['result']
+                            if entities is None or name in entities}
+            return ResultContainer(data_cache, result_cache)
 
+    data_cache = LazyFileCache(partial(_read_hdf_entity, filename, 'data'),
+                               names['data'], max_memory)
+    result_cache = LazyFileCache(
+        partial(_read_hdf_entity, filename, 'result'),
+        [name for name in names['result']
+         if entities is None or name in entities], max_memory)
     return ResultContainer(data_cache, result_cache)
+
+
+# Parquet result directories
+# <dirname>/manifest.json: index level names, dtypes and files of all entities
+# <dirname>/data/<name>.parquet: one file per input DataFrame
+# <dirname>/result/group<n>.parquet: one file per group of numeric result
+#     entities with the same index levels in long format (index levels,
+#     entity, value), sorted by entity
+# Index levels and entity names are dictionary-encoded, files are compressed
+# with zstd. Frames which Arrow cannot convert (e.g. columns of mixed type)
+# are pickled instead.
+def _json_label(label):
+    # json-compatible index or column label (tuples are stored as lists)
+    if isinstance(label, tuple):
+        return [_json_label(part) for part in label]
+    if hasattr(label, 'item'):
+        return label.item()
+    return label
+
+
+def _index_dtypes(index):
+    return [str(index.get_level_values(k).dtype)
+            for k in range(index.nlevels)]
+
+
+def _index_columns(nlevels):
+    return ['i{}'.format(k) for k in range(nlevels)]
+
+
+def _flatten_frame(frame):
+    # table with the index levels as (dictionary-encoded) columns i0, i1, ...
+    # and the columns c0, c1, ... (value for a Series) plus its manifest entry
+    entry = {'index': [_json_label(name) for name in frame.index.names],
+             'index_dtypes': _index_dtypes(frame.index)}
+    if isinstance(frame, pd.Series):
+        entry['kind'] = 'series'
+        entry['dtype'] = str(frame.dtype)
+        table = frame.to_frame(name='value')
+    else:
+        entry['kind'] = 'frame'
+        entry['columns'] = [_json_label(column) for column in frame.columns]
+        entry['column_names'] = [_json_label(name)
+                                 for name in frame.columns.names]
+        table = frame.copy()
+        table.columns = ['c{}'.format(k) for k in range(len(frame.columns))]
+    table.index.names = _index_columns(frame.index.nlevels)
+    table = table.reset_index()
+    for column in _index_columns(frame.index.nlevels):
+        if table[column].dtype == object:
+            table[column] = table[column].astype('category')
+    return table, entry
+
+
+def _restore_frame(table, entry, name=None):
+    # inverse of _flatten_frame
+    index_columns = _index_columns(len(entry['index']))
+    for column, dtype in zip(index_columns, entry['index_dtypes']):
+        if str(table[column].dtype) != dtype:
+            table[column] = table[column].astype(dtype)
+    table = table.set_index(index_columns)
+    table.index.names = [tuple(level) if isinstance(level, list) else level
+                         for level in entry['index']]
+    if entry['kind'] == 'series':
+        series = table['value']
+        if str(series.dtype) != entry['dtype']:
+            series = series.astype(entry['dtype'])
+        series.name = name
+        return series
+    columns = [tuple(column) if isinstance(column, list) else column
+               for column in entry['columns']]
+    if len(entry['column_names']) > 1:
+        table.columns = pd.MultiIndex.from_tuples(
+            columns, names=entry['column_names'])
+    else:
+        table.columns = pd.Index(columns, name=entry['column_names'][0])
+    return table
+
+
+def _group_result_entities(result, names):
+    # manifest entries and tables of the result entities; numeric entities
+    # with the same index levels share one table
+    entries = {}
+    tables = {}
+    groups = {}
+    for name in names:
+        if name not in result:
+            continue
+        series = result[name]
+        if not isinstance(series, pd.Series):
+            series = pd.Series(series, name=name)
+        if series.empty:
+            entries[name] = {'kind': 'empty'}
+            continue
+        table, entry = _flatten_frame(series)
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            key = tuple(map(str, entry['index'])) + tuple(
+                entry['index_dtypes'])
+            if key not in groups:
+                groups[key] = 'result/group{}.parquet'.format(len(groups))
+                tables[groups[key]] = []
+            entry['file'] = groups[key]
+            entry['group'] = True
+            table['value'] = table['value'].astype(float)
+            table['entity'] = name
+            tables[groups[key]].append(table)
+        else:
+            entry['file'] = 'result/{}.parquet'.format(name)
+            tables[entry['file']] = table
+        entries[name] = entry
+
+    for file in groups.values():
+        table = pd.concat(tables[file], ignore_index=True)
+        for column in table.columns:
+            if column != 'value' and table[column].dtype == object:
+                table[column] = table[column].astype('category')
+        tables[file] = table
+    return entries, tables
+
+
+def _write_parquet(dirname, file, table):
+    # write one table with zstd compression; returns the file written, which
+    # is a pickle if Arrow cannot convert the table
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        arrow_table = pa.Table.from_pandas(table, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        file = file[:-len('.parquet')] + '.pkl'
+        table.to_pickle(os.path.join(dirname, file))
+        return file
+    pq.write_table(arrow_table, os.path.join(dirname, file),
+                   compression='zstd')
+    return file
+
+
+def save_parquet(prob, dirname, names=None, threads=None):
+    """Save urbs model input and result cache to a Parquet result directory.
+
+    Input frames are written to one file each, numeric result entities with
+    the same index levels are grouped into one file. All files are written
+    in parallel.
+
+    Args:
+        - prob: a urbs model instance or ResultContainer with result cache
+        - dirname: result directory to be written
+        - names: (optional) list of result entity names, default: all
+          entities of the result cache
+        - threads: (optional) number of writing threads
+
+    Returns:
+        Nothing
+    """
+    import pyarrow
+
+    if not hasattr(prob, '_result'):
+        prob._result = create_result_cache(prob)
+    if names is None:
+        names = list(prob._result)
+    os.makedirs(os.path.join(dirname, 'data'), exist_ok=True)
+    os.makedirs(os.path.join(dirname, 'result'), exist_ok=True)
+
+    manifest = {'version': 1, 'data': {}, 'result': {}}
+    tables = {}
+    for name, frame in prob._data.items():
+        table, entry = _flatten_frame(frame)
+        entry['file'] = 'data/{}.parquet'.format(name)
+        manifest['data'][name] = entry
+        tables[entry['file']] = table
+    manifest['result'], result_tables = _group_result_entities(
+        prob._result, names)
+    tables.update(result_tables)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        written = dict(zip(tables, executor.map(
+            lambda file: _write_parquet(dirname, file, tables[file]),
+            tables)))
+    for group in ('data', 'result'):
+        for entry in manifest[group].values():
+            if 'file' in entry:
+                entry['file'] = written[entry['file']]
+
+    with open(os.path.join(dirname, 'manifest.json'), 'w') as file:
+        json.dump(manifest, file, indent=1)
+
+
+_filter_operators = {
+    '==': lambda column, value: column == value,
+    '=': lambda column, value: column == value,
+    '!=': lambda column, value: column != value,
+    '<': lambda column, value: column < value,
+    '<=': lambda column, value: column <= value,
+    '>': lambda column, value: column > value,
+    '>=': lambda column, value: column >= value,
+    'in': lambda column, value: column.isin(value),
+    'not in': lambda column, value: ~column.isin(value)}
+
+
+def _read_parquet_entity(dirname, entry, name, filters=None,
+                         memory_map=False):
+    # read one entity of a Parquet result directory, filters on index levels
+    # are pushed down to the Parquet reader and applied again afterwards, as
+    # some (legacy dataset) readers only apply filters to partition keys
+    if entry['kind'] == 'empty':
+        return pd.Series(name=name)
+    path = os.path.join(dirname, entry['file'])
+    index_columns = _index_columns(len(entry['index']))
+    conditions = []
+    if entry.get('group'):
+        conditions.append(('entity', '==', name))
+    for level, op, value in filters or []:
+        if level in entry['index']:
+            conditions.append(
+                (index_columns[entry['index'].index(level)], op, value))
+
+    if path.endswith('.pkl'):
+        table = pd.read_pickle(path)
+    else:
+        import pyarrow.parquet as pq
+        columns = None
+        if entry.get('group'):
+            columns = index_columns + ['entity', 'value']
+        table = pq.read_table(path, columns=columns,
+                              filters=conditions or None,
+                              memory_map=memory_map).to_pandas()
+    if conditions:
+        selected = pd.Series(True, index=table.index)
+        for column, op, value in conditions:
+            selected &= _filter_operators[op](table[column], value)
+        table = table[selected.values]
+    if entry.get('group'):
+        table = table[index_columns + ['value']].reset_index(drop=True)
+    return _restore_frame(table, entry, name)
+
+
+def _parquet_reader(dirname, entries, filters, memory_map, name):
+    return _read_parquet_entity(dirname, entries[name], name, filters,
+                                memory_map)
+
+
+def load_parquet(dirname, entities=None, filters=None, lazy=True,
+                 max_memory=None, memory_map=True):
+    """Load a urbs model result container from a Parquet result directory.
+
+    Args:
+        - dirname: an existing Parquet result directory (c.f. save_parquet)
+        - entities: (optional) list of result entity names to be read,
+          default: all
+        - filters: (optional) row selection of the result entities as list
+          of (index level, operator, value) (c.f. load)
+        - lazy, max_memory, memory_map: c.f. load
+
+    Returns:
+        a ResultContainer with LazyFileCache mappings (lazy=True) or dicts
+        as input and result caches, c.f. load
+    """
+    with open(os.path.join(dirname, 'manifest.json')) as file:
+        manifest = json.load(file)
+
+    data_reader = partial(_parquet_reader, dirname, manifest['data'], None,
+                          memory_map)
+    result_reader = partial(_parquet_reader, dirname, manifest['result'],
+                            filters, memory_map)
+    result_names = [name for name in manifest['result']
+                    if entities is None or name in entities]
+    if not lazy:
+        return ResultContainer(
+            {name: data_reader(name) for name in manifest['data']},
+            {name: result_reader(name) for name in result_names})
+    return ResultContainer(
+        LazyFileCache(data_reader, manifest['data'], max_memory),
+        LazyFileCache(result_reader, result_names, max_memory))
@@ -0,0 +1,138 @@
+import math
+import pyomo.core as pyomo
+from .saveload import load, create_result_cache
+
+
+def relax_integer_vars(m, variables=None):
+    """Relax binary and integer variables of a model to continuous ones.
+
+    Args:
+        - m: a pyomo ConcreteModel
+        - variables: (optional) iterable of variables to relax, default: all
+          variables of m
+
+    Returns:
+        a dict {var: (domain, lb, ub)} of the relaxed variables, which is
+        needed by restore_integer_vars
+    """
+    if variables is None:
+        variables = m.component_data_objects(pyomo.Var, descend_into=True)
+    relaxed = {}
+    for var in variables:
+        if var.is_binary() or var.is_integer():
+            relaxed[var] = (var.domain, var.lb, var.ub)
+            var.domain = pyomo.Reals
+            var.setlb(relaxed[var][1])
+            var.setub(relaxed[var][2])
+    return relaxed
+
+
+def restore_integer_vars(relaxed):
+    """Restore domains and bounds of variables relaxed by relax_integer_vars.
+    """
+    for var, (domain, lb, ub) in relaxed.items():
+        var.domain = domain
+        var.setlb(lb)
+        var.setub(ub)
+
+
+def round_integer_vars(m):
+    """Round the values of all binary and integer variables of a model."""
+    for var in m.component_data_objects(pyomo.Var, descend_into=True):
+        if ((var.is_binary() or var.is_integer()) and
+                var.value is not None):
+            var.value = int(round(var.value))
+
+
+def set_warmstart_from_result(prob, result):
+    """Copy the values of a previous solution onto the variables of a model.
+
+    Variables are mapped by name and index, so the previous solution may
+    stem from a different model instance (e.g. the same scenario with
+    changed prices). Values of binary and integer variables are rounded;
+    indices without a value in the previous solution are left untouched.
+
+    Args:
+        - prob: a urbs model instance
+        - result: a ResultContainer (c.f. urbs.load), a solved urbs model
+          instance or the filename of a HDF5 result file
+
+    Returns:
+        the number of variables with a start value
+    """
+    if isinstance(result, str):
+        result = load(result)
+    if hasattr(result, '_result'):
+        result_cache = result._result
+    else:
+        result_cache = create_result_cache(result)
+
+    count = 0
+    for var in prob.component_objects(pyomo.Var, descend_into=True):
+        if var.name not in result_cache:
+            continue
+        values = result_cache[var.name]
+        if not var.is_indexed():
+            values = {None: values.iloc[0] if hasattr(values, 'iloc')
+                      else values}
+        else:
+            values = values.to_dict()
+        for index, var_data in var.items():
+            try:
+                value = values[index]
+            except KeyError:
+                continue
+            if value is None or math.isnan(value):
+                continue
+            if var_data.is_binary() or var_data.is_integer():
+                value = int(round(value))
+            var_data.value = value
+            count += 1
+    return count
+
+
+def set_warmstart_from_relaxation(prob, optim):
+    """Solve the LP relaxation of a model and use its rounded solution as a
+    start solution for the MILP.
+
+    Args:
+        - prob: a urbs model instance
+        - optim: a pyomo solver object
+
+    Returns:
+        the termination condition of the relaxed problem as string
+    """
+    relaxed = relax_integer_vars(prob)
+    try:
+        result = optim.solve(prob)
+    finally:
+        restore_integer_vars(relaxed)
+    round_integer_vars(prob)
+    return str(result.solver.termination_condition)
+
+
+def set_warmstart(prob, optim, warmstart):
+    """Set start values of a model for a given warm start source.
+
+    Args:
+        - prob: a urbs model instance
+        - optim: a pyomo solver object (only used for 'relaxation')
+        - warmstart: 'relaxation' for the LP relaxation of prob, a
+          ResultContainer, the filename of a HDF5 result file or a function
+          f(prob, optim) that sets the start values (e.g. relax_and_fix)
+
+    Returns:
+        True if the solver supports warm starts, else False
+    """
+    if isinstance(warmstart, str) and warmstart == 'relaxation':
+        set_warmstart_from_relaxation(prob, optim)
+    elif callable(warmstart):
+        warmstart(prob, optim)
+    else:
+        set_warmstart_from_result(prob, warmstart)
+
+    if not optim.warm_start_capable():
+        print("Warning from set_warmstart: solver '{}' does not support "
+              "warm starts!".format(optim.name))
+        return False
+    return True